@@ -240,27 +240,46 @@ generatorentry_driver = jit.JitDriver(greens=['pycode'],
                                           get_printable_location_genentry,
                                       name='generatorentry')
 
-from pypy.tool.stdlib_opcode import HAVE_ARGUMENT, opmap
+from pypy.tool.stdlib_opcode import HAVE_ARGUMENT, opmap, hasjabs
 YIELD_VALUE = opmap['YIELD_VALUE']
+EXTENDED_ARG = opmap['EXTENDED_ARG']
+_is_absolute_jump = [op in hasjabs for op in range(256)]
 
 @jit.elidable_promote()
 def should_not_inline(pycode):
-    # Should not inline generators with more than one "yield",
-    # as an approximative fix (see issue #1782).  There are cases
-    # where it slows things down; for example calls to a simple
-    # generator that just produces a few simple values with a few
-    # consecutive "yield" statements.  It fixes the near-infinite
-    # slow-down in issue #1782, though...
-    count_yields = 0
+    # Should not inline generators with more than one "yield" inside
+    # loops, as an approximative fix (see issue #1782): each time the
+    # generator is resumed, it goes on from a different "yield", and
+    # the trace of the consumer needs a bridge for each of them.  This
+    # fixes the near-infinite slow-down in issue #1782.  The "yield"s
+    # outside loops are harmless: they are only reached once per
+    # generator, so we still inline e.g. a generator that produces a
+    # few simple values with a few consecutive "yield" statements, or
+    # one that yields a last item after its loop.
+    yields = []
+    loops = []     # (target, position) of every backward jump
     code = pycode.co_code
     n = len(code)
     i = 0
+    extended_arg = 0
     while i < n:
-        c = code[i]
-        op = ord(c)
-        if op == YIELD_VALUE:
-            count_yields += 1
+        position = i
+        op = ord(code[i])
         i += 1
         if op >= HAVE_ARGUMENT:
+            oparg = ord(code[i]) | (ord(code[i + 1]) << 8) | extended_arg
             i += 2
+            extended_arg = 0
+            if op == EXTENDED_ARG:
+                extended_arg = oparg << 16
+            elif _is_absolute_jump[op] and oparg <= position:
+                loops.append((oparg, position))
+        elif op == YIELD_VALUE:
+            yields.append(position)
+    count_yields = 0
+    for position in yields:
+        for target, end in loops:
+            if target <= position < end:
+                count_yields += 1
+                break
     return count_yields >= 2
@@ -319,4 +319,35 @@ def test_should_not_inline(space):
             yield x + 6
         return g.__code__
     ''')
+    assert should_not_inline(w_co) == False
+    w_co = space.appexec([], '''():
+        def g(x):
+            buf = []
+            for y in x:
+                buf.append(y)
+                if len(buf) == 3:
+                    yield buf
+                    buf = []
+            yield buf
+        return g.__code__
+    ''')
+    assert should_not_inline(w_co) == False
+    w_co = space.appexec([], '''():
+        def g(x):
+            for y in x:
+                yield y
+                yield y + 1
+        return g.__code__
+    ''')
+    assert should_not_inline(w_co) == True
+    w_co = space.appexec([], '''():
+        def g(x):
+            while x:
+                if x > 5:
+                    yield x
+                else:
+                    yield -x
+                x -= 1
+        return g.__code__
+    ''')
     assert should_not_inline(w_co) == True
@@ -58,6 +58,7 @@ class GcStats(object):
                      'peak_memory', 'peak_allocated_memory', 'total_arena_memory',
                      'total_rawmalloced_memory', 'nursery_size',
                      'peak_arena_memory', 'peak_rawmalloced_memory',
+                     'released_arena_memory',
                      ):
             setattr(self, item, self._format(getattr(self._s, item)))
         self.memory_used_sum = self._format(self._s.total_gc_memory + self._s.total_memory_pressure +
@@ -95,6 +96,8 @@ class GcStats(object):
     -----------------------------
     Total:                   %s
 
+    Free arena pages given back to the OS: %s
+
     Total time spent in GC:  %s
     """ % (self.total_gc_memory, self.peak_memory,
               self.total_arena_memory,
@@ -111,6 +114,7 @@ class GcStats(object):
            self.jit_backend_allocated,
            extra,
            self.memory_allocated_sum,
+           self.released_arena_memory,
            self.total_gc_time / 1000.0)
 
 
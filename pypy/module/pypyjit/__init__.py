@@ -12,11 +12,14 @@ class Module(MixedModule):
         'dont_trace_here': 'interp_jit.dont_trace_here',
         'trace_next_iteration': 'interp_jit.trace_next_iteration',
         'trace_next_iteration_hash': 'interp_jit.trace_next_iteration_hash',
+        'enable_warmup_cache': 'interp_warmup.enable_warmup_cache',
+        'save_warmup_cache': 'interp_warmup.save_warmup_cache',
         'set_compile_hook': 'interp_resop.set_compile_hook',
         'set_abort_hook': 'interp_resop.set_abort_hook',
         'set_trace_too_long_hook': 'interp_resop.set_trace_too_long_hook',
         'get_stats_snapshot': 'interp_resop.get_stats_snapshot',
         'get_stats_asmmemmgr': 'interp_resop.get_stats_asmmemmgr',
+        'get_loop_stats': 'interp_resop.get_loop_stats',
         # those things are disabled because they have bugs, but if
         # they're found to be useful, fix test_ztranslation_jit_stats
         # in the backend first. get_stats_snapshot still produces
@@ -41,3 +44,14 @@ class Module(MixedModule):
         w_obj = space.wrap(PARAMETERS)
         space.setattr(self, space.newtext('defaults'), w_obj)
         pypy_hooks.space = space
+
+    def shutdown(self, space):
+        # at shutdown, write the warmup cache file.  Ignore I/O errors.
+        from pypy.module.pypyjit.interp_warmup import WarmupCache
+        from rpython.rlib.streamio import StreamErrors
+        cache = space.fromcache(WarmupCache)
+        if cache.is_enabled():
+            try:
+                cache.save()
+            except StreamErrors:
+                pass
@@ -3,8 +3,13 @@ from rpython.rlib import jit_hooks
 from rpython.rlib.jit import JitHookInterface, Counters
 
 from pypy.interpreter.error import OperationError
+from pypy.interpreter.pycode import PyCode
 from pypy.module.pypyjit.interp_resop import (Cache, wrap_greenkey,
     WrappedOp, W_JitLoopInfo, wrap_oplist)
+from pypy.module.pypyjit.interp_warmup import WarmupCache
+from rpython.rtyper.annlowlevel import cast_base_ptr_to_instance
+from rpython.rtyper.lltypesystem import lltype
+from rpython.rtyper.rclass import OBJECT
 
 class PyPyJitIface(JitHookInterface):
     def are_hooks_enabled(self):
@@ -65,6 +70,19 @@ class PyPyJitIface(JitHookInterface):
     def before_compile_bridge(self, debug_info):
         pass
 
+    def on_loop_compiled(self, jitdriver, greenkey):
+        # record the loops for the warmup cache; this doesn't need
+        # are_hooks_enabled() and the full JitDebugInfo
+        warmup = self.space.fromcache(WarmupCache)
+        if not warmup.is_enabled() or jitdriver.name != 'pypyjit':
+            return
+        if greenkey[1].getint():
+            return     # is_being_profiled
+        ll_code = lltype.cast_opaque_ptr(lltype.Ptr(OBJECT),
+                                         greenkey[2].getref_base())
+        pycode = cast_base_ptr_to_instance(PyCode, ll_code)
+        warmup.record_loop(pycode, greenkey[0].getint())
+
     def _compile_hook(self, debug_info, is_bridge):
         space = self.space
         cache = space.fromcache(Cache)
@@ -388,8 +388,35 @@ def get_stats_snapshot(space):
     space.setitem_str(w_counter_times, 'TRACING', space.newfloat(tr_time))
     b_time = jit_hooks.stats_get_times_value(None, Counters.BACKEND)
     space.setitem_str(w_counter_times, 'BACKEND', space.newfloat(b_time))
+    pause = jit_hooks.stats_get_longest_pause(None)
+    space.setitem_str(w_counter_times, 'LONGEST_PAUSE', space.newfloat(pause))
     return W_JitInfoSnapshot(space, w_times, w_counters, w_counter_times)
 
+def get_loop_stats(space):
+    """ Get live statistics about the loops currently alive, as a dict
+    {loop_no: (code_size, guard_failures)}.  'code_size' is the size of
+    the machine code of the loop and its bridges.  'guard_failures' is a
+    dict {guard_no: count} with the number of times each guard of the
+    loop or of its bridges failed and went back to the interpreter;
+    'guard_no' is the same number as the 'bridge_no' of the JitLoopInfo
+    of a bridge attached later to this guard.
+    """
+    ll_stats = jit_hooks.stats_get_loop_stats(None)
+    w_result = space.newdict()
+    w_failures = None
+    for i in range(len(ll_stats)):
+        if ll_stats[i].type == 'l':
+            w_failures = space.newdict()
+            w_value = space.newtuple([space.newint(ll_stats[i].counter),
+                                      w_failures])
+            space.setitem(w_result, space.newint(ll_stats[i].number),
+                          w_value)
+        else:
+            assert w_failures is not None
+            space.setitem(w_failures, space.newint(ll_stats[i].guard),
+                          space.newint(ll_stats[i].counter))
+    return w_result
+
 def get_stats_asmmemmgr(space):
     """Returns the raw memory currently used by the JIT backend,
     as a pair (total_memory_allocated, memory_in_use)."""
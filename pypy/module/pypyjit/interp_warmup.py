@@ -0,0 +1,234 @@
+"""An on-disk cache of the places that the JIT found hot, to reduce
+the warmup time after a process restart.
+
+We cannot save machine code or optimized traces across processes: they
+contain raw addresses, GC pointers to prebuilt constants and descrs
+that only make sense inside the process that produced them.  What we
+save instead is the list of green keys (code object, bytecode position)
+for which a loop was compiled.  When a matching code object is created
+in a later process, we ask the JIT to trace these positions the next
+time they are reached, instead of waiting for their counters to reach
+the normal threshold.
+
+The file format is a versioned text file:
+
+    pypy-jit-warmup <FORMAT_VERSION> <bytecode magic>
+    <crc32 of co_code>\t<co_firstlineno>\t<next_instr>\t<co_name>\t<co_filename>
+    ...
+
+Backslashes, tabs and newlines in co_name and co_filename are escaped
+with a backslash, as in Python string literals.
+
+If the header does not match, the whole file is ignored.  An entry is
+only used if the crc32 of the new code object's bytecode is the same,
+so that a modified source file does not get stale positions.
+"""
+
+import os
+from rpython.rlib import jit_hooks
+from rpython.rlib.jit import dont_look_inside
+from rpython.rlib.rarithmetic import r_uint, intmask
+from rpython.rlib.rstring import StringBuilder
+from rpython.rlib.rzipfile import crc32
+from rpython.rlib import streamio
+from rpython.rlib.streamio import StreamErrors
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+from pypy.interpreter.gateway import unwrap_spec
+from pypy.interpreter.pycode import PyCode, CodeHookCache, default_magic
+from pypy.interpreter.streamutil import wrap_streamerror
+
+FORMAT_VERSION = 2
+HEADER = 'pypy-jit-warmup %d %d' % (FORMAT_VERSION, default_magic)
+
+
+class WarmupEntry(object):
+    """The hot bytecode positions recorded for one code object."""
+
+    def __init__(self, crc, firstlineno, name, filename):
+        self.crc = crc
+        self.firstlineno = firstlineno
+        self.name = name
+        self.filename = filename
+        self.positions = []
+
+    def add_position(self, next_instr):
+        if next_instr not in self.positions:
+            self.positions.append(next_instr)
+
+
+def escape(s):
+    builder = StringBuilder(len(s))
+    for c in s:
+        if c == '\\':
+            builder.append('\\\\')
+        elif c == '\t':
+            builder.append('\\t')
+        elif c == '\n':
+            builder.append('\\n')
+        else:
+            builder.append(c)
+    return builder.build()
+
+def unescape(s):
+    builder = StringBuilder(len(s))
+    i = 0
+    while i < len(s):
+        c = s[i]
+        if c == '\\' and i + 1 < len(s):
+            i += 1
+            c = s[i]
+            if c == 't':
+                c = '\t'
+            elif c == 'n':
+                c = '\n'
+        builder.append(c)
+        i += 1
+    return builder.build()
+
+
+def code_key(pycode):
+    return (pycode.co_filename, pycode.co_name, pycode.co_firstlineno)
+
+def code_crc(pycode):
+    return intmask(crc32(pycode.co_code))
+
+
+class WarmupCache(object):
+    """Records the green keys of the compiled loops, and triggers
+    tracing of the ones loaded from the cache file."""
+
+    def __init__(self, space):
+        self.space = space
+        self.filename = None
+        self.entries = {}     # code_key -> WarmupEntry
+
+    def is_enabled(self):
+        return self.filename is not None
+
+    def enable(self, filename):
+        self.filename = filename
+        self.entries = {}
+        try:
+            stream = streamio.open_file_as_stream(filename, 'r')
+            try:
+                data = stream.readall()
+            finally:
+                stream.close()
+        except StreamErrors:
+            data = ''     # no cache yet, or unreadable: start from scratch
+        self.load(data)
+        self.space.fromcache(CodeHookCache)._jit_warmup_hook = self
+
+    def load(self, data):
+        lines = data.split('\n')
+        if lines[0] != HEADER:
+            return     # wrong version, or not a warmup cache at all
+        for i in range(1, len(lines)):
+            parts = lines[i].split('\t', 4)
+            if len(parts) != 5:
+                continue
+            try:
+                crc = int(parts[0])
+                firstlineno = int(parts[1])
+                next_instr = int(parts[2])
+            except ValueError:
+                continue
+            if next_instr < 0:
+                continue
+            name = unescape(parts[3])
+            filename = unescape(parts[4])
+            key = (filename, name, firstlineno)
+            entry = self.entries.get(key, None)
+            if entry is None or entry.crc != crc:
+                entry = WarmupEntry(crc, firstlineno, name, filename)
+                self.entries[key] = entry
+            entry.add_position(next_instr)
+
+    def dump(self):
+        lines = [HEADER]
+        for entry in self.entries.values():
+            for next_instr in entry.positions:
+                lines.append('%d\t%d\t%d\t%s\t%s' % (
+                    entry.crc, entry.firstlineno, next_instr,
+                    escape(entry.name), escape(entry.filename)))
+        lines.append('')
+        return '\n'.join(lines)
+
+    def save(self):
+        # Several processes may share the file: write a temporary file
+        # next to it and rename it over the cache, so that a process
+        # never reads a partially written file.
+        filename = self.filename
+        assert filename is not None
+        tmpname = '%s.%d.tmp' % (filename, os.getpid())
+        try:
+            stream = streamio.open_file_as_stream(tmpname, 'w')
+            try:
+                stream.write(self.dump())
+            finally:
+                stream.close()
+            os.rename(tmpname, filename)
+        except StreamErrors:
+            try:
+                os.unlink(tmpname)
+            except OSError:
+                pass
+            raise
+
+    def record_loop(self, pycode, next_instr):
+        key = code_key(pycode)
+        crc = code_crc(pycode)
+        entry = self.entries.get(key, None)
+        if entry is None or entry.crc != crc:
+            entry = WarmupEntry(crc, pycode.co_firstlineno, pycode.co_name,
+                                pycode.co_filename)
+            self.entries[key] = entry
+        entry.add_position(next_instr)
+
+    def new_code(self, pycode):
+        # called for every new code object while the cache is enabled
+        entry = self.entries.get(code_key(pycode), None)
+        if entry is None:
+            return
+        if entry.crc != code_crc(pycode):
+            # the source changed: forget the stale positions
+            del self.entries[code_key(pycode)]
+            return
+        for next_instr in entry.positions:
+            if next_instr < len(pycode.co_code):
+                self.trace_next_iteration(pycode, next_instr)
+
+    @dont_look_inside
+    def trace_next_iteration(self, pycode, next_instr):
+        ll_pycode = cast_instance_to_gcref(pycode)
+        jit_hooks.trace_next_iteration('pypyjit', r_uint(next_instr), 0,
+                                       ll_pycode)
+
+
+@unwrap_spec(filename='fsencode')
+def enable_warmup_cache(space, filename):
+    """ enable_warmup_cache(filename)
+
+    Enable the on-disk JIT warmup cache stored in 'filename'.  The
+    positions that were compiled by previous processes using the same
+    file are traced as soon as they are reached again, instead of
+    waiting for the usual 'threshold'.  The positions compiled by this
+    process are added to the file at exit, or when
+    save_warmup_cache() is called.
+    """
+    space.fromcache(WarmupCache).enable(filename)
+
+def save_warmup_cache(space):
+    """ save_warmup_cache()
+
+    Write the JIT warmup cache file now.  Returns the number of code
+    objects with recorded positions.
+    """
+    cache = space.fromcache(WarmupCache)
+    if not cache.is_enabled():
+        return space.newint(0)
+    try:
+        cache.save()
+    except StreamErrors as e:
+        raise wrap_streamerror(space, e, space.newfilename(cache.filename))
+    return space.newint(len(cache.entries))
@@ -279,3 +279,60 @@ class AppTestJitHook(object):
         assert isinstance(stats.w_counters, dict)
         assert sorted(stats.w_counters.keys()) == self.sorted_keys
 
+
+
+class AppTestLoopStats(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        import weakref
+        from rpython.jit.metainterp.memmgr import MemoryManager
+        from rpython.jit.metainterp.compile import ResumeGuardDescr
+        from rpython.rlib import jit_hooks
+        from rpython.rlib.objectmodel import compute_unique_id
+
+        memmgr = MemoryManager()
+        looptoken = JitCellToken()
+        looptoken.number = 7
+
+        class FakeCompiledLoopToken(object):
+            loop_token_wref = weakref.ref(looptoken)
+
+        descr = ResumeGuardDescr()
+        descr.rd_loop_token = FakeCompiledLoopToken()
+
+        def interp_compile_loop():
+            memmgr.keep_loop_alive(looptoken)
+            memmgr.add_code_size(looptoken, 120)
+
+        def interp_fail_guard():
+            descr.count_failure()
+
+        cls.orig_stats_get_loop_stats = jit_hooks.stats_get_loop_stats
+        jit_hooks.stats_get_loop_stats = (
+            lambda warmrunnerdesc: memmgr.get_loop_stats())
+        cls.looptoken = looptoken
+        space = cls.space
+        cls.w_compile_loop = space.wrap(interp2app(interp_compile_loop))
+        cls.w_fail_guard = space.wrap(interp2app(interp_fail_guard))
+        cls.w_guard_no = space.wrap(compute_unique_id(descr))
+
+    def teardown_class(cls):
+        from rpython.rlib import jit_hooks
+        jit_hooks.stats_get_loop_stats = cls.orig_stats_get_loop_stats
+
+    def test_get_loop_stats(self):
+        import pypyjit
+
+        assert pypyjit.get_loop_stats() == {}
+        self.compile_loop()
+        assert pypyjit.get_loop_stats() == {7: (120, {})}
+        self.fail_guard()
+        self.fail_guard()
+        stats = pypyjit.get_loop_stats()
+        assert stats.keys() == [7]
+        code_size, failures = stats[7]
+        assert code_size == 120
+        assert failures == {self.guard_no: 2}
@@ -0,0 +1,140 @@
+import py
+from rpython.tool.udir import udir
+from pypy.interpreter.gateway import interp2app, unwrap_spec
+from pypy.interpreter.pycode import PyCode, CodeHookCache
+from pypy.module.pypyjit.interp_warmup import WarmupCache, HEADER
+from pypy.module.pypyjit.interp_jit import pypyjitdriver
+from pypy.module.pypyjit.hooks import pypy_hooks
+from rpython.jit.metainterp.history import ConstInt, ConstPtr
+from rpython.rtyper.annlowlevel import cast_instance_to_gcref
+
+
+class AppTestWarmupCache(object):
+    spaceconfig = dict(usemodules=('pypyjit',))
+
+    def setup_class(cls):
+        if cls.runappdirect:
+            py.test.skip("Can't run this test with -A")
+        space = cls.space
+        triggered = cls.triggered = []
+
+        def trace_next_iteration(self, pycode, next_instr):
+            triggered.append((pycode.co_name, next_instr))
+        cls.orig_trace_next_iteration = WarmupCache.trace_next_iteration
+        WarmupCache.trace_next_iteration = trace_next_iteration
+
+        @unwrap_spec(w_code=PyCode, next_instr=int, is_being_profiled=int)
+        def interp_on_compile(space, w_code, next_instr, is_being_profiled=0):
+            greenkey = [ConstInt(next_instr), ConstInt(is_being_profiled),
+                        ConstPtr(cast_instance_to_gcref(w_code))]
+            # the warmup cache alone must not enable the full hooks
+            assert not pypy_hooks.are_hooks_enabled()
+            pypy_hooks.on_loop_compiled(pypyjitdriver, greenkey)
+
+        def interp_get_triggered(space):
+            result = space.newlist([space.newtuple([space.newtext(name),
+                                                    space.newint(pos)])
+                                    for name, pos in triggered])
+            del triggered[:]
+            return result
+
+        cls.w_on_compile = space.wrap(interp2app(interp_on_compile))
+        cls.w_get_triggered = space.wrap(interp2app(interp_get_triggered))
+        cls.w_header = space.wrap(HEADER)
+
+    def teardown_class(cls):
+        WarmupCache.trace_next_iteration = cls.orig_trace_next_iteration
+
+    def setup_method(self, meth):
+        self.w_filename = self.space.wrap(str(udir.join('warmup_%s.cache' %
+                                                        meth.__name__)))
+
+    def teardown_method(self, meth):
+        self.space.fromcache(WarmupCache).filename = None
+        self.space.fromcache(CodeHookCache)._jit_warmup_hook = None
+
+    def test_save_and_reload(self):
+        import pypyjit
+        src = "def hot_function(n):\n    while n > 0:\n        n -= 1\n"
+        pypyjit.enable_warmup_cache(self.filename)
+        d = {}
+        exec src in d
+        self.on_compile(d['hot_function'].__code__, 3)
+        self.on_compile(d['hot_function'].__code__, 3)
+        self.on_compile(d['hot_function'].__code__, 7, 1)  # profiled: ignored
+        assert pypyjit.save_warmup_cache() == 1
+        with open(self.filename) as f:
+            lines = f.read().splitlines()
+        assert lines[0] == self.header
+        assert len(lines) == 2
+        assert lines[1].split('\t')[1:4] == ['1', '3', 'hot_function']
+        #
+        # a fresh process would load the file and trigger tracing as soon
+        # as the same code object is created again
+        pypyjit.enable_warmup_cache(self.filename)
+        assert self.get_triggered() == []
+        exec src in {}
+        assert self.get_triggered() == [('hot_function', 3)]
+
+    def test_save_replaces_the_file(self):
+        import pypyjit, os
+        src = "def f(n):\n    while n > 0:\n        n -= 1\n"
+        pypyjit.enable_warmup_cache(self.filename)
+        d = {}
+        exec src in d
+        self.on_compile(d['f'].__code__, 3)
+        assert pypyjit.save_warmup_cache() == 1
+        # a process that is reading the file while another one saves it
+        # still sees the complete old content
+        with open(self.filename) as f:
+            self.on_compile(d['f'].__code__, 5)
+            assert pypyjit.save_warmup_cache() == 1
+            assert len(f.read().splitlines()) == 2
+        with open(self.filename) as f:
+            assert len(f.read().splitlines()) == 3
+        dirname, basename = os.path.split(self.filename)
+        assert [name for name in os.listdir(dirname)
+                     if name.startswith(basename)] == [basename]
+
+    def test_escaped_filename(self):
+        import pypyjit
+        src = "def f(n):\n    while n > 0:\n        n -= 1\n"
+        filename = 'odd\tdir\\name\nfile.py'
+        pypyjit.enable_warmup_cache(self.filename)
+        d = {}
+        exec compile(src, filename, 'exec') in d
+        self.on_compile(d['f'].__code__, 3)
+        assert pypyjit.save_warmup_cache() == 1
+        with open(self.filename) as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 2
+        assert lines[1].split('\t')[3:] == ['f', 'odd\\tdir\\\\name\\nfile.py']
+        #
+        pypyjit.enable_warmup_cache(self.filename)
+        exec compile(src, filename, 'exec') in {}
+        assert self.get_triggered() == [('f', 3)]
+
+    def test_changed_source_is_ignored(self):
+        import pypyjit
+        pypyjit.enable_warmup_cache(self.filename)
+        d = {}
+        exec "def f(n):\n    while n > 0:\n        n -= 1\n" in d
+        self.on_compile(d['f'].__code__, 3)
+        pypyjit.save_warmup_cache()
+        pypyjit.enable_warmup_cache(self.filename)
+        exec "def f(n):\n    while n > 0:\n        n = n - 1\n" in {}
+        assert self.get_triggered() == []
+        assert pypyjit.save_warmup_cache() == 0
+
+    def test_wrong_version_is_ignored(self):
+        import pypyjit
+        with open(self.filename, 'w') as f:
+            f.write('pypy-jit-warmup 0 0\n123\t1\t3\tf\t<string>\n')
+        pypyjit.enable_warmup_cache(self.filename)
+        assert pypyjit.save_warmup_cache() == 0
+
+    def test_missing_file(self):
+        import pypyjit
+        assert pypyjit.save_warmup_cache() == 0     # not enabled
+        pypyjit.enable_warmup_cache(self.filename + '.missing')
+        assert pypyjit.save_warmup_cache() == 0
@@ -26,6 +26,8 @@ class LLAsmInfo(object):
     def __init__(self, lltrace):
         self.ops_offset = None
         self.lltrace = lltrace
+        # no machine code here: use the number of operations as the size
+        self.asmlen = len(lltrace.operations)
 
 class LLTrace(object):
     has_been_freed = False
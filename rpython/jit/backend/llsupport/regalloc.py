@@ -290,6 +290,7 @@ class RegisterManager(object):
         else:
             self.reg_bindings = {}
         self.bindings_to_frame_reg = {}
+        self.hint_regs = {}     # box -> register it should preferably use
         self.position = -1
         self.frame_manager = frame_manager
         self.assembler = assembler
@@ -363,7 +364,9 @@ class RegisterManager(object):
                           (e.g. eax has al)
         selected_reg    - if not None, force a specific register
 
-        returns allocated register or None, if not possible.
+        Otherwise, if 'v' has an entry in 'hint_regs' and that register
+        is free, it is used.  returns allocated register or None, if not
+        possible.
         """
         self._check_type(v)
         assert not isinstance(v, Const)
@@ -399,7 +402,12 @@ class RegisterManager(object):
             return self.reg_bindings[v]
         except KeyError:
             if self.free_regs:
-                loc = self.free_regs.pop()
+                loc = self.hint_regs.get(v, None)
+                if loc is not None and loc in self.free_regs:
+                    self.free_regs = [reg for reg in self.free_regs
+                                      if reg is not loc]
+                else:
+                    loc = self.free_regs.pop()
                 self.reg_bindings[v] = loc
                 return loc
 
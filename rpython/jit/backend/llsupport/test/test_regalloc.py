@@ -398,6 +398,22 @@ class TestRegalloc(object):
             assert fm.get_loc_index(loc) == expected
             assert fm.get_frame_depth() == 10
 
+    def test_hint_regs(self):
+        b0, b1, b2 = newboxes(0, 0, 0)
+        longevity = {b0: (0, 1), b1: (0, 2), b2: (1, 3)}
+        rm = RegisterManager(longevity)
+        rm.hint_regs[b1] = r2
+        rm.hint_regs[b2] = r2
+        rm.next_instruction()
+        assert rm.try_allocate_reg(b0) is r0
+        assert rm.try_allocate_reg(b1) is r2
+        rm._check_invariants()
+        rm.next_instruction()
+        rm.possibly_free_var(b0)
+        # the hinted register is taken: use the next free one instead
+        assert rm.try_allocate_reg(b2) is r0
+        rm._check_invariants()
+
     def test_linkedlist(self):
         class Loc(object):
             def __init__(self, pos, size, tp):
@@ -52,6 +52,36 @@ def detect_sse4a(code=-1):
         code = cpu_id(eax=0x80000001, ret_edx=False, ret_ecx=True)
     return bool(code & (1<<20))
 
+def cpu_id_leaf7():
+    # returns EBX of the CPUID leaf 7, sub-leaf 0 (extended features)
+    asm = ["\xB8\x07\x00\x00\x00",     # MOV EAX, 7
+           "\x31\xC9",                 # XOR ECX, ECX
+           "\x53",                     # PUSH EBX
+           "\x0F\xA2",                 # CPUID
+           "\x89\xD8",                 # MOV EAX, EBX
+           "\x5B",                     # POP EBX
+           "\xC3",                     # RET
+          ]
+    return cpu_info(''.join(asm))
+
+def xgetbv_xcr0():
+    # returns the low 32 bits of XCR0, i.e. the register states that
+    # the OS saves on context switches.  Only valid if OSXSAVE is set.
+    return cpu_info("\x31\xC9"            # XOR ECX, ECX
+                    "\x0F\x01\xD0"        # XGETBV
+                    "\xC3")               # RET
+
+def detect_avx2():
+    code = cpu_id(eax=1, ret_edx=False, ret_ecx=True)
+    if not (code & (1<<27)) or not (code & (1<<28)):    # OSXSAVE, AVX
+        return False
+    # the OS must save the XMM and YMM states
+    if (xgetbv_xcr0() & 0x06) != 0x06:
+        return False
+    if cpu_id(eax=0, ret_edx=False) < 7:    # no leaf 7
+        return False
+    return bool(cpu_id_leaf7() & (1<<5))
+
 def detect_x32_mode():
     # 32-bit         64-bit / x32
     code = cpu_info("\x48"                # DEC EAX
@@ -71,6 +101,8 @@ if __name__ == '__main__':
         print 'Processor supports sse4.2'
     if detect_sse4a():
         print 'Processor supports sse4a'
+    if detect_avx2():
+        print 'Processor supports avx2'
 
     if detect_x32_mode():
         print 'Process is running in "x32" mode.'
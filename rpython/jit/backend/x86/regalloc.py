@@ -1328,6 +1328,9 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
         #   we would like the boxes to be after the jump.
 
     def _compute_hint_frame_locations_from_descr(self, descr):
+        # also fills 'hint_regs': a box passed to the JUMP that is not
+        # allocated yet will preferably get the register that the target
+        # LABEL expects, which saves a move in consider_jump()
         arglocs = descr._x86_arglocs
         jump_op = self.final_jump_op
         assert len(arglocs) == jump_op.numargs()
@@ -1337,6 +1340,11 @@ class RegAlloc(BaseRegalloc, VectorRegallocMixin):
                 loc = arglocs[i]
                 if isinstance(loc, FrameLoc):
                     self.fm.hint_frame_pos[box] = self.fm.get_loc_index(loc)
+                elif isinstance(loc, RegLoc):
+                    if box.type == FLOAT or box.is_vector():
+                        self.xrm.hint_regs[box] = loc
+                    else:
+                        self.rm.hint_regs[box] = loc
 
     def consider_jump(self, op):
         assembler = self.assembler
@@ -464,6 +464,7 @@ def shifts(mod_field):
 #     j - address
 #     i - immediate
 #     x - XMM register
+#     y - YMM register (AVX2, VEX encoded)
 #     a - 4-tuple: (base_register, scale_register, scale, offset)
 #     m - 2-tuple: (base_register, offset)
 class AbstractX86CodeBuilder(object):
@@ -797,6 +798,10 @@ class AbstractX86CodeBuilder(object):
     CMPPD_xxi = xmminsn('\x66', rex_nw, '\x0F\xC2', register(1,8), register(2), '\xC0', immediate(3, 'b'))
     CMPPS_xxi = xmminsn(        rex_nw, '\x0F\xC2', register(1,8), register(2), '\xC0', immediate(3, 'b'))
 
+    # AVX: clears the upper halves of the YMM registers.  Needed after
+    # using them and before running SSE code again, which is slow otherwise
+    VZEROUPPER = insn('\xC5\xF8\x77')
+
     # ------------------------------------------------------------
 
 Conditions = {
@@ -1040,6 +1045,46 @@ define_pxmm_insn('PCMPEQD_x*',   '\x76')
 define_pxmm_insn('PCMPEQW_x*',   '\x75')
 define_pxmm_insn('PCMPEQB_x*',   '\x74')
 
+# ____________________________________________________________
+# AVX2 instructions on the 256-bit YMM registers, with a VEX prefix.
+# Only the register forms 'ymm1 = ymm2 op ymm3' for now; they must only
+# be emitted if detect_feature.detect_avx2() is true.
+
+def vex_yyy_insn(insn_char):
+    # for the instructions whose SSE form has the '\x66' prefix (pp=01)
+    opcode = ord(insn_char)
+    def encode(mc, reg1, reg2, reg3):
+        byte1 = ((~reg2 & 15) << 3) | 0x04 | 0x01     # vvvv, L=1, pp
+        rex_r = 0x80                                  # inverted REX.R
+        if reg1 >= 8:
+            rex_r = 0
+        if reg3 < 8:
+            # two-byte VEX prefix
+            mc.writechar('\xC5')
+            mc.writechar(chr(rex_r | byte1))
+        else:
+            # three-byte VEX prefix, with REX.B set and the map 0F
+            mc.writechar('\xC4')
+            mc.writechar(chr(rex_r | 0x40 | 0x01))
+            mc.writechar(chr(byte1))
+        mc.writechar(chr(opcode))
+        mc.writechar(chr(0xC0 | (reg_number_3bits(mc, reg1) << 3) |
+                         reg_number_3bits(mc, reg3)))
+    encode.is_xmm_insn = True
+    return encode
+
+def define_vex_yyy_insn(insnname, insn_char):
+    assert not hasattr(AbstractX86CodeBuilder, insnname)
+    setattr(AbstractX86CodeBuilder, insnname, vex_yyy_insn(insn_char))
+
+define_vex_yyy_insn('VPADDQ_yyy',    '\xD4')
+define_vex_yyy_insn('VPADDD_yyy',    '\xFE')
+define_vex_yyy_insn('VPSUBQ_yyy',    '\xFB')
+define_vex_yyy_insn('VPSUBD_yyy',    '\xFA')
+define_vex_yyy_insn('VPAND_yyy',     '\xDB')
+define_vex_yyy_insn('VPOR_yyy',      '\xEB')
+define_vex_yyy_insn('VPXOR_yyy',     '\xEF')
+
 # ____________________________________________________________
 
 _classes = (AbstractX86CodeBuilder, X86_64_CodeBuilder, X86_32_CodeBuilder)
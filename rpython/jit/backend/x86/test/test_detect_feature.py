@@ -0,0 +1,36 @@
+import py
+from rpython.jit.backend.x86 import detect_feature
+from rpython.jit.backend.x86.arch import IS_X86_64
+from rpython.jit.backend.x86.rx86 import R
+from rpython.jit.backend.x86.test.test_rx86 import CodeBuilder32
+from rpython.jit.backend.x86.test.test_rx86 import CodeBuilder64
+from rpython.jit.backend.detect_cpu import autodetect
+
+
+def setup_module(mod):
+    if not autodetect().startswith('x86'):
+        py.test.skip("x86 only")
+
+def test_avx2_implies_older_features():
+    if detect_feature.detect_avx2():
+        assert detect_feature.detect_sse4_1()
+        assert detect_feature.detect_sse2()
+
+def test_avx2_instructions_run():
+    if not detect_feature.detect_avx2():
+        py.test.skip("no AVX2 support")
+    if IS_X86_64:
+        s = CodeBuilder64()
+    else:
+        s = CodeBuilder32()
+    s.MOV_ri(R.eax, 40)
+    s.MOVD32_xr(R.xmm1, R.eax)
+    s.MOV_ri(R.eax, 2)
+    s.MOVD32_xr(R.xmm2, R.eax)
+    s.VPADDQ_yyy(R.xmm0, R.xmm1, R.xmm2)
+    s.VPXOR_yyy(R.xmm1, R.xmm1, R.xmm1)
+    s.VPOR_yyy(R.xmm0, R.xmm0, R.xmm1)
+    s.MOVD32_rx(R.eax, R.xmm0)
+    s.VZEROUPPER()
+    s.writechar('\xC3')                   # RET
+    assert detect_feature.cpu_info(s.getvalue()) == 42
@@ -242,3 +242,17 @@ def test_multibyte_nops():
         assert len(cls.MULTIBYTE_NOPs) == 16
         for i in range(16):
             assert len(cls.MULTIBYTE_NOPs[i]) == i
+
+def test_vex_yyy():
+    s = CodeBuilder32()
+    s.VPXOR_yyy(xmm1, xmm2, xmm3)
+    assert s.getvalue() == '\xC5\xED\xEF\xCB'
+
+def test_vex_yyy_64():
+    s = CodeBuilder64()
+    s.VPADDQ_yyy(xmm1, xmm2, xmm3)
+    s.VPADDQ_yyy(xmm8, xmm9, xmm10)
+    s.VPADDQ_yyy(xmm0, xmm15, xmm9)
+    assert s.getvalue() == ('\xC5\xED\xD4\xCB' +
+                            '\xC4\x41\x35\xD4\xC2' +
+                            '\xC4\xC1\x05\xD4\xC1')
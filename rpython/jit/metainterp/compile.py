@@ -93,12 +93,14 @@ class BridgeCompileData(CompileData):
     loop, we need to deal with virtual state and inlining of short preamble
     """
     def __init__(self, trace, runtime_boxes, resumestorage=None, call_pure_results=None,
-                 enable_opts=None, inline_short_preamble=False):
+                 enable_opts=None, inline_short_preamble=False,
+                 keep_virtuals=False):
         self.trace = trace
         self.runtime_boxes = runtime_boxes
         self.call_pure_results = call_pure_results
         self.enable_opts = enable_opts
         self.inline_short_preamble = inline_short_preamble
+        self.keep_virtuals = keep_virtuals
         self.resumestorage = resumestorage
 
     def optimize(self, metainterp_sd, jitdriver_sd, optimizations, unroll):
@@ -109,7 +111,8 @@ class BridgeCompileData(CompileData):
                                    self.call_pure_results,
                                    self.inline_short_preamble,
                                    self.box_names_memo,
-                                   self.resumestorage)
+                                   self.resumestorage,
+                                   self.keep_virtuals)
 
 class UnrolledLoopData(CompileData):
     """ This represents label() ops jump with extra info that's from the
@@ -575,6 +578,9 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
     if hooks is not None:
         debug_info.asminfo = asminfo
         hooks.after_compile(debug_info)
+    if metainterp_sd.warmrunnerdesc is not None and greenkey is not None:
+        metainterp_sd.warmrunnerdesc.hooks.on_loop_compiled(
+            jitdriver_sd.jitdriver, greenkey)
     metainterp_sd.stats.add_new_loop(loop)
     if not we_are_translated():
         metainterp_sd.stats.compiled()
@@ -589,7 +595,10 @@ def send_loop_to_backend(greenkey, jitdriver_sd, metainterp_sd, loop, type,
                                       name=loopname)
     #
     if metainterp_sd.warmrunnerdesc is not None:    # for tests
-        metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(original_jitcell_token)
+        memmgr = metainterp_sd.warmrunnerdesc.memory_manager
+        memmgr.add_code_size(original_jitcell_token,
+                             get_code_size(asminfo, operations))
+        memmgr.keep_loop_alive(original_jitcell_token)
 
 def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
                            operations, original_loop_token, memo):
@@ -636,11 +645,20 @@ def send_bridge_to_backend(jitdriver_sd, metainterp_sd, faildescr, inputargs,
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, None, faildescr,
                                         ops_offset, memo=memo)
     #
+    if metainterp_sd.warmrunnerdesc is not None:    # for tests
+        metainterp_sd.warmrunnerdesc.memory_manager.add_code_size(
+            original_loop_token, get_code_size(asminfo, operations))
     #if metainterp_sd.warmrunnerdesc is not None:    # for tests
     #    metainterp_sd.warmrunnerdesc.memory_manager.keep_loop_alive(
     #        original_loop_token)
     return asminfo
 
+def get_code_size(asminfo, operations):
+    if asminfo is None:
+        # backends that don't report it: use the number of operations
+        return len(operations)
+    return asminfo.asmlen
+
 # ____________________________________________________________
 
 class _DoneWithThisFrameDescr(AbstractFailDescr):
@@ -719,6 +737,7 @@ class AbstractResumeGuardDescr(ResumeDescr):
         raise NotImplementedError("abstract base class")
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
+        self.count_failure()
         if (self.must_compile(deadframe, metainterp_sd, jitdriver_sd)
                 and not rstack.stack_almost_full()):
             self.start_compiling()
@@ -736,6 +755,22 @@ class AbstractResumeGuardDescr(ResumeDescr):
                 resume_in_blackhole(metainterp_sd, jitdriver_sd, self, deadframe)
         assert 0, "unreachable"
 
+    def count_failure(self):
+        # count the failures of this guard that left the machine code,
+        # on the loop token; see MemoryManager.get_loop_stats().  It is
+        # cheap compared to the rest of handle_fail().
+        clt = self.rd_loop_token
+        if clt is None:
+            return
+        looptoken = clt.loop_token_wref()
+        if looptoken is None:
+            return
+        if looptoken.guard_failures is None:
+            looptoken.guard_failures = {}
+        key = compute_unique_id(self)
+        looptoken.guard_failures[key] = (
+            looptoken.guard_failures.get(key, 0) + 1)
+
     def _trace_and_compile_from_bridge(self, deadframe, metainterp_sd,
                                        jitdriver_sd):
         # 'jitdriver_sd' corresponds to the outermost one, i.e. the one
@@ -750,6 +785,9 @@ class AbstractResumeGuardDescr(ResumeDescr):
     def get_jitcounter_hash(self):
         return self.status & self.ST_SHIFT_MASK
 
+    def is_guard_value(self):
+        return (self.status & self.ST_TYPE_MASK) != self.TY_NONE
+
     def must_compile(self, deadframe, metainterp_sd, jitdriver_sd):
         jitcounter = metainterp_sd.warmrunnerdesc.jitcounter
         #
@@ -904,7 +942,13 @@ class ResumeGuardCopiedExcDescr(ResumeGuardCopiedDescr):
     pass
 
 class ResumeAtPositionDescr(ResumeGuardDescr):
-    pass
+    # A bridge from such a guard normally jumps to the preamble of the
+    # loop.  It jumps to the loop itself only if this keeps virtual some
+    # of the objects it passes; the guards that such a bridge needs in
+    # turn have 'may_keep_virtuals' set to False, to avoid long chains
+    # of bridges.
+    _attrs_ = ('may_keep_virtuals',)
+    may_keep_virtuals = True
 
 class CompileLoopVersionDescr(ResumeGuardDescr):
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
@@ -1029,6 +1073,7 @@ class ResumeFromInterpDescr(ResumeDescr):
         metainterp_sd = metainterp.staticdata
         jitdriver_sd = metainterp.jitdriver_sd
         new_loop.original_jitcell_token = jitcell_token = make_jitcell_token(jitdriver_sd)
+        jitcell_token.is_baseline = metainterp.baseline
         propagate_original_jitcell_token(new_loop)
         send_loop_to_backend(self.original_greenkey, metainterp.jitdriver_sd,
                              metainterp_sd, new_loop, "entry bridge",
@@ -1064,8 +1109,10 @@ def compile_trace(metainterp, resumekey, runtime_boxes):
     #
     if isinstance(resumekey, ResumeAtPositionDescr):
         inline_short_preamble = False
+        keep_virtuals = resumekey.may_keep_virtuals
     else:
         inline_short_preamble = True
+        keep_virtuals = False
     inputargs = metainterp.history.inputargs[:]
     trace = metainterp.history.trace
     jitdriver_sd = metainterp.jitdriver_sd
@@ -1078,7 +1125,8 @@ def compile_trace(metainterp, resumekey, runtime_boxes):
         data = BridgeCompileData(trace, runtime_boxes, resumestorage,
                                  call_pure_results=call_pure_results,
                                  enable_opts=enable_opts,
-                                 inline_short_preamble=inline_short_preamble)
+                                 inline_short_preamble=inline_short_preamble,
+                                 keep_virtuals=keep_virtuals)
     else:
         data = SimpleCompileData(trace, resumestorage,
                                  call_pure_results=call_pure_results,
@@ -1109,6 +1157,27 @@ def compile_trace(metainterp, resumekey, runtime_boxes):
     metainterp.retrace_needed(new_trace, info)
     return None
 
+def bridge_jumps_to_own_loop(metainterp, greenkey, jitcell_token):
+    """Called after compiling a bridge that jumps back into the loop
+    'jitcell_token' its guard comes from.  Every such bridge is a path
+    through the loop that fails a guard and then pays for the bridge.
+    When there are 'retrace_hot_bridges' of them, the path that was
+    traced is probably not the common one any more (e.g. the input data
+    changed): invalidate the loop, like quasi-immutable fields do, so
+    that the next time the loop header becomes hot it is traced again
+    along the path that is taken then.  When this is enabled, the loops
+    end with a GUARD_NOT_INVALIDATED (see reached_loop_header()), so
+    that the code already running in the loop leaves it too.
+    """
+    memmgr = metainterp.staticdata.warmrunnerdesc.memory_manager
+    if memmgr.retrace_hot_bridges <= 0 or jitcell_token.invalidated:
+        return
+    jitcell_token.bridges_to_self += 1
+    if jitcell_token.bridges_to_self < memmgr.retrace_hot_bridges:
+        return
+    warmstate = metainterp.jitdriver_sd.warmstate
+    warmstate.invalidate_for_hot_bridges(greenkey, jitcell_token)
+
 # ____________________________________________________________
 
 memory_error = MemoryError()
@@ -64,7 +64,7 @@ class JitCounter:
     'set_decay(decay)', 'decay_all_counters()' is used to globally
     reduce all the stored time values.  They all get multiplied by
     a fraction close to (but smaller than) 1.0, computed from the
-    'decay' parameter.
+    'decay' parameter.  'decay_generation' counts these calls.
 
     'install_new_cell(hash, newcell)' adds the new JitCell to the
     celltable, at the index given by 'hash' (bits 21:32).  Unlike
@@ -98,6 +98,7 @@ class JitCounter:
                                        flavor='raw', zero=True,
                                        track_allocation=False)
         self._nexthash = r_uint(0)
+        self.decay_generation = 0
         #
         # The table of JitCell entries, recording already-compiled loops
         self.celltable = [None] * size
@@ -276,6 +277,7 @@ class JitCounter:
         # time, but where compiling all but the first one is pointless.
         p = rffi.cast(rffi.CCHARP, self.timetable)
         pypy__decay_jit_counters(p, self.decay_by_mult, self.size)
+        self.decay_generation += 1
 
 
 # this function is written directly in C; gcc will optimize it using SSE
@@ -321,7 +323,7 @@ class DeterministicJitCounter(JitCounter):
 
     def decay_all_counters(self):
         "NOT_RPYTHON"
-        pass
+        self.decay_generation += 1
 
     def _clear_all(self):
         self.timetable.clear()
@@ -162,6 +162,10 @@ class HeapCache(object):
         # heap array cache
         # maps descrs to {index: CacheEntry} dicts
         self.heap_array_cache = {}
+        # True if a GUARD_NOT_INVALIDATED was recorded after a
+        # quasi-immutable field of a constant, and no operation that can
+        # invalidate loops was recorded since
+        self.guard_not_invalidated_seen = False
 
     def reset_keep_likely_virtuals(self):
         # Update only 'head_version', but 'likely_virtual_version' remains
@@ -170,6 +174,7 @@ class HeapCache(object):
         self.head_version += _HF_VERSION_INC
         self.heap_cache = {}
         self.heap_array_cache = {}
+        self.guard_not_invalidated_seen = False
 
     @always_inline
     def test_head_version(self, ref_frontend_op):
@@ -194,6 +199,11 @@ class HeapCache(object):
     def invalidate_caches(self, opnum, descr, argboxes):
         self.mark_escaped(opnum, descr, argboxes)
         self.clear_caches(opnum, descr, argboxes)
+        if rop.is_call(opnum):
+            if (rop.is_call_assembler(opnum) or
+                rop.is_call_may_force(opnum) or
+                descr.get_extra_info().check_can_invalidate()):
+                self.guard_not_invalidated_seen = False
 
     def _escape_from_write(self, box, fieldbox):
         if self.is_unescaped(box) and self.is_unescaped(fieldbox):
@@ -503,6 +513,12 @@ class HeapCache(object):
             return box in cache.quasiimmut_seen
         return False
 
+    def is_guard_not_invalidated_known(self):
+        return self.guard_not_invalidated_seen
+
+    def guard_not_invalidated_now_known(self):
+        self.guard_not_invalidated_seen = True
+
     def quasi_immut_now_known(self, fielddescr, box):
         cache = self.heap_cache.get(fielddescr, None)
         if cache is None:
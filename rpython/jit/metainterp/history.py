@@ -118,6 +118,7 @@ class AbstractFailDescr(AbstractDescr):
     _attrs_ = ('adr_jump_offset', 'rd_locs', 'rd_loop_token', 'rd_vector_info')
 
     rd_vector_info = None
+    rd_loop_token = None
 
     def handle_fail(self, deadframe, metainterp_sd, jitdriver_sd):
         raise NotImplementedError
@@ -405,10 +406,15 @@ class JitCellToken(AbstractDescr):
     failed_states = None
     retraced_count = 0
     invalidated = False
+    is_baseline = False    # compiled by the baseline tier, see warmstate.py
+    polymorphic_sites = None   # {(jitcode, pc): number of guard_value bridges}
+    bridges_to_self = 0    # number of bridges jumping back into this loop
     outermost_jitdriver_sd = None
     # and more data specified by the backend when the loop is compiled
     number = -1
     generation = r_int64(0)
+    code_size = 0          # of the loop and its bridges, see memmgr.py
+    guard_failures = None  # {unique id of a guard descr: number of failures}
     # one purpose of LoopToken is to keep alive the CompiledLoopToken
     # returned by the backend.  When the LoopToken goes away, the
     # CompiledLoopToken has its __del__ called, which frees the assembler
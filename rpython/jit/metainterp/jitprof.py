@@ -9,8 +9,8 @@ from rpython.jit.metainterp.jitexc import JitException
 from rpython.rlib.jit import Counters
 
 
-JITPROF_LINES = Counters.ncounters + 1 + 1
-# one for TOTAL, 1 for calls, update if needed
+JITPROF_LINES = Counters.ncounters + 1 + 1 + 1
+# one for TOTAL, 1 for calls, 1 for the longest pause, update if needed
 _CPU_LINES = 4       # the last 4 lines are stored on the cpu
 
 class BaseProfiler(object):
@@ -49,6 +49,9 @@ class EmptyProfiler(BaseProfiler):
     def get_times(self, num):
         return 0.0
 
+    def get_longest_pause(self):
+        return 0.0
+
 class Profiler(BaseProfiler):
     initialized = False
     timer = staticmethod(time.time)
@@ -59,6 +62,8 @@ class Profiler(BaseProfiler):
     calls = 0
     current = None
     cpu = None
+    pause_start = 0.0
+    longest_pause = 0.0
 
     def start(self):
         self.starttime = self.timer()
@@ -67,6 +72,7 @@ class Profiler(BaseProfiler):
         self.counters = [0] * (Counters.ncounters - _CPU_LINES)
         self.calls = 0
         self.current = []
+        self.longest_pause = 0.0
 
     def finish(self):
         self.tk = self.timer()
@@ -77,6 +83,10 @@ class Profiler(BaseProfiler):
         self.t1 = self.timer()
         if self.current:
             self.times[self.current[-1]] += self.t1 - t0
+        else:
+            # the interpreter is paused from now on, until the outermost
+            # event ends (the backend runs nested inside tracing)
+            self.pause_start = self.t1
         self.counters[event] += 1
         self.current.append(event)
 
@@ -91,6 +101,10 @@ class Profiler(BaseProfiler):
             debug_print("BROKEN PROFILER DATA!")
             return
         self.times[ev1] += self.t1 - t0
+        if not self.current:
+            pause = self.t1 - self.pause_start
+            if pause > self.longest_pause:
+                self.longest_pause = pause
 
     def start_tracing(self):   self._start(Counters.TRACING)
     def end_tracing(self):     self._end  (Counters.TRACING)
@@ -115,6 +129,12 @@ class Profiler(BaseProfiler):
     def get_times(self, num):
         return self.times[num]
 
+    def get_longest_pause(self):
+        """Return the longest time, in seconds, during which the
+        interpreter was stopped to trace and compile a single loop or
+        bridge."""
+        return self.longest_pause
+
     def count_ops(self, opnum, kind=Counters.OPS):
         from rpython.jit.metainterp.resoperation import OpHelpers
         self.counters[kind] += 1
@@ -137,6 +157,8 @@ class Profiler(BaseProfiler):
                               tim[Counters.BACKEND])
         line = "TOTAL:      \t\t%f" % (self.tk - self.starttime, )
         debug_print(line)
+        line = "Longest pause:\t\t%f" % (self.longest_pause, )
+        debug_print(line)
         self._print_intline("ops", cnt[Counters.OPS])
         self._print_intline("recorded ops", cnt[Counters.RECORDED_OPS])
         self._print_intline("  calls", calls)
@@ -155,8 +177,14 @@ class Profiler(BaseProfiler):
         self._print_intline("nvirtuals", cnt[Counters.NVIRTUALS])
         self._print_intline("nvholes", cnt[Counters.NVHOLES])
         self._print_intline("nvreused", cnt[Counters.NVREUSED])
+        self._print_intline("numb shared", cnt[Counters.NUMB_SHARED])
+        self._print_intline("numb bytes", cnt[Counters.NUMB_BYTES])
         self._print_intline("vecopt tried", cnt[Counters.OPT_VECTORIZE_TRY])
         self._print_intline("vecopt success", cnt[Counters.OPT_VECTORIZED])
+        self._print_intline("Evicted # of loops", cnt[Counters.EVICTED_LOOPS])
+        self._print_intline("Evicted code size",
+                            cnt[Counters.EVICTED_CODE_SIZE])
+        self._print_intline("Trace backoffs", cnt[Counters.TRACE_BACKOFF])
         cpu = self.cpu
         if cpu is not None:   # for some tests
             self._print_intline("Total # of loops",
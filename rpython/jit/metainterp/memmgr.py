@@ -2,6 +2,11 @@ import math
 from rpython.rlib.rarithmetic import r_int64
 from rpython.rlib.debug import debug_start, debug_print, debug_stop
 from rpython.rlib.objectmodel import we_are_translated
+from rpython.rlib.listsort import make_timsort_class
+from rpython.rlib.jit import Counters
+from rpython.rlib.jit_hooks import LOOP_STATS_CONTAINER
+from rpython.rtyper.lltypesystem import lltype
+from rpython.jit.metainterp.jitprof import EmptyProfiler
 
 #
 # Logic to decide which loops are old and not used any more.
@@ -19,6 +24,19 @@ from rpython.rlib.objectmodel import we_are_translated
 # 'generation' field is much smaller than the current generation, and
 # removed from the set.
 #
+# Additionally, if a 'max_code_size' is set, the total size of the code
+# of the alive loops is bounded: when it grows above the limit, the
+# least recently entered loops are removed from 'alive_loops' (together
+# with their bridges, descrs and resume data, which are freed with them)
+# until the total is back below 3/4 of the limit.  A loop that was
+# entered or compiled during the current or the previous generation is
+# never evicted.
+#
+
+def _generation_lt(token1, token2):
+    return token1.generation < token2.generation
+
+GenerationSort = make_timsort_class(lt=_generation_lt)
 
 class MemoryManager(object):
 
@@ -38,6 +56,8 @@ class MemoryManager(object):
         self.current_generation = r_int64(1)
         self.next_check = r_int64(-1)
         self.alive_loops = {}
+        self.max_code_size = 0
+        self.profiler = EmptyProfiler()
 
     def set_max_age(self, max_age, check_frequency=0):
         if max_age <= 0:
@@ -49,11 +69,21 @@ class MemoryManager(object):
             self.check_frequency = check_frequency
             self.next_check = self.current_generation + 1
 
+    def set_max_code_size(self, max_code_size):
+        # 0 = no limit
+        self.max_code_size = max(max_code_size, 0)
+
     def next_generation(self):
         self.current_generation += 1
         if self.current_generation == self.next_check:
             self._kill_old_loops_now()
             self.next_check = self.current_generation + self.check_frequency
+        if self.max_code_size > 0:
+            self._evict_least_recently_used()
+
+    def add_code_size(self, looptoken, size):
+        # called when a loop or a bridge attached to it is compiled
+        looptoken.code_size += size
 
     def keep_loop_alive(self, looptoken):
         if looptoken.generation != self.current_generation:
@@ -81,3 +111,63 @@ class MemoryManager(object):
             # a single one is not enough for all tests :-(
             rgc.collect(); rgc.collect(); rgc.collect()
         debug_stop("jit-mem-collect")
+
+    def get_alive_code_size(self):
+        total = 0
+        for looptoken in self.alive_loops:
+            total += looptoken.code_size
+        return total
+
+    def get_loop_stats(self):
+        # see LOOP_STATS_CONTAINER in rlib/jit_hooks.py
+        tokens = self.alive_loops.keys()
+        length = len(tokens)
+        for looptoken in tokens:
+            if looptoken.guard_failures is not None:
+                length += len(looptoken.guard_failures)
+        l = lltype.malloc(LOOP_STATS_CONTAINER, length)
+        i = 0
+        for looptoken in tokens:
+            l[i].type = 'l'
+            l[i].number = looptoken.number
+            l[i].guard = 0
+            l[i].counter = looptoken.code_size
+            i += 1
+            if looptoken.guard_failures is not None:
+                for key, count in looptoken.guard_failures.items():
+                    l[i].type = 'g'
+                    l[i].number = looptoken.number
+                    l[i].guard = key
+                    l[i].counter = count
+                    i += 1
+        return l
+
+    def _evict_least_recently_used(self):
+        total = self.get_alive_code_size()
+        if total <= self.max_code_size:
+            return
+        debug_start("jit-mem-evict")
+        debug_print("Code size before:", total)
+        target = self.max_code_size // 4 * 3
+        tokens = self.alive_loops.keys()
+        GenerationSort(tokens).sort()
+        evicted = 0
+        for looptoken in tokens:
+            if total <= target:
+                break
+            if looptoken.generation >= self.current_generation - 1:
+                break      # entered recently, keep the remaining ones
+            del self.alive_loops[looptoken]
+            total -= looptoken.code_size
+            self.profiler.count(Counters.EVICTED_CODE_SIZE,
+                                looptoken.code_size)
+            evicted += 1
+        self.profiler.count(Counters.EVICTED_LOOPS, evicted)
+        debug_print("Loop tokens evicted:", evicted)
+        debug_print("Code size after: ", total)
+        if not we_are_translated() and evicted:
+            looptoken = None
+            tokens = None
+            from rpython.rlib import rgc
+            rgc.collect(); rgc.collect(); rgc.collect()
+        debug_stop("jit-mem-evict")
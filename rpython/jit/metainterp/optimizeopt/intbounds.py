@@ -9,7 +9,7 @@ from rpython.jit.metainterp.optimizeopt.util import make_dispatcher_method
 from rpython.jit.metainterp.resoperation import rop
 from rpython.jit.metainterp.optimizeopt import vstring
 from rpython.jit.codewriter.effectinfo import EffectInfo
-from rpython.rlib.rarithmetic import intmask
+from rpython.rlib.rarithmetic import intmask, ovfcheck
 
 def get_integer_min(is_unsigned, byte_size):
     if is_unsigned:
@@ -30,6 +30,12 @@ class OptIntBounds(Optimization):
     """Keeps track of the bounds placed on integers by guards and remove
        redundant guards"""
 
+    def __init__(self):
+        # relations between two boxes that the guards seen so far have
+        # shown, e.g. 'i0 + 1 < i5' where i5 is the length of a list:
+        # {box b: {box a: k}} means that 'a + k < b', with the largest k
+        self.known_lt = {}
+
     def propagate_forward(self, op):
         return dispatch_opt(self, op)
 
@@ -72,6 +78,21 @@ class OptIntBounds(Optimization):
             else:
                 self.make_constant_int(op, 0)
             return None
+        b1 = self.getintbound(v1)
+        b2 = self.getintbound(v2)
+        if op.getopnum() == rop.INT_OR:
+            b = b1.or_bound(b2)
+            if b1.or_is_identity(b2):
+                self.make_equal_to(op, v1)
+                return None
+            if b2.or_is_identity(b1):
+                self.make_equal_to(op, v2)
+                return None
+        else:
+            b = b1.xor_bound(b2)
+        if b.is_constant():
+            self.make_constant_int(op, b.getint())
+            return None
         return self.emit(op)
 
     def postprocess_INT_OR_or_XOR(self, op):
@@ -79,7 +100,10 @@ class OptIntBounds(Optimization):
         b1 = self.getintbound(v1)
         v2 = self.get_box_replacement(op.getarg(1))
         b2 = self.getintbound(v2)
-        b = b1.or_bound(b2)
+        if op.getopnum() == rop.INT_OR:
+            b = b1.or_bound(b2)
+        else:
+            b = b1.xor_bound(b2)
         self.getintbound(op).intersect(b)
 
     optimize_INT_OR = optimize_INT_OR_or_XOR
@@ -89,6 +113,21 @@ class OptIntBounds(Optimization):
     postprocess_INT_XOR = postprocess_INT_OR_or_XOR
 
     def optimize_INT_AND(self, op):
+        v1 = self.get_box_replacement(op.getarg(0))
+        v2 = self.get_box_replacement(op.getarg(1))
+        b1 = self.getintbound(v1)
+        b2 = self.getintbound(v2)
+        b = b1.and_bound(b2)
+        if b.is_constant():
+            self.make_constant_int(op, b.getint())
+            return None
+        # the mask only clears bits that are already known to be 0
+        if b1.and_is_identity(b2):
+            self.make_equal_to(op, v1)
+            return None
+        if b2.and_is_identity(b1):
+            self.make_equal_to(op, v2)
+            return None
         return self.emit(op)
 
     def postprocess_INT_AND(self, op):
@@ -203,6 +242,7 @@ class OptIntBounds(Optimization):
         r = self.getintbound(op)
         b = b1.lshift_bound(b2)
         r.intersect(b)
+        r.intersect(b1.lshift_bits_bound(b2))
         # intbound.lshift_bound checks for an overflow and if the
         # lshift can be proven not to overflow sets b.has_upper and
         # b.has_lower
@@ -215,6 +255,7 @@ class OptIntBounds(Optimization):
         b1 = self.getintbound(op.getarg(0))
         b2 = self.getintbound(op.getarg(1))
         b = b1.rshift_bound(b2)
+        b.intersect(b1.rshift_bits_bound(b2))
         if b.has_lower and b.has_upper and b.lower == b.upper:
             # constant result (likely 0, for rshifts that kill all bits)
             self.make_constant_int(op, b.lower)
@@ -227,6 +268,22 @@ class OptIntBounds(Optimization):
         b = b1.rshift_bound(b2)
         r = self.getintbound(op)
         r.intersect(b)
+        r.intersect(b1.rshift_bits_bound(b2))
+
+    def optimize_UINT_RSHIFT(self, op):
+        b1 = self.getintbound(op.getarg(0))
+        b2 = self.getintbound(op.getarg(1))
+        b = b1.urshift_bits_bound(b2)
+        if b.is_constant():
+            self.make_constant_int(op, b.getint())
+            return None
+        return self.emit(op)
+
+    def postprocess_UINT_RSHIFT(self, op):
+        b1 = self.getintbound(op.getarg(0))
+        b2 = self.getintbound(op.getarg(1))
+        r = self.getintbound(op)
+        r.intersect(b1.urshift_bits_bound(b2))
 
     def optimize_GUARD_NO_OVERFLOW(self, op):
         lastop = self.last_emitted_operation
@@ -333,9 +390,10 @@ class OptIntBounds(Optimization):
         arg2 = self.get_box_replacement(op.getarg(1))
         b1 = self.getintbound(arg1)
         b2 = self.getintbound(arg2)
-        if b1.known_lt(b2):
+        if b1.known_lt(b2) or self.known_relation(arg1, arg2, 0):
             self.make_constant_int(op, 1)
-        elif b1.known_ge(b2) or arg1 is arg2:
+        elif (b1.known_ge(b2) or arg1 is arg2 or
+                  self.known_relation(arg2, arg1, -1)):
             self.make_constant_int(op, 0)
         else:
             return self.emit(op)
@@ -345,9 +403,10 @@ class OptIntBounds(Optimization):
         arg2 = self.get_box_replacement(op.getarg(1))
         b1 = self.getintbound(arg1)
         b2 = self.getintbound(arg2)
-        if b1.known_gt(b2):
+        if b1.known_gt(b2) or self.known_relation(arg2, arg1, 0):
             self.make_constant_int(op, 1)
-        elif b1.known_le(b2) or arg1 is arg2:
+        elif (b1.known_le(b2) or arg1 is arg2 or
+                  self.known_relation(arg1, arg2, -1)):
             self.make_constant_int(op, 0)
         else:
             return self.emit(op)
@@ -357,9 +416,10 @@ class OptIntBounds(Optimization):
         arg2 = self.get_box_replacement(op.getarg(1))
         b1 = self.getintbound(arg1)
         b2 = self.getintbound(arg2)
-        if b1.known_le(b2) or arg1 is arg2:
+        if (b1.known_le(b2) or arg1 is arg2 or
+                self.known_relation(arg1, arg2, -1)):
             self.make_constant_int(op, 1)
-        elif b1.known_gt(b2):
+        elif b1.known_gt(b2) or self.known_relation(arg2, arg1, 0):
             self.make_constant_int(op, 0)
         else:
             return self.emit(op)
@@ -369,9 +429,10 @@ class OptIntBounds(Optimization):
         arg2 = self.get_box_replacement(op.getarg(1))
         b1 = self.getintbound(arg1)
         b2 = self.getintbound(arg2)
-        if b1.known_ge(b2) or arg1 is arg2:
+        if (b1.known_ge(b2) or arg1 is arg2 or
+                self.known_relation(arg2, arg1, -1)):
             self.make_constant_int(op, 1)
-        elif b1.known_lt(b2):
+        elif b1.known_lt(b2) or self.known_relation(arg1, arg2, 0):
             self.make_constant_int(op, 0)
         else:
             return self.emit(op)
@@ -537,6 +598,7 @@ class OptIntBounds(Optimization):
             self.propagate_bounds_backward(box1)
         if b2.make_gt(b1):
             self.propagate_bounds_backward(box2)
+        self.record_relation(box1, box2, 0)
 
     def make_int_le(self, box1, box2):
         b1 = self.getintbound(box1)
@@ -545,6 +607,85 @@ class OptIntBounds(Optimization):
             self.propagate_bounds_backward(box1)
         if b2.make_ge(b1):
             self.propagate_bounds_backward(box2)
+        self.record_relation(box1, box2, -1)
+
+    def _split_offset(self, box):
+        """ Returns (base, k) such that box == base + k, without any
+        wrap-around; or (None, 0) if box is a constant.
+        """
+        box = self.get_box_replacement(box)
+        if box.is_constant():
+            return None, 0
+        op = self.optimizer.as_operation(box)
+        if op is None:
+            return box, 0
+        # the result of INT_xxx_OVF can only be used after the following
+        # GUARD_NO_OVERFLOW, so they never wrap around
+        opnum = op.getopnum()
+        if opnum == rop.INT_ADD or opnum == rop.INT_ADD_OVF:
+            arg0 = self.get_box_replacement(op.getarg(0))
+            arg1 = self.get_box_replacement(op.getarg(1))
+            if arg0.is_constant():
+                arg0, arg1 = arg1, arg0
+            if arg1.is_constant() and not arg0.is_constant():
+                k = arg1.getint()
+                if (opnum == rop.INT_ADD_OVF or
+                        self._cannot_wrap(arg0, k)):
+                    return arg0, k
+        elif opnum == rop.INT_SUB or opnum == rop.INT_SUB_OVF:
+            arg0 = self.get_box_replacement(op.getarg(0))
+            arg1 = self.get_box_replacement(op.getarg(1))
+            if arg1.is_constant() and not arg0.is_constant():
+                try:
+                    k = ovfcheck(-arg1.getint())
+                except OverflowError:
+                    return box, 0
+                if (opnum == rop.INT_SUB_OVF or
+                        self._cannot_wrap(arg0, k)):
+                    return arg0, k
+        return box, 0
+
+    def _cannot_wrap(self, box, k):
+        b = self.getintbound(box).add_bound(ConstIntBound(k))
+        if k >= 0:
+            return b.has_upper
+        return b.has_lower
+
+    def record_relation(self, box1, box2, k):
+        """ Record that 'box1 + k < box2' """
+        base1, k1 = self._split_offset(box1)
+        base2, k2 = self._split_offset(box2)
+        if base1 is None or base2 is None or base1 is base2:
+            return    # the bounds deal with it
+        try:
+            k = ovfcheck(ovfcheck(k1 + k) - k2)
+        except OverflowError:
+            return
+        d = self.known_lt.get(base2, None)
+        if d is None:
+            d = self.known_lt[base2] = {}
+        if base1 not in d or d[base1] < k:
+            d[base1] = k
+
+    def known_relation(self, box1, box2, k):
+        """ Is 'box1 + k < box2' implied by the relations recorded so far?
+        This removes for example the index checks of 'lst[i - 1]' after
+        the ones of 'lst[i]', as the bounds only know about constants.
+        """
+        base2, k2 = self._split_offset(box2)
+        if base2 is None:
+            return False
+        d = self.known_lt.get(base2, None)
+        if d is None:
+            return False
+        base1, k1 = self._split_offset(box1)
+        if base1 is None or base1 not in d:
+            return False
+        try:
+            k = ovfcheck(ovfcheck(k1 + k) - k2)
+        except OverflowError:
+            return False
+        return k <= d[base1]
 
     def make_int_gt(self, box1, box2):
         self.make_int_lt(box2, box1)
@@ -671,6 +812,15 @@ class OptIntBounds(Optimization):
         if b2.intersect(b):
             self.propagate_bounds_backward(op.getarg(1))
 
+    def propagate_bounds_INT_AND(self, op):
+        b1 = self.getintbound(op.getarg(0))
+        b2 = self.getintbound(op.getarg(1))
+        r = self.getintbound(op)
+        if b1.intersect(r.and_reverse_bound(b2)):
+            self.propagate_bounds_backward(op.getarg(0))
+        if b2.intersect(r.and_reverse_bound(b1)):
+            self.propagate_bounds_backward(op.getarg(1))
+
     def propagate_bounds_INT_LSHIFT(self, op):
         b1 = self.getintbound(op.getarg(0))
         b2 = self.getintbound(op.getarg(1))
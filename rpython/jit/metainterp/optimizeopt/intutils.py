@@ -1,5 +1,6 @@
 import sys
 from rpython.rlib.rarithmetic import ovfcheck, LONG_BIT, maxint, is_valid_int
+from rpython.rlib.rarithmetic import intmask, r_uint
 from rpython.rlib.objectmodel import we_are_translated
 from rpython.rtyper.lltypesystem import lltype
 from rpython.rtyper.lltypesystem.lloperation import llop
@@ -27,13 +28,24 @@ def next_pow2_m1(n):
 
 
 class IntBound(AbstractInfo):
-    _attrs_ = ('has_upper', 'has_lower', 'upper', 'lower')
+    """The range of values that an integer can take, together with
+    the bits that are known.  The known bits are a tristate number: the
+    bits that are 0 in 'tmask' are known to be equal to the same bits
+    of 'tvalue'; the bits that are 1 in 'tmask' are unknown, and always
+    0 in 'tvalue'.  The range is what most of the optimizer looks at;
+    the known bits come from bit operations and from the guards on
+    their results, and are used to make the range tighter.
+    """
+    _attrs_ = ('has_upper', 'has_lower', 'upper', 'lower',
+               'tvalue', 'tmask')
 
     def __init__(self, lower, upper):
         self.has_upper = True
         self.has_lower = True
         self.upper = upper
         self.lower = lower
+        self.tvalue = 0
+        self.tmask = -1     # nothing known
         # check for unexpected overflows:
         if not we_are_translated():
             assert type(upper) is not long or is_valid_int(upper)
@@ -123,8 +135,55 @@ class IntBound(AbstractInfo):
                 self.has_upper = True
                 r = True
 
+        if self._intersect_bits(other.tvalue, other.tmask):
+            r = True
         return r
 
+    def _intersect_bits(self, tvalue, tmask):
+        # records the known bits 'tvalue/tmask' and narrows the range
+        # accordingly.  Returns True if something changed.
+        newmask = self.tmask & tmask
+        if newmask == self.tmask or self.is_constant():
+            return False
+        self.tvalue = (self.tvalue | tvalue) & ~newmask
+        self.tmask = newmask
+        # the smallest value has all the unknown bits cleared except the
+        # sign bit, the largest one has them all set except the sign bit
+        lower = intmask(self.tvalue | (newmask & MININT))
+        upper = intmask(self.tvalue | (newmask & MAXINT))
+        if lower > MININT and (not self.has_lower or lower > self.lower):
+            self.has_lower = True
+            self.lower = lower
+        if upper < MAXINT and (not self.has_upper or upper < self.upper):
+            self.has_upper = True
+            self.upper = upper
+        return True
+
+    def get_known_bits(self):
+        """Returns (tvalue, tmask), the bits known from bit operations
+        combined with the bits implied by the range."""
+        if self.is_constant():
+            return self.lower, 0
+        tvalue = self.tvalue
+        tmask = self.tmask
+        if self.has_lower and self.has_upper:
+            # all the values in the range share the bits above the
+            # highest bit in which 'lower' and 'upper' differ (if they
+            # have a different sign, this is -1 and nothing is known)
+            rmask = next_pow2_m1(self.lower ^ self.upper)
+            tmask &= rmask
+            tvalue |= self.lower & ~rmask
+        elif self.known_nonnegative():
+            tmask &= MAXINT
+        elif self.has_upper and self.upper < 0:
+            tvalue |= MININT
+            tmask &= MAXINT
+        return tvalue & ~tmask, tmask
+
+    def known_nonzero_bits(self):
+        tvalue, _ = self.get_known_bits()
+        return tvalue != 0
+
     def add(self, offset):
         res = self.clone()
         try:
@@ -249,6 +308,40 @@ class IntBound(AbstractInfo):
         else:
             return IntUnbounded()
 
+    def lshift_bits_bound(self, other):
+        """Like lshift_bound(), but only from the known bits, so that it
+        is also correct if the shift overflows."""
+        r = IntUnbounded()
+        if other.is_constant():
+            shift = other.getint()
+            if 0 <= shift < LONG_BIT:
+                tvalue, tmask = self.get_known_bits()
+                # the 'shift' lowest bits become known zeros
+                r._intersect_bits(intmask(tvalue << shift),
+                                  intmask(tmask << shift))
+        return r
+
+    def rshift_bits_bound(self, other):
+        r = IntUnbounded()
+        if other.is_constant():
+            shift = other.getint()
+            if 0 <= shift < LONG_BIT:
+                tvalue, tmask = self.get_known_bits()
+                # an arithmetic shift of the mask keeps an unknown sign
+                # bit unknown in all the new high bits
+                r._intersect_bits(tvalue >> shift, tmask >> shift)
+        return r
+
+    def urshift_bits_bound(self, other):
+        r = IntUnbounded()
+        if other.is_constant():
+            shift = other.getint()
+            if 0 <= shift < LONG_BIT:
+                tvalue, tmask = self.get_known_bits()
+                r._intersect_bits(intmask(r_uint(tvalue) >> shift),
+                                  intmask(r_uint(tmask) >> shift))
+        return r
+
     def and_bound(self, other):
         pos1 = self.known_nonnegative()
         pos2 = other.known_nonnegative()
@@ -259,9 +352,24 @@ class IntBound(AbstractInfo):
             r.make_le(self)
         if pos2:
             r.make_le(other)
+        v1, m1 = self.get_known_bits()
+        v2, m2 = other.get_known_bits()
+        tvalue = v1 & v2
+        r._intersect_bits(tvalue, (v1 | m1) & (v2 | m2) & ~tvalue)
         return r
 
-    def or_bound(self, other):
+    def and_reverse_bound(self, other):
+        """Returns the bound of 'x' knowing that 'self == x & other':
+        the bits of 'x' where 'other' has a known 1 are those of 'self'.
+        """
+        r = IntUnbounded()
+        v1, m1 = self.get_known_bits()
+        v2, m2 = other.get_known_bits()
+        known = v2 & ~m1
+        r._intersect_bits(v1 & known, ~known)
+        return r
+
+    def _or_range_bound(self, other):
         r = IntUnbounded()
         if self.known_nonnegative() and \
                 other.known_nonnegative():
@@ -272,6 +380,36 @@ class IntBound(AbstractInfo):
                 r.make_ge(IntBound(0, 0))
         return r
 
+    def or_bound(self, other):
+        r = self._or_range_bound(other)
+        v1, m1 = self.get_known_bits()
+        v2, m2 = other.get_known_bits()
+        tvalue = v1 | v2
+        r._intersect_bits(tvalue, (m1 | m2) & ~tvalue)
+        return r
+
+    def xor_bound(self, other):
+        r = self._or_range_bound(other)
+        v1, m1 = self.get_known_bits()
+        v2, m2 = other.get_known_bits()
+        tmask = m1 | m2
+        r._intersect_bits((v1 ^ v2) & ~tmask, tmask)
+        return r
+
+    def and_is_identity(self, other):
+        """Returns True if 'x & other == x' for all the x in self, i.e.
+        if 'other' has a known 1 in all the bits that can be 1 in self."""
+        v1, m1 = self.get_known_bits()
+        v2, _ = other.get_known_bits()
+        return (v1 | m1) & ~v2 == 0
+
+    def or_is_identity(self, other):
+        """Returns True if 'x | other == x' for all the x in self, i.e.
+        if all the bits that can be 1 in 'other' are known 1 in self."""
+        v1, _ = self.get_known_bits()
+        v2, m2 = other.get_known_bits()
+        return (v2 | m2) & ~v1 == 0
+
     def contains(self, val):
         if not we_are_translated():
             assert not isinstance(val, long)
@@ -311,6 +449,16 @@ class IntBound(AbstractInfo):
         return '%s <= x <= %s' % (l, u)
 
     def clone(self):
+        res = IntBound(self.lower, self.upper)
+        res.has_lower = self.has_lower
+        res.has_upper = self.has_upper
+        res.tvalue = self.tvalue
+        res.tmask = self.tmask
+        return res
+
+    def clone_range(self):
+        # like clone(), but forgets the known bits: used for the bounds
+        # that cross the loop header, where the guards only check the range
         res = IntBound(self.lower, self.upper)
         res.has_lower = self.has_lower
         res.has_upper = self.has_upper
@@ -348,7 +496,8 @@ class IntBound(AbstractInfo):
 
     def getnullness(self):
         if self.known_gt(IntBound(0, 0)) or \
-           self.known_lt(IntBound(0, 0)):
+           self.known_lt(IntBound(0, 0)) or \
+           self.known_nonzero_bits():
             return INFO_NONNULL
         if self.known_nonnegative() and \
            self.known_le(IntBound(0, 0)):
@@ -3,7 +3,8 @@ import py
 from rpython.jit.metainterp.history import TargetToken, JitCellToken, TreeLoop
 from rpython.jit.metainterp.optimizeopt.util import equaloplists
 from rpython.jit.metainterp.optimizeopt.vector import (Pack, GenericCostModel,
-        NotAProfitableLoop, VectorizingOptimizer, CostModel)
+        NotAProfitableLoop, VectorizingOptimizer, CostModel,
+        user_loop_bail_fast_path)
 from rpython.jit.metainterp.optimizeopt.schedule import VecScheduleState
 from rpython.jit.metainterp.optimizeopt.dependency import Node, DependencyGraph
 from rpython.jit.metainterp.optimizeopt.test.test_util import LLtypeMixin
@@ -268,6 +269,33 @@ class CostModelBaseTest(SchedulerBaseTest):
         number = self.savings(trace)
         assert number >= 1
 
+    def test_vec_cost_threshold(self):
+        costmodel = GenericCostModel(self.cpu, 0)
+        costmodel.savings = -2
+        assert not costmodel.profitable()
+        # a positive 'vec_cost' accepts loops that cost a bit more
+        costmodel = GenericCostModel(self.cpu, 2)
+        costmodel.savings = -2
+        assert costmodel.profitable()
+        # a negative one requires some savings
+        costmodel = GenericCostModel(self.cpu, -1)
+        costmodel.savings = 0
+        assert not costmodel.profitable()
+
+    def test_user_loop_bail_fast_path(self):
+        loop = self.parse_trace("""
+        i10 = int_add(i0, 1)
+        i11 = int_lt(i10, i1)
+        guard_true(i11) []
+        """)
+        assert user_loop_bail_fast_path(loop, None)
+        loop = self.parse_trace("""
+        f10 = raw_load_f(p0, i0, descr=double)
+        f11 = float_add(f10, f1)
+        raw_store(p0, i0, f11, descr=double)
+        """)
+        assert not user_loop_bail_fast_path(loop, None)
+
 
 class Test(CostModelBaseTest, LLtypeMixin):
     pass
@@ -3,7 +3,8 @@ from rpython.jit.metainterp.optimizeopt.intutils import IntBound, IntUpperBound,
 
 from copy import copy
 import sys
-from rpython.rlib.rarithmetic import LONG_BIT, ovfcheck
+from rpython.rlib.rarithmetic import LONG_BIT, ovfcheck, intmask, r_uint
+from rpython.jit.metainterp.optimizeopt.info import INFO_NONNULL
 
 from hypothesis import given, strategies
 
@@ -365,7 +366,97 @@ def test_or_bound():
                 for n2 in nbr:
                     if b1.contains(n1) and b2.contains(n2):
                         assert b3.contains(n1 | n2)
-                        assert b3.contains(n1 ^ n2) # we use it for xor too
+
+def test_xor_bound():
+    for _, _, b1 in some_bounds():
+        for _, _, b2 in some_bounds():
+            b3 = b1.xor_bound(b2)
+            for n1 in nbr:
+                for n2 in nbr:
+                    if b1.contains(n1) and b2.contains(n2):
+                        assert b3.contains(n1 ^ n2)
+
+
+def test_known_bits():
+    b = bound(None, None).or_bound(const(5))
+    assert b.get_known_bits() == (5, ~5)
+    assert b.and_bound(const(1)).equal(1)
+    assert b.or_is_identity(const(4))
+    assert not b.or_is_identity(const(2))
+    assert b.getnullness() == INFO_NONNULL
+    assert not b.bounded()
+    #
+    b = bound(0, 255)
+    assert b.get_known_bits() == (0, 255)
+    assert b.and_is_identity(const(0x1ff))
+    assert not b.and_is_identity(const(0x17f))
+    assert bound(-256, -1).get_known_bits() == (-256, 255)
+    assert bound(-1, 1).get_known_bits() == (0, -1)
+    assert bound(3, None).get_known_bits() == (0, sys.maxint)
+    assert const(-7).get_known_bits() == (-7, 0)
+
+def test_known_bits_shift():
+    b = bound(None, None)
+    assert b.lshift_bits_bound(const(3)).and_bound(const(7)).equal(0)
+    b2 = b.urshift_bits_bound(const(8))
+    assert b2.lower == 0
+    assert b2.upper == sys.maxint >> 7
+    b3 = b.or_bound(const(1024)).rshift_bits_bound(const(10))
+    assert b3.and_bound(const(1)).equal(1)
+    assert not b.rshift_bits_bound(const(3)).bounded()
+    assert not b.lshift_bits_bound(bound(0, 3)).bounded()
+
+def test_and_reverse_bound():
+    r = const(0)
+    x = bound(None, None)
+    assert x.intersect(r.and_reverse_bound(const(7)))
+    assert x.and_bound(const(3)).equal(0)
+    assert not x.intersect(r.and_reverse_bound(const(3)))
+    r = const(5)
+    x = bound(None, None)
+    x.intersect(r.and_reverse_bound(const(7)))
+    assert x.get_known_bits() == (5, ~7)
+
+def test_bits_bound_exhaustive():
+    def contains(b, n):
+        # check the known bits too, not only the range
+        tvalue, tmask = b.get_known_bits()
+        assert (n & ~tmask) == tvalue
+        return b.contains(n)
+
+    masks = [const(c) for c in [0, 1, 3, 5, 6, -1, -2, -8]]
+    bounds = [b for _, _, b in some_bounds()] + masks
+    values = range(-9, 10)
+    for b1 in bounds:
+        for b2 in bounds:
+            band = b1.and_bound(b2)
+            bor = b1.or_bound(b2)
+            bxor = b1.xor_bound(b2)
+            for n1 in values:
+                if not b1.contains(n1):
+                    continue
+                for n2 in values:
+                    if b2.contains(n2):
+                        assert contains(band, n1 & n2)
+                        assert contains(bor, n1 | n2)
+                        assert contains(bxor, n1 ^ n2)
+                        if b1.and_is_identity(b2):
+                            assert n1 & n2 == n1
+                        if b1.or_is_identity(b2):
+                            assert n1 | n2 == n1
+                        x = IntUnbounded()
+                        x.intersect(const(n1 & n2).and_reverse_bound(b2))
+                        assert x.contains(n1)
+        for shift in range(LONG_BIT):
+            c = const(shift)
+            bl = b1.lshift_bits_bound(c)
+            br = b1.rshift_bits_bound(c)
+            bu = b1.urshift_bits_bound(c)
+            for n1 in values:
+                if b1.contains(n1):
+                    assert contains(bl, intmask(n1 << shift))
+                    assert contains(br, n1 >> shift)
+                    assert contains(bu, intmask(r_uint(n1) >> shift))
 
 
 def test_next_pow2_m1():
@@ -454,5 +545,26 @@ def test_or_bound_random(t1, t2):
     b3 = b1.or_bound(b2)
     r = n1 | n2
     assert b3.contains(r)
+
+@given(bound_with_contained_number, bound_with_contained_number)
+def test_xor_bound_random(t1, t2):
+    b1, n1 = t1
+    b2, n2 = t2
+    b3 = b1.xor_bound(b2)
     r = n1 ^ n2
     assert b3.contains(r)
+
+@given(bound_with_contained_number, bound_with_contained_number)
+def test_known_bits_random(t1, t2):
+    b1, n1 = t1
+    b2, n2 = t2
+    b1 = b1.or_bound(const(n1 & 0x55))    # add some known bits
+    assert b1.contains(n1)
+    assert b1.and_bound(b2).contains(n1 & n2)
+    assert b1.or_bound(b2).contains(n1 | n2)
+    assert b1.xor_bound(b2).contains(n1 ^ n2)
+    shift = n2 & (LONG_BIT - 1)
+    c = const(shift)
+    assert b1.lshift_bits_bound(c).contains(intmask(n1 << shift))
+    assert b1.rshift_bits_bound(c).contains(n1 >> shift)
+    assert b1.urshift_bits_bound(c).contains(intmask(r_uint(n1) >> shift))
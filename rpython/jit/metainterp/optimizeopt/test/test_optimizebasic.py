@@ -3142,6 +3142,67 @@ class BaseTestOptimizeBasic(BaseTestBasic):
         """
         self.optimize_loop(ops, expected)
 
+    def test_bound_lt_relation(self):
+        ops = """
+        [i0, i1]
+        i2 = int_lt(i0, i1)
+        guard_true(i2) []
+        i3 = int_sub_ovf(i0, 1)
+        guard_no_overflow() []
+        i4 = int_lt(i3, i1)
+        guard_true(i4) []
+        i5 = int_ge(i0, i1)
+        guard_false(i5) []
+        jump(i3, i1)
+        """
+        expected = """
+        [i0, i1]
+        i2 = int_lt(i0, i1)
+        guard_true(i2) []
+        i3 = int_sub_ovf(i0, 1)
+        guard_no_overflow() []
+        jump(i3, i1)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_bound_lt_relation_index_checks(self):
+        # the index checks of 'lst[i + 1]' imply the ones of 'lst[i]'
+        ops = """
+        [i0, p0]
+        i1 = arraylen_gc(p0, descr=arraydescr)
+        i2 = int_add_ovf(i0, 1)
+        guard_no_overflow() []
+        i3 = int_ge(i2, i1)
+        guard_false(i3) []
+        i4 = int_lt(i0, i1)
+        guard_true(i4) []
+        i5 = int_le(i1, i0)
+        guard_false(i5) []
+        jump(i2, p0)
+        """
+        expected = """
+        [i0, p0]
+        i1 = arraylen_gc(p0, descr=arraydescr)
+        i2 = int_add_ovf(i0, 1)
+        guard_no_overflow() []
+        i3 = int_ge(i2, i1)
+        guard_false(i3) []
+        jump(i2, p0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_bound_lt_relation_not_implied(self):
+        ops = """
+        [i0, i1]
+        i2 = int_lt(i0, i1)
+        guard_true(i2) []
+        i3 = int_add(i0, 1)
+        i4 = int_lt(i3, i1)
+        guard_true(i4) []
+        jump(i3, i1)
+        """
+        self.optimize_loop(ops, ops)
+
     def test_bound_lt_add_ovf(self):
         ops = """
         [i0]
@@ -5430,6 +5491,92 @@ class BaseTestOptimizeBasic(BaseTestBasic):
         """
         self.optimize_loop(ops, expected)
 
+    def test_known_bits_and_or(self):
+        ops = """
+        [i0]
+        i1 = int_or(i0, 5)
+        i2 = int_and(i1, 1)
+        i3 = int_or(i1, 4)
+        i4 = int_xor(i2, 1)
+        i5 = int_is_true(i1)
+        guard_true(i5) []
+        escape_n(i2)
+        escape_n(i3)
+        escape_n(i4)
+        jump(i0)
+        """
+        expected = """
+        [i0]
+        i1 = int_or(i0, 5)
+        escape_n(1)
+        escape_n(i1)
+        escape_n(0)
+        jump(i0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_known_bits_shifts(self):
+        ops = """
+        [i0]
+        i1 = int_lshift(i0, 3)
+        i2 = int_and(i1, 7)
+        i3 = int_or(i0, 1024)
+        i4 = int_rshift(i3, 10)
+        i5 = int_and(i4, 1)
+        escape_n(i2)
+        escape_n(i5)
+        jump(i0)
+        """
+        expected = """
+        [i0]
+        i1 = int_lshift(i0, 3)
+        i3 = int_or(i0, 1024)
+        i4 = int_rshift(i3, 10)
+        escape_n(0)
+        escape_n(1)
+        jump(i0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_known_bits_from_guard(self):
+        ops = """
+        [i0]
+        i1 = int_and(i0, 7)
+        i2 = int_eq(i1, 0)
+        guard_true(i2) []
+        i3 = int_and(i0, 3)
+        escape_n(i3)
+        jump(i0)
+        """
+        expected = """
+        [i0]
+        i1 = int_and(i0, 7)
+        i2 = int_eq(i1, 0)
+        guard_true(i2) []
+        escape_n(0)
+        jump(i0)
+        """
+        self.optimize_loop(ops, expected)
+
+    def test_known_bits_uint_rshift_no_overflow(self):
+        ops = """
+        [i0]
+        i1 = uint_rshift(i0, 8)
+        i2 = int_add_ovf(i1, 1)
+        guard_no_overflow() []
+        i3 = int_and(i1, %d)
+        escape_n(i3)
+        jump(i2)
+        """ % (sys.maxint >> 7,)
+        expected = """
+        [i0]
+        i1 = uint_rshift(i0, 8)
+        i2 = int_add(i1, 1)
+        escape_n(i1)
+        jump(i2)
+        """
+        self.optimize_loop(ops, expected)
+
     def test_int_or_same_arg(self):
         ops = """
         [i0]
@@ -11,7 +11,7 @@ class TestOptimizeBridge(BaseTest, LLtypeMixin):
 
     def optimize(self, ops, bridge_ops, expected, expected_loop=None,
                  inline_short_preamble=True, jump_values=None,
-                 bridge_values=None):
+                 bridge_values=None, keep_virtuals=False):
         loop = self.parse(ops)
         info = self.unroll_and_optimize(loop, None, jump_values=jump_values)
         jitcell_token = compile.make_jitcell_token(None)
@@ -32,7 +32,8 @@ class TestOptimizeBridge(BaseTest, LLtypeMixin):
         data = compile.BridgeCompileData(trace, self.convert_values(bridge.operations[-1].getarglist(), bridge_values),
                                          None,
                                          enable_opts=self.enable_opts,
-                            inline_short_preamble=inline_short_preamble)
+                            inline_short_preamble=inline_short_preamble,
+                            keep_virtuals=keep_virtuals)
         bridge_info, ops = self._do_optimize_loop(data)
         loop.check_consistency(check_descr=False)
         info.preamble.check_consistency(check_descr=False)
@@ -118,5 +119,32 @@ class TestOptimizeBridge(BaseTest, LLtypeMixin):
                       jump_values=[None, self.simpleaddr],
                       bridge_values=[None, self.simpleaddr])
 
+    def test_virtual_state_in_bridge_keep_virtuals(self):
+        # a bridge out of a ResumeAtPositionDescr guard jumps to the loop
+        # instead of the preamble if this keeps its virtuals virtual
+        loop = """
+        [i0, p1]
+        p0 = new_with_vtable(descr=simpledescr)
+        setfield_gc(p0, i0, descr=simplevalue)
+        i3 = int_is_true(i0)
+        guard_true(i3) [p0]
+        i1 = int_add(i0, 1)
+        jump(i1, p0)
+        """
+        bridge = """
+        [p0]
+        p1 = new_with_vtable(descr=simpledescr)
+        setfield_gc(p1, 3, descr=simplevalue)
+        jump(1, p1)
+        """
+        expected = """
+        [p0]
+        jump(1, 3)
+        """
+        self.optimize(loop, bridge, expected,
+                      jump_values=[None, self.simpleaddr],
+                      bridge_values=[None, self.simpleaddr],
+                      inline_short_preamble=False, keep_virtuals=True)
+
     def test_virtual_state_guard_needed(self):
         pass
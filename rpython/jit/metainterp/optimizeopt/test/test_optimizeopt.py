@@ -4779,6 +4779,52 @@ class OptimizeOptTest(BaseTestWithUnroll):
         """
         self.optimize_loop(ops, expected)
 
+    def test_bound_arraylen_known_bits_not_exported(self):
+        # the short preamble only checks the range of the length, so the
+        # loop must not rely on the bits learned from 'i2 == 0'
+        ops = """
+        [p0, i0]
+        i1 = arraylen_gc(p0, descr=arraydescr)
+        i2 = int_and(i1, 7)
+        i3 = int_is_zero(i2)
+        guard_true(i3) []
+        escape_n(i2)
+        jump(p0, i0)
+        """
+        preamble = """
+        [p0, i0]
+        i1 = arraylen_gc(p0, descr=arraydescr)
+        i2 = int_and(i1, 7)
+        i3 = int_is_zero(i2)
+        guard_true(i3) []
+        escape_n(0)
+        jump(p0, i0, i2)
+        """
+        expected = """
+        [p0, i0, i2]
+        escape_n(0)
+        jump(p0, i0, 0)
+        """
+        short = """
+        [p0, i0]
+        guard_nonnull(p0) []
+        guard_gc_type(p0, ConstInt(arraydescr_tid)) []
+        i1 = arraylen_gc(p0, descr=arraydescr)
+        i4 = int_ge(i1, 0)
+        guard_true(i4) []
+        i5 = int_le(i1, %d)
+        guard_true(i5) []
+        i6 = arraylen_gc(p0, descr=arraydescr)
+        i7 = int_ge(i6, 0)
+        guard_true(i7) []
+        i8 = int_le(i6, %d)
+        guard_true(i8) []
+        i2 = int_and(i6, 7)
+        guard_value(i2, 0) []
+        jump(i2)
+        """ % (sys.maxint - 7, sys.maxint - 7)
+        self.optimize_loop(ops, expected, preamble, expected_short=short)
+
     def test_bound_strlen(self):
         ops = """
         [p0]
@@ -12,6 +12,7 @@ from rpython.jit.metainterp.optimizeopt.virtualstate import (
     VirtualStateConstructor, VirtualStatesCantMatch)
 from rpython.jit.metainterp.resoperation import rop, ResOperation, GuardResOp
 from rpython.jit.metainterp import compile
+from rpython.rlib.rjitlog import rjitlog as jl
 from rpython.rlib.debug import debug_print, debug_start, debug_stop,\
      have_debug_prints
 
@@ -71,13 +72,13 @@ class UnrollableOptimizer(Optimizer):
                 self.make_constant_class(op, known_class, False)
             if isinstance(preamble_info, info.ArrayPtrInfo):
                 arr_info = info.ArrayPtrInfo(preamble_info.descr)
-                bound = preamble_info.getlenbound(None).clone()
+                bound = preamble_info.getlenbound(None).clone_range()
                 assert isinstance(bound, intutils.IntBound)
                 arr_info.lenbound = bound
                 op.set_forwarded(arr_info)
             if isinstance(preamble_info, StrPtrInfo):
                 str_info = StrPtrInfo(preamble_info.mode)
-                bound = preamble_info.getlenbound(None).clone()
+                bound = preamble_info.getlenbound(None).clone_range()
                 assert isinstance(bound, intutils.IntBound)
                 str_info.lenbound = bound
                 op.set_forwarded(str_info)
@@ -104,6 +105,7 @@ class UnrollOptimizer(Optimization):
     distinction anymore)"""
 
     short_preamble_producer = None
+    may_keep_virtuals = True    # for the ResumeAtPositionDescrs we make
 
     def __init__(self, metainterp_sd, jitdriver_sd, optimizations):
         self.optimizer = UnrollableOptimizer(metainterp_sd, jitdriver_sd,
@@ -223,7 +225,10 @@ class UnrollOptimizer(Optimization):
                 count += 1
         if count > maxguards:
             assert isinstance(target_token, TargetToken)
-            target_token.targeting_jitcell_token.retraced_count = sys.maxint
+            cell_token = target_token.targeting_jitcell_token
+            self.optimizer.metainterp_sd.jitlog.log_retrace(cell_token,
+                count, maxguards, jl.RETRACE_TOO_MANY_GUARDS)
+            cell_token.retraced_count = sys.maxint
 
     def pick_virtual_state(self, my_vs, label_vs, target_tokens):
         if target_tokens is None:
@@ -236,7 +241,8 @@ class UnrollOptimizer(Optimization):
         return label_vs
 
     def optimize_bridge(self, trace, runtime_boxes, call_pure_results,
-                        inline_short_preamble, box_names_memo, resumestorage):
+                        inline_short_preamble, box_names_memo, resumestorage,
+                        keep_virtuals=False):
         from rpython.jit.metainterp.optimizeopt.bridgeopt import deserialize_optimizer_knowledge
         frontend_inputargs = trace.inputargs
         trace = trace.get_iter()
@@ -250,8 +256,13 @@ class UnrollOptimizer(Optimization):
         jump_op = info.jump_op
         cell_token = jump_op.getdescr()
         assert isinstance(cell_token, JitCellToken)
-        if not inline_short_preamble or len(cell_token.target_tokens) == 1:
+        if len(cell_token.target_tokens) == 1:
             return self.jump_to_preamble(cell_token, jump_op, info)
+        if not inline_short_preamble:
+            if not keep_virtuals or not self._has_virtual_args(jump_op):
+                return self.jump_to_preamble(cell_token, jump_op, info)
+            # see ResumeAtPositionDescr
+            self.may_keep_virtuals = False
         # force all the information that does not go to the short
         # preamble at all
         self.optimizer.flush()
@@ -264,11 +275,16 @@ class UnrollOptimizer(Optimization):
             return self.jump_to_preamble(cell_token, jump_op, info)
         if vs is None:
             return info, self.optimizer._newoperations[:]
+        if not inline_short_preamble:
+            return self.jump_to_preamble(cell_token, jump_op, info)
         warmrunnerdescr = self.optimizer.metainterp_sd.warmrunnerdesc
         limit = warmrunnerdescr.memory_manager.retrace_limit
+        jitlog = self.optimizer.metainterp_sd.jitlog
         if cell_token.retraced_count < limit:
             cell_token.retraced_count += 1
             debug_print('Retracing (%d/%d)' % (cell_token.retraced_count, limit))
+            jitlog.log_retrace(cell_token, cell_token.retraced_count, limit,
+                               jl.RETRACE_NEW_VERSION)
         else:
             # Try forcing boxes to avoid jumping to the preamble
             try:
@@ -279,6 +295,8 @@ class UnrollOptimizer(Optimization):
             if vs is None:
                 return info, self.optimizer._newoperations[:]
             debug_print("Retrace count reached, jumping to preamble")
+            jitlog.log_retrace(cell_token, cell_token.retraced_count, limit,
+                               jl.RETRACE_LIMIT)
             return self.jump_to_preamble(cell_token, jump_op, info)
         exported_state = self.export_state(info.jump_op.getarglist(),
                                            info.inputargs, runtime_boxes,
@@ -287,6 +305,19 @@ class UnrollOptimizer(Optimization):
         self.optimizer._clean_optimization_info(self.optimizer._newoperations)
         return exported_state, self.optimizer._newoperations
 
+    def new_resume_at_position_descr(self):
+        descr = compile.ResumeAtPositionDescr()
+        descr.may_keep_virtuals = self.may_keep_virtuals
+        return descr
+
+    def _has_virtual_args(self, jump_op):
+        for arg in jump_op.getarglist():
+            if arg.type == 'r':
+                info = self.optimizer.getptrinfo(arg)
+                if info is not None and info.is_virtual():
+                    return True
+        return False
+
     def finalize_short_preamble(self, label_op, virtual_state):
         sb = self.short_preamble_producer
         self.optimizer._clean_optimization_info(sb.short_inputargs)
@@ -331,7 +362,7 @@ class UnrollOptimizer(Optimization):
                 for guard in extra_guards.extra_guards:
                     if isinstance(guard, GuardResOp):
                         guard.rd_resume_position = patchguardop.rd_resume_position
-                        guard.setdescr(compile.ResumeAtPositionDescr())
+                        guard.setdescr(self.new_resume_at_position_descr())
                     self.send_extra_operation(guard)
             except VirtualStatesCantMatch:
                 continue
@@ -407,7 +438,7 @@ class UnrollOptimizer(Optimization):
                 arglist = self._map_args(mapping, sop.getarglist())
                 if sop.is_guard():
                     op = sop.copy_and_change(sop.getopnum(), arglist,
-                                    descr=compile.ResumeAtPositionDescr())
+                                    descr=self.new_resume_at_position_descr())
                     assert isinstance(op, GuardResOp)
                     op.rd_resume_position = patchguardop.rd_resume_position
                 else:
@@ -179,7 +179,7 @@ def user_loop_bail_fast_path(loop, warmstate):
     resop_count = 0 # the count of operations minus debug_merge_points
     vector_instr = 0
     guard_count = 0
-    at_least_one_array_access = True
+    at_least_one_array_access = False
     for i,op in enumerate(loop.operations):
         if rop.is_jit_debug(op.opnum):
             continue
@@ -201,6 +201,9 @@ def user_loop_bail_fast_path(loop, warmstate):
     if not at_least_one_array_access:
         return True
 
+    if vector_instr == 0:
+        return True     # nothing in there has a vector equivalent
+
     return False
 
 class VectorizingOptimizer(Optimizer):
@@ -629,7 +632,9 @@ class CostModel(object):
         raise NotImplementedError
 
     def profitable(self):
-        return self.savings >= 0
+        # 'threshold' is the 'vec_cost' parameter: the cost (i.e. the
+        # negative savings) above which the loop is not vectorized
+        return self.savings >= -self.threshold
 
 class GenericCostModel(CostModel):
     def record_pack_savings(self, pack, times):
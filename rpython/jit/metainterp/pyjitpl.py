@@ -857,6 +857,17 @@ class MIFrame(object):
         self.metainterp.heapcache.quasi_immut_now_known(fielddescr, box)
         self.metainterp.history.record(rop.QUASIIMMUT_FIELD, [box],
                                        None, descr=descr)
+        if isinstance(box, Const):
+            # the optimizer keeps only one GUARD_NOT_INVALIDATED between
+            # two calls that can invalidate loops, because the
+            # QUASIIMMUT_FIELDs of constants all register the same loop.
+            # Don't record (and capture the resume data of) the others.
+            # If 'box' is not a constant, the optimizer usually removes
+            # the guard, so we record it anyway.
+            heapcache = self.metainterp.heapcache
+            if heapcache.is_guard_not_invalidated_known():
+                return
+            heapcache.guard_not_invalidated_now_known()
         self.metainterp.generate_guard(rop.GUARD_NOT_INVALIDATED,
                                        resumepc=orgpc)
 
@@ -1101,7 +1112,11 @@ class MIFrame(object):
         warmrunnerstate = targetjitdriver_sd.warmstate
         assembler_call = False
         if warmrunnerstate.inlining:
-            if warmrunnerstate.can_inline_callable(greenboxes):
+            # the baseline tier never inlines, but still uses call_assembler;
+            # and neither do the bridges of a megamorphic guard_value
+            if (not self.metainterp.baseline and
+                    not self.metainterp.megamorphic and
+                    warmrunnerstate.can_inline_callable(greenboxes)):
                 # We've found a potentially inlinable function; now we need to
                 # see if it's already on the stack. In other words: are we about
                 # to enter recursion? If so, we don't want to inline the
@@ -1266,6 +1281,11 @@ class MIFrame(object):
                                self.metainterp.call_ids[-1],
                                greenboxes)
 
+        if (self.metainterp.split_trace_pending and any_operation and
+                not self.metainterp.portal_call_depth):
+            assert jitdriver_sd is self.metainterp.jitdriver_sd
+            self.metainterp.split_trace(greenboxes, redboxes, orgpc)
+
         if self.metainterp.seen_loop_header_for_jdindex < 0:
             if not any_operation:
                 return
@@ -2007,6 +2027,10 @@ class MetaInterp(object):
     exported_state = None
     last_exc_box = None
     _last_op = None
+    baseline = False    # tracing for the baseline tier: don't inline calls
+    megamorphic = False   # see count_polymorphic_bridge()
+    resumekey_original_loop_token = None   # when tracing a bridge
+    split_trace_pending = False   # see blackhole_if_trace_too_long()
 
     def __init__(self, staticdata, jitdriver_sd):
         self.staticdata = staticdata
@@ -2372,7 +2396,11 @@ class MetaInterp(object):
                     self.staticdata.logger_ops._make_log_operations(
                         self.box_names_memo),
                     self.history.trace.unpack()[1])
-            if self.aborted_tracing_jitdriver is not None:
+            if self.aborted_tracing_jitdriver is None:
+                # nothing was done that would make the next attempt
+                # succeed: maybe don't retry too soon
+                jd_sd.warmstate.tracing_aborted(greenkey)
+            else:
                 jd_sd = self.aborted_tracing_jitdriver
                 greenkey = self.aborted_tracing_greenkey
                 if hooks.are_hooks_enabled():
@@ -2388,7 +2416,18 @@ class MetaInterp(object):
         warmrunnerstate = self.jitdriver_sd.warmstate
         if (self.history.length() > warmrunnerstate.trace_limit or
                 self.history.trace_tag_overflow()):
+            if (self.split_trace_pending and
+                    self.history.length() <= 2 * warmrunnerstate.trace_limit
+                    and not self.history.trace_tag_overflow()):
+                return    # still waiting for the next jit_merge_point
             jd_sd, greenkey_of_huge_function = self.find_biggest_function()
+            if self.can_split_trace(greenkey_of_huge_function):
+                # the outermost function itself is too long: instead of
+                # aborting, cut the trace at its next jit_merge_point,
+                # see split_trace()
+                debug_print("trace too long, splitting it")
+                self.split_trace_pending = True
+                return
             self.staticdata.stats.record_aborted(greenkey_of_huge_function)
             self.portal_trace_positions = None
             if greenkey_of_huge_function is not None:
@@ -2402,6 +2441,59 @@ class MetaInterp(object):
                     warmrunnerstate.JitCell.trace_next_iteration(greenkey)
             raise SwitchToBlackhole(Counters.ABORT_TOO_LONG)
 
+    def can_split_trace(self, greenkey_of_huge_function):
+        if (self.split_trace_pending or self.partial_trace is not None or
+                self.history.trace_tag_overflow()):
+            return False
+        if greenkey_of_huge_function is None:
+            return True     # no inlined function is to blame
+        if not self.current_merge_points:
+            return False
+        num_green_args = self.jitdriver_sd.num_green_args
+        original_boxes = self.current_merge_points[0][0]
+        if len(greenkey_of_huge_function) != num_green_args:
+            return False    # from another jitdriver
+        for i in range(num_green_args):
+            if not original_boxes[i].same_constant(
+                    greenkey_of_huge_function[i]):
+                return False    # it's an inlined function: don't split
+        return True
+
+    def split_trace(self, greenboxes, redboxes, orgpc):
+        """Called at a jit_merge_point of the outermost function when
+        the trace is too long.  The trace so far is compiled, ending
+        with a guard that always fails and resumes the interpreter at
+        this jit_merge_point.  The rest of the function is later traced
+        as a bridge from that guard, like for any guard that fails often.
+        """
+        self.split_trace_pending = False
+        self.staticdata.log('splitting too long trace')
+        # FORCE_TOKEN returns the jitframe, which is never NULL when
+        # running the assembler
+        token = self.history.record(rop.FORCE_TOKEN, [],
+                                    lltype.nullptr(llmemory.GCREF.TO))
+        self.generate_guard(rop.GUARD_ISNULL, token, resumepc=orgpc)
+        # the trace must still end with a FINISH, but it is never reached
+        result_type = self.jitdriver_sd.result_type
+        if result_type == history.VOID:
+            exitbox = None
+        elif result_type == history.INT:
+            exitbox = history.CONST_FALSE
+        elif result_type == history.REF:
+            exitbox = history.CONST_NULL
+        elif result_type == history.FLOAT:
+            exitbox = history.CONST_FZERO
+        else:
+            assert False
+        self.compile_done_with_this_frame(exitbox)
+        # continue running the rest of the function in the interpreter
+        live_arg_boxes = greenboxes + redboxes
+        num_green_args = self.jitdriver_sd.num_green_args
+        gi, gr, gf = self._unpack_boxes(live_arg_boxes, 0, num_green_args)
+        ri, rr, rf = self._unpack_boxes(live_arg_boxes, num_green_args,
+                                        len(live_arg_boxes))
+        raise jitexc.ContinueRunningNormally(gi, gr, gf, ri, rr, rf)
+
     def _interpret(self):
         # Execute the frames forward until we raise a DoneWithThisFrame,
         # a ExitFrameWithException, or a ContinueRunningNormally exception.
@@ -2487,6 +2579,8 @@ class MetaInterp(object):
         self.prepare_resume_from_failure(deadframe, inputargs, resumedescr)
         if self.resumekey_original_loop_token is None:   # very rare case
             raise SwitchToBlackhole(Counters.ABORT_BRIDGE)
+        if resumedescr.is_guard_value():
+            self.count_polymorphic_bridge()
         self.interpret()
         assert False, "should always raise"
 
@@ -2509,6 +2603,14 @@ class MetaInterp(object):
             else:
                 duplicates[box] = None
 
+    def may_retrace_hot_bridges(self):
+        if self.baseline or not self.staticdata.warmrunnerdesc:
+            return False
+        memmgr = self.staticdata.warmrunnerdesc.memory_manager
+        if memmgr is None:
+            return False
+        return memmgr.retrace_hot_bridges > 0
+
     def reached_loop_header(self, greenboxes, redboxes):
         self.heapcache.reset() #reset_virtuals=False)
         #self.heapcache.reset_keep_likely_virtuals()
@@ -2526,6 +2628,11 @@ class MetaInterp(object):
             live_arg_boxes += self.virtualizable_boxes
             live_arg_boxes.pop()
 
+        if self.may_retrace_hot_bridges():
+            # the loop may be invalidated by compile.bridge_jumps_to_own_loop():
+            # the code already running in it must then leave it here
+            self.generate_guard(rop.GUARD_NOT_INVALIDATED)
+
         # generate a dummy guard just before the JUMP so that unroll can use it
         # when it's creating artificial guards.
         self.generate_guard(rop.GUARD_FUTURE_CONDITION)
@@ -2562,6 +2669,11 @@ class MetaInterp(object):
                 if self.partial_trace:
                     if start != self.retracing_from:
                         raise SwitchToBlackhole(Counters.ABORT_BAD_LOOP) # For now
+                if self.baseline:
+                    # the baseline tier only compiles function bodies,
+                    # without inlining: leave the loops to the full tier
+                    self.staticdata.log('cancelled: loop in baseline trace')
+                    raise SwitchToBlackhole(Counters.ABORT_BAD_LOOP)
                 # Found!  Compile it as a loop.
                 # raises in case it works -- which is the common case
                 self.compile_loop(original_boxes, live_arg_boxes, start,
@@ -2631,6 +2743,29 @@ class MetaInterp(object):
         if kind == 'float': raise jitexc.DoneWithThisFrameFloat(res)
         raise AssertionError(kind)
 
+    def count_polymorphic_bridge(self):
+        """Called when tracing a bridge from a guard_value that failed.
+        Each new value seen by a promotion adds one more bridge, chained
+        after the previous ones.  After 'max_polymorphism' of them for
+        the same promotion in the same loop, it is considered megamorphic
+        and the next bridges are traced without inlining the calls they
+        do, using call_assembler instead.  This keeps the code size of
+        e.g. a call site that sees many different functions reasonable.
+        """
+        memmgr = self.staticdata.warmrunnerdesc.memory_manager
+        if memmgr.max_polymorphism <= 0:
+            return
+        token = self.resumekey_original_loop_token
+        frame = self.framestack[-1]
+        key = (frame.jitcode, frame.pc)
+        if token.polymorphic_sites is None:
+            token.polymorphic_sites = {}
+        count = token.polymorphic_sites.get(key, 0) + 1
+        token.polymorphic_sites[key] = count
+        if count > memmgr.max_polymorphism:
+            debug_print("megamorphic guard_value: not inlining calls")
+            self.megamorphic = True
+
     def prepare_resume_from_failure(self, deadframe, inputargs, resumedescr):
         exception = self.cpu.grab_exc_value(deadframe)
         if (isinstance(resumedescr, compile.ResumeGuardExcDescr) or
@@ -2758,6 +2893,8 @@ class MetaInterp(object):
         if target_token is not None: # raise if it *worked* correctly
             assert isinstance(target_token, TargetToken)
             jitcell_token = target_token.targeting_jitcell_token
+            if jitcell_token is self.resumekey_original_loop_token:
+                compile.bridge_jumps_to_own_loop(self, greenkey, jitcell_token)
             self.raise_continue_running_normally(live_arg_boxes, jitcell_token)
 
     def compile_done_with_this_frame(self, exitbox):
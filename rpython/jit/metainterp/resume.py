@@ -180,10 +180,13 @@ class ResumeDataLoopMemo(object):
         self.refs = self.cpu.ts.new_ref_dict_2()
         self.cached_boxes = {}
         self.cached_virtuals = {}
+        self.numberings = {}     # encoded numbering -> NUMBERING
 
         self.nvirtuals = 0
         self.nvholes = 0
         self.nvreused = 0
+        self.nnumbshared = 0
+        self.nnumbbytes = 0
 
     def getconst(self, const):
         if const.type == INT:
@@ -317,6 +320,19 @@ class ResumeDataLoopMemo(object):
         profiler.count(jitprof.Counters.NVIRTUALS, self.nvirtuals)
         profiler.count(jitprof.Counters.NVHOLES, self.nvholes)
         profiler.count(jitprof.Counters.NVREUSED, self.nvreused)
+        profiler.count(jitprof.Counters.NUMB_SHARED, self.nnumbshared)
+        profiler.count(jitprof.Counters.NUMB_BYTES, self.nnumbbytes)
+
+    def create_numbering(self, numb_state):
+        # numberings are shared between the guards of the loop that have
+        # the same resume data: they all use the same 'consts'
+        num_before = len(self.numberings)
+        numb = numb_state.create_numbering(self.numberings)
+        if len(self.numberings) == num_before:
+            self.nnumbshared += 1
+        else:
+            self.nnumbbytes += len(numb.code)
+        return numb
 
 _frame_info_placeholder = (None, 0, 0)
 
@@ -465,7 +481,7 @@ class ResumeDataVirtualAdder(VirtualVisitor):
         numb_state.patch(1, len(liveboxes))
 
         self._add_optimizer_sections(numb_state, liveboxes, liveboxes_from_env)
-        storage.rd_numb = numb_state.create_numbering()
+        storage.rd_numb = self.memo.create_numbering(numb_state)
         storage.rd_consts = self.memo.consts
         return liveboxes[:]
 
@@ -92,13 +92,27 @@ class Writer(object):
         assert rffi.cast(lltype.Signed, short) == item
         return self.append_short(short)
 
-    def create_numbering(self):
+    def create_numbering(self, cache=None):
+        """ Encode the items.  If 'cache' is a dict, an existing
+        numbering with the same encoding found there is returned instead
+        of a new one: many guards of a loop have exactly the same resume
+        data, and numberings are never modified once created.
+        """
         final = objectmodel.newlist_hint(len(self.current) * 3)
         for item in self.current:
             append_numbering(final, item)
+        key = None
+        if cache is not None:
+            key = ''.join([chr(rffi.cast(lltype.Signed, elt))
+                           for elt in final])
+            numb = cache.get(key, NULL_NUMBER)
+            if numb:
+                return numb
         numb = lltype.malloc(NUMBERING, len(final))
         for i, elt in enumerate(final):
             numb.code[i] = elt
+        if cache is not None:
+            cache[key] = numb
         return numb
 
     def patch_current_size(self, index):
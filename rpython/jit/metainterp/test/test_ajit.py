@@ -13,7 +13,7 @@ from rpython.rlib import rerased
 from rpython.rlib.jit import (JitDriver, we_are_jitted, hint, dont_look_inside,
     loop_invariant, elidable, promote, jit_debug, assert_green,
     AssertGreenFailed, unroll_safe, current_trace_length, look_inside_iff,
-    isconstant, isvirtual, set_param, record_exact_class)
+    isconstant, isvirtual, set_param, record_exact_class, PARAMETERS)
 from rpython.rlib.longlong2float import float2longlong, longlong2float
 from rpython.rlib.rarithmetic import ovfcheck, is_valid_int, int_force_ge_zero
 from rpython.rtyper.lltypesystem import lltype, rffi
@@ -4248,6 +4248,116 @@ class TestLLtype(BaseLLtypeTests, LLJitMixin):
         assert res == 42
         self.check_aborted_count(3)
 
+    def test_abort_backoff(self):
+        def g():
+            if we_are_jitted():
+                raise NotImplementedError
+            raise ValueError
+        g.oopspec = 'jit.not_in_trace()'
+
+        jitdriver = JitDriver(greens=[], reds=['n'])
+        def f(n):
+            while n >= 0:
+                jitdriver.jit_merge_point(n=n)
+                try:
+                    g()
+                except ValueError:
+                    n -= 1
+            return 42
+
+        res = self.meta_interp(f, [40])
+        assert res == 42
+        self.check_aborted_count(10)
+        # after the first aborts, wait for 2*threshold and then for
+        # 4*threshold iterations before each new attempt
+        res = self.meta_interp(f, [40], abort_backoff=2)
+        assert res == 42
+        self.check_aborted_count(4)
+
+    def test_retrace_hot_bridges(self):
+        jitdriver = JitDriver(greens=[], reds=['i', 'k', 'x'])
+        def f(k):
+            i = 0
+            x = 0
+            while i < 30:
+                jitdriver.jit_merge_point(i=i, k=k, x=x)
+                if k < 2:
+                    x += 1
+                else:
+                    x += 3      # the common path from now on
+                i += 1
+            return x
+        def main():
+            total = 0
+            for k in range(6):
+                total += f(k)
+            return total
+
+        # with retrace_limit=0, the bridge jumps back into the loop
+        # instead of starting a specialized version of it.  By default,
+        # the loop stays as it is
+        res = self.meta_interp(main, [], retrace_limit=0,
+                    retrace_hot_bridges=PARAMETERS['retrace_hot_bridges'])
+        assert res == main()
+        self.check_jitcell_token_count(1)
+        assert len(get_stats().invalidated_token_numbers) == 0
+        # the bridge of the loop becomes the common path: with
+        # retrace_hot_bridges=1, the loop is invalidated and traced again
+        # the next time it is entered
+        res = self.meta_interp(main, [], retrace_limit=0,
+                               retrace_hot_bridges=1)
+        assert res == main()
+        self.check_jitcell_token_count(2)
+        assert len(get_stats().invalidated_token_numbers) == 1
+
+    def test_retrace_hot_bridges_only_once(self):
+        jitdriver = JitDriver(greens=[], reds=['i', 'k', 'x'])
+        def f(k):
+            i = 0
+            x = 0
+            while i < 30:
+                jitdriver.jit_merge_point(i=i, k=k, x=x)
+                if k % 2:
+                    x += 1
+                else:
+                    x += 3
+                i += 1
+            return x
+        def main():
+            total = 0
+            for k in range(8):
+                total += f(k)
+            return total
+
+        # the retraced loop gets a bridge jumping back into it too, but
+        # it is not invalidated a second time
+        res = self.meta_interp(main, [], retrace_limit=0,
+                               retrace_hot_bridges=1)
+        assert res == main()
+        assert len(get_stats().invalidated_token_numbers) == 1
+
+    def test_retrace_hot_bridges_running_loop(self):
+        jitdriver = JitDriver(greens=[], reds=['i', 'n', 'x'])
+        def f(n):
+            i = 0
+            x = 0
+            while i < n:
+                jitdriver.jit_merge_point(i=i, n=n, x=x)
+                if i < 30:
+                    x += 1
+                else:
+                    x += 3      # the common path from now on
+                i += 1
+            return x
+
+        # the loop is invalidated while it runs: the code running it
+        # leaves it, and the loop is traced again in the same call
+        res = self.meta_interp(f, [200], retrace_limit=0,
+                               retrace_hot_bridges=1)
+        assert res == f(200)
+        assert len(get_stats().invalidated_token_numbers) == 1
+        self.check_jitcell_token_count(2)
+
     def test_not_in_trace_blackhole(self):
         class X:
             seen = 0
@@ -24,11 +24,12 @@ class FakeEffectinfo(object):
 
     OS_ARRAYCOPY = 0
 
-    def __init__(self, extraeffect, oopspecindex, write_descrs_fields, write_descrs_arrays):
+    def __init__(self, extraeffect, oopspecindex, write_descrs_fields, write_descrs_arrays, can_invalidate=False):
         self.extraeffect = extraeffect
         self.oopspecindex = oopspecindex
         self._write_descrs_fields = write_descrs_fields
         self._write_descrs_arrays = write_descrs_arrays
+        self.can_invalidate = can_invalidate
         if len(write_descrs_arrays) == 1:
             [self.single_write_descr_array] = write_descrs_arrays
         else:
@@ -37,18 +38,23 @@ class FakeEffectinfo(object):
     def has_random_effects(self):
         return self.extraeffect == self.EF_RANDOM_EFFECTS
 
+    def check_can_invalidate(self):
+        return self.can_invalidate
+
 class FakeCallDescr(object):
-    def __init__(self, extraeffect, oopspecindex=None, write_descrs_fields=[], write_descrs_arrays=[]):
+    def __init__(self, extraeffect, oopspecindex=None, write_descrs_fields=[], write_descrs_arrays=[], can_invalidate=False):
         self.extraeffect = extraeffect
         self.oopspecindex = oopspecindex
         self.__write_descrs_fields = write_descrs_fields
         self.__write_descrs_arrays = write_descrs_arrays
+        self.can_invalidate = can_invalidate
 
     def get_extra_info(self):
         return FakeEffectinfo(
             self.extraeffect, self.oopspecindex,
             write_descrs_fields=self.__write_descrs_fields,
             write_descrs_arrays=self.__write_descrs_arrays,
+            can_invalidate=self.can_invalidate,
         )
 
 arraycopydescr1 = FakeCallDescr(FakeEffectinfo.EF_CANNOT_RAISE, FakeEffectinfo.OS_ARRAYCOPY, write_descrs_arrays=[descr1])
@@ -766,6 +772,8 @@ class TestHeapCache(object):
             EF_ELIDABLE_CANNOT_RAISE = 2
             EF_ELIDABLE_OR_MEMORYERROR = 3
             EF_ELIDABLE_CAN_RAISE = 4
+            def check_can_invalidate(self):
+                return False
         descr.get_extra_info = XTra
         h.invalidate_caches(rop.CALL_N, descr, [])
         assert h.is_unescaped(box1)
@@ -853,3 +861,29 @@ class TestHeapCache(object):
             rop.CALL_N, FakeCallDescr(FakeEffectinfo.EF_CAN_RAISE), [])
         assert not h.is_quasi_immut_known(descr2, box3)
         assert not h.is_quasi_immut_known(descr2, box4)
+
+    def test_guard_not_invalidated_seen(self):
+        h = HeapCache()
+        box1 = RefFrontendOp(1)
+        assert not h.is_guard_not_invalidated_known()
+        h.guard_not_invalidated_now_known()
+        assert h.is_guard_not_invalidated_known()
+        # field writes and calls that cannot invalidate loops keep it
+        h.setfield(box1, box1, descr1)
+        h.invalidate_caches(rop.SETFIELD_GC, None, [box1, box1])
+        h.invalidate_caches(
+            rop.CALL_N, FakeCallDescr(FakeEffectinfo.EF_CAN_RAISE), [])
+        assert h.is_guard_not_invalidated_known()
+        # calls that can invalidate loops don't
+        h.invalidate_caches(
+            rop.CALL_N, FakeCallDescr(FakeEffectinfo.EF_CAN_RAISE,
+                                      can_invalidate=True), [])
+        assert not h.is_guard_not_invalidated_known()
+        h.guard_not_invalidated_now_known()
+        h.invalidate_caches(
+            rop.CALL_MAY_FORCE_N, FakeCallDescr(FakeEffectinfo.EF_CAN_RAISE),
+            [])
+        assert not h.is_guard_not_invalidated_known()
+        h.guard_not_invalidated_now_known()
+        h.reset()
+        assert not h.is_guard_not_invalidated_known()
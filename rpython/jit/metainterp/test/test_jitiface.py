@@ -92,6 +92,35 @@ class JitHookInterfaceTests(object):
                           ("optimize", 4, 2, "loop"),
                           ("compile", 4, 2, "loop")]
 
+    def test_on_loop_compiled_without_hooks(self):
+        called = []
+
+        class MyJitIface(JitHookInterface):
+            def are_hooks_enabled(self):
+                return False
+
+            def after_compile(self, di):
+                called.append("compile")
+
+            def on_loop_compiled(self, jitdriver, greenkey):
+                assert jitdriver is driver
+                called.append(("loop", greenkey[1].getint(),
+                               greenkey[0].getint()))
+
+        iface = MyJitIface()
+
+        driver = JitDriver(greens = ['n', 'm'], reds = ['i'])
+
+        def loop(n, m):
+            i = 0
+            while i < n + m:
+                driver.can_enter_jit(n=n, m=m, i=i)
+                driver.jit_merge_point(n=n, m=m, i=i)
+                i += 1
+
+        self.meta_interp(loop, [1, 4], policy=JitPolicy(iface))
+        assert called == [("loop", 4, 1)]
+
     def test_on_compile_bridge(self):
         called = []
         
@@ -141,6 +170,36 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_counter_value(None,
                                                      Counters.TRACING) == 2
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) >= 0
+            assert jit_hooks.stats_get_longest_pause(None) >= 0
+
+        self.meta_interp(main, [], ProfilerClass=Profiler)
+
+    def test_get_loop_stats(self):
+        driver = JitDriver(greens = [], reds = ['i', 's'])
+
+        def loop(i):
+            s = 0
+            while i > 0:
+                driver.jit_merge_point(i=i, s=s)
+                if i % 2:
+                    s += 1
+                i -= 1
+                s+= 2
+            return s
+
+        def main():
+            loop(30)
+            l = jit_hooks.stats_get_loop_stats(None)
+            assert l[0].type == 'l'
+            number = l[0].number
+            failures = 0
+            for i in range(1, len(l)):
+                assert l[i].type == 'g'
+                assert l[i].number == number
+                assert l[i].counter > 0
+                failures += l[i].counter
+            # the guard on 'i % 2' failed until its bridge was compiled
+            assert failures > 0
 
         self.meta_interp(main, [], ProfilerClass=Profiler)
 
@@ -155,6 +214,7 @@ class JitHookInterfaceTests(object):
             assert jit_hooks.stats_get_counter_value(None,
                                            Counters.TOTAL_COMPILED_LOOPS) == 0
             assert jit_hooks.stats_get_times_value(None, Counters.TRACING) == 0
+            assert jit_hooks.stats_get_longest_pause(None) == 0
         self.meta_interp(main, [], ProfilerClass=EmptyProfiler)
 
     def test_get_jitcell_at_key(self):
@@ -54,9 +54,11 @@ class TestProfile(ProfilerMixin):
             ]
         assert profiler.events == expected
         assert profiler.times == [2, 1]
+        # the backend runs nested inside tracing: a single pause
+        assert profiler.get_longest_pause() == 3
         py.test.skip("disabled until unrolling")
         assert profiler.counters == [1, 1, 3, 3, 2, 15, 2, 0, 0, 0, 0,
-                                     0, 0, 0, 0, 0, 0, 0]
+                                     0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
 
     def test_simple_loop_with_call(self):
         @dont_look_inside
@@ -17,10 +17,18 @@ from rpython.rlib.jit import JitDriver, dont_look_inside
 from rpython.jit.metainterp.warmspot import get_stats
 from rpython.jit.metainterp.warmstate import BaseJitCell
 from rpython.rlib import rgc
+from rpython.rlib.jit import Counters
 
 class FakeLoopToken:
     generation = 0
     invalidated = False
+    code_size = 0
+
+class FakeProfiler:
+    def __init__(self):
+        self.counters = {}
+    def count(self, kind, inc=1):
+        self.counters[kind] = self.counters.get(kind, 0) + inc
 
 
 class _TestMemoryManager:
@@ -79,6 +87,32 @@ class _TestMemoryManager:
                 assert tokens[i] in memmgr.alive_loops
 
 
+    def test_max_code_size(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_code_size(100)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.add_code_size(token, 30)
+            memmgr.next_generation()
+            assert memmgr.get_alive_code_size() <= 100
+        assert memmgr.alive_loops == dict.fromkeys(tokens[8:])
+
+    def test_max_code_size_least_recently_entered(self):
+        memmgr = MemoryManager()
+        memmgr.profiler = FakeProfiler()
+        memmgr.set_max_code_size(100)
+        tokens = [FakeLoopToken() for i in range(3)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.add_code_size(token, 40)
+            memmgr.keep_loop_alive(tokens[0])    # entered all the time
+            memmgr.next_generation()
+        assert memmgr.alive_loops == {tokens[0]: None, tokens[2]: None}
+        assert memmgr.profiler.counters == {Counters.EVICTED_LOOPS: 1,
+                                            Counters.EVICTED_CODE_SIZE: 40}
+
+
 class _TestIntegration(LLJitMixin):
     # See comments in TestMemoryManager.  To get temporarily the normal
     # behavior just rename this class to TestIntegration.
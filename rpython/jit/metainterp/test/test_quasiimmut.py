@@ -103,6 +103,29 @@ class QuasiImmutTests(object):
         # there should be no getfields, even though optimizations are turned off
         self.check_resops(guard_not_invalidated=1)
 
+    def test_one_guard_for_several_constants(self):
+        myjitdriver = JitDriver(greens=['foo', 'bar'], reds=['x', 'total'])
+        class Foo:
+            _immutable_fields_ = ['a?']
+            def __init__(self, a):
+                self.a = a
+        def f(a, x):
+            foo = Foo(a)
+            bar = Foo(a + 1)
+            total = 0
+            while x > 0:
+                myjitdriver.jit_merge_point(foo=foo, bar=bar, x=x,
+                                            total=total)
+                # read the quasi-immutable fields of two Constants: the
+                # second GUARD_NOT_INVALIDATED is not even recorded
+                total += foo.a + bar.a
+                x -= 1
+            return total
+        #
+        res = self.meta_interp(f, [100, 7], enable_opts="")
+        assert res == 1407
+        self.check_resops(guard_not_invalidated=1)
+
     def test_nonopt_1(self):
         myjitdriver = JitDriver(greens=[], reds=['x', 'total', 'lst'])
         class Foo:
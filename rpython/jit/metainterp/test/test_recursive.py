@@ -341,9 +341,9 @@ class RecursiveTests:
         TRACE_LIMIT = 66
         res = self.meta_interp(loop, [100], enable_opts='', inline=True, trace_limit=TRACE_LIMIT)
         assert res == 0
-        self.check_max_trace_length(TRACE_LIMIT)
+        self.check_max_trace_length(2 * TRACE_LIMIT)
         self.check_enter_count_at_most(10) # maybe
-        self.check_aborted_count(6)
+        self.check_aborted_count(5)
 
     def test_trace_limit_bridge(self):
         def recursive(n):
@@ -396,6 +396,36 @@ class RecursiveTests:
         res = self.meta_interp(loop, [100], trace_limit=TRACE_LIMIT)
         assert res == 80
 
+    def test_split_too_long_trace(self):
+        driver = JitDriver(greens=['pc', 'code'], reds=['n'],
+                           get_printable_location=lambda pc, code: str(pc))
+
+        def interp(code, n):
+            pc = 0
+            while pc < len(code):
+                driver.jit_merge_point(pc=pc, code=code, n=n)
+                if code[pc] == '+':
+                    n += 1
+                else:
+                    n = (n * 3) & 0xffff
+                pc += 1
+            return n
+
+        codes = ['+*' * 30, '*+' * 30]
+        def main(n):
+            res = 0
+            for i in range(n):
+                res += interp(codes[i & 1], i)
+            return res
+
+        TRACE_LIMIT = 50
+        res = self.meta_interp(main, [40], trace_limit=TRACE_LIMIT)
+        assert res == main(40)
+        # the function is compiled in several pieces, instead of aborting
+        self.check_aborted_count(0)
+        self.check_max_trace_length(2 * TRACE_LIMIT)
+        assert get_stats().compiled_count >= 3
+
     def test_max_failure_args(self):
         FAILARGS_LIMIT = 10
         jitdriver = JitDriver(greens = [], reds = ['i', 'n', 'o'])
@@ -1274,6 +1304,110 @@ class RecursiveTests:
         self.meta_interp(portal, [0, 0, 0], inline=True)
         self.check_resops(call_may_force=0, call=0)
 
+    def test_baseline_tier(self):
+        driver = JitDriver(greens = ['codeno'], reds = ['n'],
+                           get_printable_location = lambda codeno: str(codeno))
+
+        def portal(codeno, n):
+            while True:
+                driver.jit_merge_point(codeno=codeno, n=n)
+                if codeno == 0:
+                    return portal(1, n) * 2
+                if codeno == 1:
+                    return n + 1
+                codeno -= 1
+                driver.can_enter_jit(codeno=codeno, n=n)
+
+        def main(m, function_threshold):
+            set_param(driver, 'baseline_threshold', 3)
+            set_param(driver, 'function_threshold', function_threshold)
+            res = 0
+            for i in range(m):
+                res += portal(0, i)
+            return res
+
+        def compiled_ops():
+            # check_resops() ignores the loops ending in FINISH
+            return [op.getopname() for loop in get_stats().get_all_loops()
+                                   for op in loop.operations]
+
+        # entering 'portal' 3 times is enough to compile both entries,
+        # but the call to the inner one is not inlined
+        res = self.meta_interp(main, [10, 1000], inline=True)
+        assert res == main(10, 1000)
+        self.check_jitcell_token_count(2)
+        self.check_trace_count(2)
+        assert compiled_ops().count('call_assembler_i') == 1
+        for token in get_stats().get_all_jitcell_tokens():
+            assert token.is_baseline
+        # after 'function_threshold' more entries, the outer entry is
+        # compiled again, this time with the inner one inlined
+        res = self.meta_interp(main, [40, 20], inline=True)
+        assert res == main(40, 20)
+        self.check_trace_count(3)
+        ops = compiled_ops()
+        assert ops.count('call_assembler_i') == 1
+        assert ops.count('int_lshift') == 2
+        assert ops.count('int_add') == 2
+
+    def test_baseline_tier_loop(self):
+        driver = JitDriver(greens = ['codeno'], reds = ['n', 'i'],
+                           get_printable_location = lambda codeno: str(codeno))
+
+        def portal(codeno, n):
+            i = 0
+            while True:
+                driver.jit_merge_point(codeno=codeno, n=n, i=i)
+                if i >= n:
+                    return i
+                i += 1
+                driver.can_enter_jit(codeno=codeno, n=n, i=i)
+
+        def main(m, codeno, n):
+            set_param(driver, 'threshold', 1000)
+            set_param(driver, 'baseline_threshold', 3)
+            set_param(driver, 'function_threshold', 10)
+            res = 0
+            for i in range(m):
+                res += portal(codeno, n)
+            return res
+
+        # the baseline trace gives up on the loop only once; the
+        # following entries count towards a normal trace
+        res = self.meta_interp(main, [40, 0, 5], inline=True)
+        assert res == main(40, 0, 5)
+        self.check_aborted_count(1)
+        self.check_jitcell_token_count(1)
+
+    def test_megamorphic_guard_value(self):
+        driver = JitDriver(greens = ['codeno'], reds = ['n', 'i'],
+                           get_printable_location = lambda codeno: str(codeno))
+
+        def portal(codeno, n):
+            i = 0
+            while True:
+                driver.jit_merge_point(codeno=codeno, n=n, i=i)
+                if codeno > 0:
+                    return codeno * 3
+                if i >= n:
+                    return i
+                # a call site that sees 6 different callees
+                callee = promote(i % 6 + 1)
+                i += portal(callee, 0) - callee * 3 + 1
+                driver.can_enter_jit(codeno=codeno, n=n, i=i)
+
+        def main(n):
+            return portal(0, n)
+
+        res = self.meta_interp(main, [200], inline=True, max_polymorphism=0)
+        assert res == main(200)
+        self.check_resops(call_assembler_i=0)
+        # with max_polymorphism=2, the bridges made after the first two
+        # ones for the promotion don't inline the call any more
+        res = self.meta_interp(main, [200], inline=True, max_polymorphism=2)
+        assert res == main(200)
+        self.check_resops(call_assembler_i=6)
+
     def test_dont_repeatedly_trace_from_the_same_guard(self):
         driver = JitDriver(greens = [], reds = ['level', 'i'])
 
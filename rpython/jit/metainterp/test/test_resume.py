@@ -10,7 +10,7 @@ from rpython.jit.metainterp.resume import ResumeDataVirtualAdder,\
      VArrayInfoNotClear, VStrPlainInfo, VStrConcatInfo, VStrSliceInfo,\
      VUniPlainInfo, VUniConcatInfo, VUniSliceInfo,\
      capture_resumedata, ResumeDataLoopMemo, UNASSIGNEDVIRTUAL, INT,\
-     annlowlevel, PENDINGFIELDSP, TAG_CONST_OFFSET
+     annlowlevel, PENDINGFIELDSP, TAG_CONST_OFFSET, NumberingState
 from rpython.jit.metainterp.resumecode import unpack_numbering,\
      create_numbering, NULL_NUMBER
 from rpython.jit.metainterp.opencoder import Trace, Snapshot, TopSnapshot
@@ -936,6 +936,20 @@ def test_ResumeDataLoopMemo_number():
         2, 1, tag(3, TAGINT), tag(0, TAGVIRTUAL), tag(0, TAGBOX), tag(3, TAGINT)
         ] + [0, 0]
 
+def test_ResumeDataLoopMemo_create_numbering_shared():
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    numbs = []
+    for lst in [[5, 0, 300], [5, 0, 300], [5, 0, 4]]:
+        numb_state = NumberingState(len(lst))
+        for item in lst:
+            numb_state.append_int(item)
+        numbs.append(memo.create_numbering(numb_state))
+    assert numbs[0] == numbs[1]
+    assert numbs[2] != numbs[0]
+    assert unpack_numbering(numbs[2]) == [5, 0, 4]
+    assert memo.nnumbshared == 1
+    assert memo.nnumbbytes == 4 + 3
+
 @given(strategies.lists(strategies.builds(IntFrontendOp, strategies.just(0)) | intconsts,
        min_size=1))
 def test_ResumeDataLoopMemo_random(lst):
@@ -60,3 +60,17 @@ def test_patch(l):
         n = w.create_numbering()
         assert unpack_numbering(n)[1:] == l
         assert unpack_numbering(n)[0] == middle + 1
+
+def test_create_numbering_cache():
+    cache = {}
+    numbs = []
+    for l in [[1, 2, 300], [1, 2, 300], [1, 2, 3]]:
+        w = Writer()
+        for item in l:
+            w.append_int(item)
+        numbs.append(w.create_numbering(cache))
+    assert numbs[0] == numbs[1]
+    assert numbs[2] != numbs[0]
+    assert unpack_numbering(numbs[0]) == [1, 2, 300]
+    assert unpack_numbering(numbs[2]) == [1, 2, 3]
+    assert len(cache) == 2
@@ -988,9 +988,10 @@ class VirtualTests:
             while i < 17:
                 driver.can_enter_jit(i=i, val=val)
                 driver.jit_merge_point(i=i, val=val)
-                # Logical & rather than comparison to confuse range analysis.
+                # Logical ^ and & rather than comparison to confuse range
+                # and known bits analysis.
                 # Test only succeeds on the first 2 iterations
-                if i & -2 == 0:
+                if (i ^ 1) & -2 == 0:
                     val = const.unbox
                 else:
                     val = X(i)
@@ -3,7 +3,8 @@ from rpython.rtyper.lltypesystem import lltype, llmemory, rstr, rffi
 from rpython.rtyper.annlowlevel import llhelper
 from rpython.jit.metainterp.warmstate import wrap, unwrap, specialize_value
 from rpython.jit.metainterp.warmstate import equal_whatever, hash_whatever
-from rpython.jit.metainterp.warmstate import WarmEnterState
+from rpython.jit.metainterp.warmstate import WarmEnterState, BACKOFF_EXPIRY
+from rpython.jit.metainterp.warmstate import JC_RETRACED_HOT
 from rpython.jit.metainterp.resoperation import InputArgInt, InputArgRef,\
      InputArgFloat
 from rpython.jit.metainterp.history import ConstInt, ConstFloat, ConstPtr,\
@@ -212,3 +213,68 @@ def test_make_jitdriver_callbacks_5():
     state.make_jitdriver_callbacks()
     res = state.can_never_inline(5, 42.5)
     assert res is True
+
+def test_backoff_cell_expires():
+    class FakeWarmRunnerDesc:
+        rtyper = None
+        cpu = None
+        memory_manager = None
+        jitcounter = DeterministicJitCounter()
+    class FakeJitDriverSD:
+        jitdriver = None
+        _green_args_spec = [lltype.Signed]
+        _get_printable_location_ptr = None
+        _confirm_enter_jit_ptr = None
+        _get_unique_id_ptr = None
+        _can_never_inline_ptr = None
+        _should_unroll_one_iteration_ptr = None
+        red_args_types = []
+
+    state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
+    state.make_jitdriver_callbacks()
+    state.set_param_abort_backoff(3)
+    jitcounter = FakeWarmRunnerDesc.jitcounter
+    JitCell = state.JitCell
+    hash = JitCell.get_uhash(5)
+    state.tracing_aborted([ConstInt(5)])
+    assert JitCell.get_jitcell(5).backoff == 1
+    # the cell is kept while its greenkey was seen recently...
+    for i in range(BACKOFF_EXPIRY):
+        jitcounter.decay_all_counters()
+    jitcounter.cleanup_chain(hash)
+    assert JitCell.get_jitcell(5).backoff == 1
+    # ...but it is eventually forgotten
+    jitcounter.decay_all_counters()
+    jitcounter.cleanup_chain(hash)
+    assert JitCell.get_jitcell(5) is None
+
+def test_retraced_hot_cell_is_kept():
+    from rpython.jit.metainterp.history import JitCellToken
+    class FakeWarmRunnerDesc:
+        rtyper = None
+        cpu = None
+        memory_manager = None
+        jitcounter = DeterministicJitCounter()
+    class FakeJitDriverSD:
+        jitdriver = None
+        _green_args_spec = [lltype.Signed]
+        _get_printable_location_ptr = None
+        _confirm_enter_jit_ptr = None
+        _get_unique_id_ptr = None
+        _can_never_inline_ptr = None
+        _should_unroll_one_iteration_ptr = None
+        red_args_types = []
+
+    state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
+    JitCell = state.make_jitcell_subclass()
+    jitcounter = FakeWarmRunnerDesc.jitcounter
+    hash = JitCell.get_uhash(5)
+    token = JitCellToken()
+    cell = JitCell._ensure_jit_cell_at_key(5)
+    cell.set_procedure_token(token)
+    cell.flags |= JC_RETRACED_HOT
+    token.invalidated = True
+    # the invalidated loop has no procedure token any more, but the
+    # cell must remember that it was already invalidated once
+    jitcounter.cleanup_chain(hash)
+    assert JitCell.get_jitcell(5) is cell
@@ -91,8 +91,8 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
                     loop_longevity=0, retrace_limit=5, function_threshold=4,
                     disable_unrolling=sys.maxint,
                     enable_opts=ALL_OPTS_NAMES, max_retrace_guards=15,
-                    max_unroll_recursion=7, vec=0, vec_all=0, vec_cost=0,
-                    **kwds):
+                    max_unroll_recursion=7, max_polymorphism=8,
+                    retrace_hot_bridges=0, abort_backoff=0, vec=0, vec_all=0, vec_cost=0, **kwds):
     from rpython.config.config import ConfigError
     translator = interp.typer.annotator.translator
     try:
@@ -115,6 +115,9 @@ def jittify_and_run(interp, graph, args, repeat=1, graph_and_interp_only=False,
         jd.warmstate.set_param_max_retrace_guards(max_retrace_guards)
         jd.warmstate.set_param_enable_opts(enable_opts)
         jd.warmstate.set_param_max_unroll_recursion(max_unroll_recursion)
+        jd.warmstate.set_param_max_polymorphism(max_polymorphism)
+        jd.warmstate.set_param_retrace_hot_bridges(retrace_hot_bridges)
+        jd.warmstate.set_param_abort_backoff(abort_backoff)
         jd.warmstate.set_param_disable_unrolling(disable_unrolling)
         jd.warmstate.set_param_vec(vec)
         jd.warmstate.set_param_vec_all(vec_all)
@@ -506,6 +509,7 @@ class WarmRunnerDesc(object):
         else:
             self.metainterp_sd.opencoder_model = Model
         self.stats.metainterp_sd = self.metainterp_sd
+        self.memory_manager.profiler = self.metainterp_sd.profiler
 
     def make_hooks(self, hooks):
         if hooks is None:
@@ -576,7 +580,7 @@ class WarmRunnerDesc(object):
 
         def maybe_enter_jit(*args):
             try:
-                maybe_compile_and_run(state.increment_threshold, *args)
+                maybe_compile_and_run(state.increment_threshold, False, *args)
             except Exception as e:
                 crash_in_jit(e)
         maybe_enter_jit._always_inline_ = True
@@ -941,7 +945,7 @@ class WarmRunnerDesc(object):
             try:
                 # maybe enter from the function's start.
                 maybe_compile_and_run(
-                    state.increment_function_threshold, *args)
+                    state.increment_function_threshold, True, *args)
                 #
                 # then run the normal portal function, i.e. the
                 # interpreter's main loop.  It might enter the jit
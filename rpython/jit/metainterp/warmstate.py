@@ -5,7 +5,7 @@ from rpython.jit.codewriter import support, heaptracker, longlong
 from rpython.jit.metainterp import resoperation, history, jitexc
 from rpython.rlib.debug import debug_start, debug_stop, debug_print
 from rpython.rlib.debug import have_debug_prints_for
-from rpython.rlib.jit import PARAMETERS
+from rpython.rlib.jit import PARAMETERS, Counters
 from rpython.rlib.rjitlog import rjitlog as jl
 from rpython.rlib.nonconst import NonConstant
 from rpython.rlib.objectmodel import specialize, we_are_translated, r_dict
@@ -138,6 +138,13 @@ JC_TRACING         = 0x01
 JC_DONT_TRACE_HERE = 0x02
 JC_TEMPORARY       = 0x04
 JC_TRACING_OCCURRED= 0x08
+JC_RETRACED_HOT    = 0x10
+JC_NO_BASELINE     = 0x20
+
+# a JitCell whose tracing aborted is forgotten, together with its
+# 'backoff', if its greenkey was not seen during that many decays of
+# the JitCounter
+BACKOFF_EXPIRY = 100
 
 class BaseJitCell(object):
     """Subclasses of BaseJitCell are used in tandem with the single
@@ -184,8 +191,23 @@ class BaseJitCell(object):
         this particular function.  (We only set this flag when aborting
         due to a trace too long, so we use the same flag as a hint to
         also mean "please trace from here as soon as possible".)
+
+        JC_RETRACED_HOT: the loop from this greenkey was already
+        invalidated once because of its hot bridges; don't do it again.
+
+        JC_NO_BASELINE: tracing this function for the baseline tier
+        failed (e.g. because it contains a loop).  Count the following
+        entries towards a normal trace instead.
+
+    A JitCell also records in 'backoff' how many times in a row tracing
+    from its greenkey was aborted, if the 'abort_backoff' parameter is
+    set: each abort doubles the threshold for the next attempt.  Such a
+    JitCell expires if its greenkey is not seen again for a while, see
+    'backoff_generation'.
     """
     flags = 0     # JC_xxx flags
+    backoff = 0
+    backoff_generation = 0    # jitcounter.decay_generation when last seen
     wref_procedure_token = None
     next = None
 
@@ -215,13 +237,25 @@ class BaseJitCell(object):
             return False    # don't remove JitCells with a procedure_token
         if self.flags & JC_TRACING:
             return False    # don't remove JitCells that are being traced
+        if self.flags & JC_RETRACED_HOT:
+            return False    # don't forget it, or we would invalidate again
         if self.flags & JC_DONT_TRACE_HERE:
             # if we have this flag, and we *had* a procedure_token but
             # we no longer have one, then remove me.  this prevents this
             # JitCell from being immortal.
             return self.has_seen_a_procedure_token()     # i.e. dead weakref
+        if self.flags & JC_NO_BASELINE:
+            # same logic: keep the flag until a normal procedure_token
+            # was compiled and later freed
+            return self.has_seen_a_procedure_token()
+        if self.backoff > 0:
+            # don't forget too soon that tracing here keeps aborting
+            return self.backoff_expired()
         return True   # Other JitCells can be removed.
 
+    def backoff_expired(self):
+        return False     # overridden in the subclasses
+
 # ____________________________________________________________
 
 
@@ -253,6 +287,9 @@ class WarmEnterState(object):
     def set_param_function_threshold(self, threshold):
         self.increment_function_threshold = self._compute_threshold(threshold)
 
+    def set_param_baseline_threshold(self, threshold):
+        self.increment_baseline = self._compute_threshold(threshold)
+
     def set_param_trace_eagerness(self, value):
         self.increment_trace_eagerness = self._compute_threshold(value)
 
@@ -289,6 +326,12 @@ class WarmEnterState(object):
             self.warmrunnerdesc.memory_manager is not None):   # all for tests
             self.warmrunnerdesc.memory_manager.set_max_age(value)
 
+    def set_param_loop_memory_limit(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if (self.warmrunnerdesc is not None and
+            self.warmrunnerdesc.memory_manager is not None):   # all for tests
+            self.warmrunnerdesc.memory_manager.set_max_code_size(value * 1024)
+
     def set_param_retrace_limit(self, value):
         if self.warmrunnerdesc:
             if self.warmrunnerdesc.memory_manager:
@@ -309,6 +352,19 @@ class WarmEnterState(object):
             if self.warmrunnerdesc.memory_manager:
                 self.warmrunnerdesc.memory_manager.max_unroll_recursion = value
 
+    def set_param_max_polymorphism(self, value):
+        if self.warmrunnerdesc:
+            if self.warmrunnerdesc.memory_manager:
+                self.warmrunnerdesc.memory_manager.max_polymorphism = value
+
+    def set_param_retrace_hot_bridges(self, value):
+        if self.warmrunnerdesc:
+            if self.warmrunnerdesc.memory_manager:
+                self.warmrunnerdesc.memory_manager.retrace_hot_bridges = value
+
+    def set_param_abort_backoff(self, value):
+        self.abort_backoff = min(value, 30)
+
     def set_param_vec(self, ivalue):
         self.vec = bool(ivalue)
 
@@ -326,10 +382,46 @@ class WarmEnterState(object):
         debug_print("disabled inlining", loc)
         debug_stop("jit-disableinlining")
 
+    def tracing_aborted(self, greenkey):
+        # with 'abort_backoff', a greenkey whose tracing keeps aborting
+        # needs twice as many iterations before every new attempt
+        if self.abort_backoff <= 0:
+            return
+        cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+        jitcounter = self.warmrunnerdesc.jitcounter
+        cell.backoff_generation = jitcounter.decay_generation
+        if cell.backoff < self.abort_backoff:
+            cell.backoff += 1
+            if self.profiler is not None:
+                self.profiler.count(Counters.TRACE_BACKOFF)
+            debug_start("jit-backoff")
+            loc = self.get_location_str(greenkey)
+            debug_print("threshold multiplied by", 1 << cell.backoff, loc)
+            debug_stop("jit-backoff")
+
+    def invalidate_for_hot_bridges(self, greenkey, procedure_token):
+        # the path through the loop that was traced is no longer the
+        # common one: trace the loop again, but only once per greenkey
+        cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
+        if cell.flags & JC_RETRACED_HOT:
+            return False
+        cell.flags |= JC_RETRACED_HOT
+        debug_start("jit-hot-bridges")
+        loc = self.get_location_str(greenkey)
+        debug_print("invalidating loop with hot bridges", loc)
+        debug_stop("jit-hot-bridges")
+        procedure_token.invalidated = True
+        self.cpu.invalidate_loop(procedure_token)
+        if not we_are_translated():
+            self.cpu.stats.invalidated_token_numbers.add(
+                procedure_token.number)
+        return True
+
     def attach_procedure_to_interp(self, greenkey, procedure_token):
         cell = self.JitCell.ensure_jit_cell_at_key(greenkey)
         old_token = cell.get_procedure_token()
         cell.set_procedure_token(procedure_token)
+        cell.backoff = 0
         if old_token is not None:
             self.cpu.redirect_call_assembler(old_token, procedure_token)
             # procedure_token is also kept alive by any loop that used
@@ -345,6 +437,7 @@ class WarmEnterState(object):
         if hasattr(self, 'entry_point_fns'):
             return self.entry_point_fns
 
+        warmstate = self
         warmrunnerdesc = self.warmrunnerdesc
         metainterp_sd = warmrunnerdesc.metainterp_sd
         jitdriver_sd = self.jitdriver_sd
@@ -412,7 +505,7 @@ class WarmEnterState(object):
             fail_descr.handle_fail(deadframe, metainterp_sd, jitdriver_sd)
             assert 0, "should have raised"
 
-        def bound_reached(hash, cell, *args):
+        def bound_reached(hash, cell, baseline, *args):
             if not confirm_enter_jit(*args):
                 return
             jitcounter.decay_all_counters()
@@ -421,6 +514,7 @@ class WarmEnterState(object):
             # start tracing
             from rpython.jit.metainterp.pyjitpl import MetaInterp
             metainterp = MetaInterp(metainterp_sd, jitdriver_sd)
+            metainterp.baseline = baseline
             greenargs = args[:num_green_args]
             if cell is None:
                 cell = JitCell(*greenargs)
@@ -430,11 +524,22 @@ class WarmEnterState(object):
                 metainterp.compile_and_run_once(jitdriver_sd, *args)
             finally:
                 cell.flags &= ~JC_TRACING
+                if baseline and cell.get_procedure_token() is None:
+                    cell.flags |= JC_NO_BASELINE
 
-        def maybe_compile_and_run(increment_threshold, *args):
+        def maybe_compile_and_run(increment_threshold, function_entry, *args):
             """Entry point to the JIT.  Called at the point with the
             can_enter_jit() hint, and at the start of a function
             with a different threshold.
+
+            At the start of a function, if 'baseline_threshold' is
+            lower than 'function_threshold', the function body is first
+            compiled by the baseline tier: traced without inlining the
+            other functions it calls, which is cheap and gives a
+            method-at-a-time compilation.  Entering such a baseline
+            procedure ticks the counter again, and after
+            'function_threshold' more entries the function is traced
+            again, with inlining, and replaces the baseline procedure.
             """
             # Look for the cell corresponding to the current greenargs.
             # Search for the JitCell that is of the correct subclass of
@@ -450,8 +555,13 @@ class WarmEnterState(object):
                 cell = cell.next
             else:
                 # not found. increment the counter
+                if (function_entry and
+                        warmstate.increment_baseline > increment_threshold):
+                    if jitcounter.tick(hash, warmstate.increment_baseline):
+                        bound_reached(hash, None, True, *args)
+                    return
                 if jitcounter.tick(hash, increment_threshold):
-                    bound_reached(hash, None, *args)
+                    bound_reached(hash, None, False, *args)
                 return
 
             # Here, we have found 'cell'.
@@ -463,7 +573,7 @@ class WarmEnterState(object):
                     return
                 # attached by compile_tmp_callback().  count normally
                 if jitcounter.tick(hash, increment_threshold):
-                    bound_reached(hash, cell, *args)
+                    bound_reached(hash, cell, False, *args)
                 return
             # machine code was already compiled for these greenargs
             procedure_token = cell.get_procedure_token()
@@ -478,12 +588,33 @@ class WarmEnterState(object):
                         else:
                             tick = True
                         if tick:
-                            bound_reached(hash, cell, *args)
+                            bound_reached(hash, cell, False, *args)
                         return
+                if cell.backoff > 0:
+                    # tracing from here aborted before: try again, but
+                    # only after a threshold doubled for every abort
+                    cell.backoff_generation = jitcounter.decay_generation
+                    if jitcounter.tick(hash, increment_threshold /
+                                             float(1 << cell.backoff)):
+                        bound_reached(hash, cell, False, *args)
+                    return
+                if cell.flags & (JC_NO_BASELINE | JC_RETRACED_HOT):
+                    # the baseline tier gave up on this function, or the
+                    # loop was invalidated because of its hot bridges:
+                    # count normally, towards a trace with the full tier
+                    if jitcounter.tick(hash, increment_threshold):
+                        bound_reached(hash, cell, False, *args)
+                    return
                 # it was an aborted compilation, or maybe a weakref that
                 # has been freed
                 jitcounter.cleanup_chain(hash)
                 return
+            if procedure_token.is_baseline:
+                # count the entries into the baseline procedure, and
+                # replace it with a fully optimized one when hot enough
+                if jitcounter.tick(hash, increment_threshold):
+                    bound_reached(hash, cell, False, *args)
+                    return
             if not confirm_enter_jit(*args):
                 return
             # extract and unspecialize the red arguments to pass to
@@ -558,6 +689,10 @@ class WarmEnterState(object):
                     setattr(self, attrname, greenargs[i])
                     i = i + 1
 
+            def backoff_expired(self):
+                age = jitcounter.decay_generation - self.backoff_generation
+                return age > BACKOFF_EXPIRY
+
             def comparekey(self, *greenargs2):
                 i = 0
                 for attrname, TYPE in green_args_name_spec:
@@ -11,6 +11,7 @@ REGEXES = [
     (('tracing_no', 'tracing_time'), '^Tracing:\s+([\d.]+)\s+([\d.]+)$'),
     (('backend_no', 'backend_time'), '^Backend:\s+([\d.]+)\s+([\d.]+)$'),
     (None, '^TOTAL.*$'),
+    (('longest_pause',), '^Longest pause:\s+([\d.]+)$'),
     (('ops.total',), '^ops:\s+(\d+)$'),
     (('recorded_ops.total',), '^recorded ops:\s+(\d+)$'),
     (('recorded_ops.calls',), '^\s+calls:\s+(\d+)$'),
@@ -27,8 +28,13 @@ REGEXES = [
     (('nvirtuals',), '^nvirtuals:\s+(\d+)$'),
     (('nvholes',), '^nvholes:\s+(\d+)$'),
     (('nvreused',), '^nvreused:\s+(\d+)$'),
+    (('numb_shared',), '^numb shared:\s+(\d+)$'),
+    (('numb_bytes',), '^numb bytes:\s+(\d+)$'),
     (('vecopt_tried',), '^vecopt tried:\s+(\d+)$'),
     (('vecopt_success',), '^vecopt success:\s+(\d+)$'),
+    (('evicted_loops',),          '^Evicted # of loops:\s+(\d+)$'),
+    (('evicted_code_size',),      '^Evicted code size:\s+(\d+)$'),
+    (('trace_backoffs',),         '^Trace backoffs:\s+(\d+)$'),
     (('total_compiled_loops',),   '^Total # of loops:\s+(\d+)$'),
     (('total_compiled_bridges',), '^Total # of bridges:\s+(\d+)$'),
     (('total_freed_loops',),      '^Freed # of loops:\s+(\d+)$'),
@@ -51,6 +57,7 @@ class OutputInfo(object):
     tracing_time = 0.0
     backend_no = 0
     backend_time = 0.0
+    longest_pause = 0.0
     asm_no = 0
     asm_time = 0.0
     guards = 0
@@ -60,8 +67,13 @@ class OutputInfo(object):
     nvirtuals = 0
     nvholes = 0
     nvreused = 0
+    numb_shared = 0
+    numb_bytes = 0
     vecopt_tried = 0
     vecopt_success = 0
+    evicted_loops = 0
+    evicted_code_size = 0
+    trace_backoffs = 0
 
     def __init__(self):
         self.ops = Ops()
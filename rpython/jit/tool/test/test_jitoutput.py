@@ -46,6 +46,7 @@ def test_really_run():
 DATA = '''Tracing:         1       0.006992
 Backend:        1       0.000525
 TOTAL:                  0.025532
+Longest pause:          0.007517
 ops:                    2
 recorded ops:           6
   calls:                3
@@ -62,8 +63,13 @@ abort: force quasi-immut: 3
 nvirtuals:              13
 nvholes:                14
 nvreused:               15
+numb shared:            16
+numb bytes:             1700
 vecopt tried:           12
 vecopt success:         4
+Evicted # of loops:     7
+Evicted code size:      4096
+Trace backoffs:         3
 Total # of loops:       100
 Total # of bridges:     300
 Freed # of loops:       99
@@ -76,6 +82,7 @@ def test_parse():
     assert info.tracing_time == 0.006992
     assert info.backend_no == 1
     assert info.backend_time == 0.000525
+    assert info.longest_pause == 0.007517
     assert info.ops.total == 2
     assert info.recorded_ops.total == 6
     assert info.recorded_ops.calls == 3
@@ -91,5 +98,10 @@ def test_parse():
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
+    assert info.numb_shared == 16
+    assert info.numb_bytes == 1700
     assert info.vecopt_tried == 12
     assert info.vecopt_success == 4
+    assert info.evicted_loops == 7
+    assert info.evicted_code_size == 4096
+    assert info.trace_backoffs == 3
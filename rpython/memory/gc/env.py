@@ -48,6 +48,28 @@ def read_float_from_env(varname):
         return 0.0
     return value
 
+def read_duration_from_env(varname):
+    """Returns a duration in seconds.  Accepts the suffixes s, ms and us."""
+    value = os.environ.get(varname)
+    if value:
+        factor = 1.0
+        stop = len(value)
+        if value.endswith('ms'):
+            stop -= 2
+            factor = 0.001
+        elif value.endswith('us'):
+            stop -= 2
+            factor = 0.000001
+        elif value.endswith('s'):
+            stop -= 1
+        assert stop >= 0
+        value = value[:stop]
+        try:
+            return float(value) * factor
+        except ValueError:
+            pass
+    return 0.0
+
 
 # ____________________________________________________________
 # Get the total amount of RAM installed in a system.
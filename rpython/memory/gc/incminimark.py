@@ -52,6 +52,24 @@ Environment variables can be used to fine-tune the following parameters:
                          in time.  Defaults to a conservative value depending
                          on nursery size and maximum object size inside the
                          nursery.  Useful for debugging by setting it to 0.
+
+ PYPY_GC_MAX_PAUSE       Target for the duration of the incremental steps of
+                         a major collection, like '2ms' or '500us'.  The
+                         amount of marking and sweeping work done per step
+                         is scaled down until the steps fit.  The marking
+                         steps still do at least twice the size surviving
+                         the minor collections, so that the collection
+                         always completes.  Default is no target.
+
+ PYPY_GC_RELEASE_DELAY   Give back to the OS the memory of the free pages
+                         in the arenas once they have stayed free for
+                         about this long, like '10s' or '500ms'.  Entirely
+                         free arenas are always given back.  Default is
+                         to keep the free pages.
+
+ PYPY_GC_MARK_PREFETCH   How many gray objects are prefetched ahead of the
+                         one being marked.  Defaults to 8; the maximum is 64,
+                         and 0 disables prefetching.
 """
 # XXX Should find a way to bound the major collection threshold by the
 # XXX total addressable size.  Maybe by keeping some minimarkpage arenas
@@ -190,6 +208,13 @@ FORWARDSTUB = lltype.GcStruct('forwarding_stub',
 FORWARDSTUBPTR = lltype.Ptr(FORWARDSTUB)
 NURSARRAY = lltype.Array(llmemory.Address)
 
+# the smallest fraction of the default amount of work done by the steps
+# of a major collection, when PYPY_GC_MAX_PAUSE asks for shorter steps
+MIN_PAUSE_FACTOR = 1.0 / 4096
+
+# the maximal value of PYPY_GC_MARK_PREFETCH
+MARK_PREFETCH_MAX = 64
+
 # ____________________________________________________________
 
 
@@ -319,6 +344,21 @@ class IncrementalMiniMarkGC(MovingGCBase):
         self.debug_rotating_nurseries = lltype.nullptr(NURSARRAY)
         self.extra_threshold = 0
         #
+        # A FIFO of gray objects whose header was prefetched, used by
+        # visit_all_objects_step().
+        self.mark_prefetch_depth = 8
+        self.mark_prefetch_fifo = lltype.malloc(NURSARRAY, MARK_PREFETCH_MAX,
+                                                flavor='raw', immortal=True)
+        #
+        # PYPY_GC_MAX_PAUSE, in seconds, or 0.0.  'pause_factor' scales
+        # the work done by the marking and sweeping steps, see _paced().
+        self.max_pause = 0.0
+        self.pause_factor = 1.0
+        #
+        # PYPY_GC_RELEASE_DELAY, in seconds, or 0.0
+        self.release_delay = 0.0
+        self.last_release_time = 0.0
+        #
         # The ArenaCollection() handles the nonmovable objects allocation.
         if ArenaCollectionClass is None:
             from rpython.memory.gc import minimarkpage
@@ -518,6 +558,23 @@ class IncrementalMiniMarkGC(MovingGCBase):
             # Estimate this number conservatively
             bigobj = self.nonlarge_max + 1
             self.max_number_of_pinned_objects = self.nursery_size / (bigobj * 2)
+        #
+        env_mark_prefetch = os.environ.get('PYPY_GC_MARK_PREFETCH')
+        if env_mark_prefetch:
+            try:
+                mark_prefetch = int(env_mark_prefetch)
+            except ValueError:
+                mark_prefetch = -1
+            if 0 <= mark_prefetch <= MARK_PREFETCH_MAX:
+                self.mark_prefetch_depth = mark_prefetch
+        #
+        max_pause = env.read_duration_from_env('PYPY_GC_MAX_PAUSE')
+        if max_pause > 0.0:
+            self.max_pause = max_pause
+        #
+        release_delay = env.read_duration_from_env('PYPY_GC_RELEASE_DELAY')
+        if release_delay > 0.0:
+            self.release_delay = release_delay
 
     def enable(self):
         self.enabled = True
@@ -986,7 +1043,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                       "rounding up made totalsize > small_request_threshold")
             #
             # Allocate from the ArenaCollection.  Don't clear it.
-            result = self.ac.malloc(totalsize)
+            result = self._malloc_from_arenas(totalsize)
             #
             extra_flags = GCFLAG_TRACK_YOUNG_PTRS
             #
@@ -1890,6 +1947,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
         #
         self.root_walker.finished_minor_collection()
         #
+        if self.release_delay > 0.0:
+            self.release_free_pages_if_due(start)
+        #
         debug_stop("gc-minor")
         duration = time.time() - start
         self.total_gc_time += duration
@@ -1898,6 +1958,19 @@ class IncrementalMiniMarkGC(MovingGCBase):
             total_memory_used=total_memory_used,
             pinned_objects=self.pinned_objects_in_nursery)
 
+    def release_free_pages_if_due(self, now):
+        # A free page is given back to the OS by the first call to
+        # release_free_pages() after it was already free at the previous
+        # call, i.e. after it stayed free between 1 and 2 times
+        # 'release_delay'.
+        if now - self.last_release_time >= self.release_delay:
+            self.last_release_time = now
+            debug_start("gc-release-pages")
+            self.ac.release_free_pages()
+            debug_print("pages given back to the OS:",
+                        self.ac.num_released_pages)
+            debug_stop("gc-release-pages")
+
     def _reset_flag_old_objects_pointing_to_pinned(self, obj, ignore):
         ll_assert(self.header(obj).tid & GCFLAG_PINNED_OBJECT_PARENT_KNOWN != 0,
                   "!GCFLAG_PINNED_OBJECT_PARENT_KNOWN, but requested to reset.")
@@ -2214,12 +2287,20 @@ class IncrementalMiniMarkGC(MovingGCBase):
         if (r_uint(raw_malloc_usage(totalsize)) <=
             r_uint(self.small_request_threshold)):
             # most common path
-            return self.ac.malloc(totalsize)
+            return self._malloc_from_arenas(totalsize)
         else:
             # for nursery objects that are not small
             return self._malloc_out_of_nursery_nonsmall(totalsize)
     _malloc_out_of_nursery._always_inline_ = True
 
+    def _malloc_from_arenas(self, totalsize):
+        if self.gc_state == STATE_SWEEPING:
+            # sweep lazily the pages of the size class we allocate from,
+            # to reuse the blocks freed there instead of a new page
+            self.ac.sweep_for_malloc(totalsize, self._free_if_unvisited)
+        return self.ac.malloc(totalsize)
+    _malloc_from_arenas._always_inline_ = True
+
     def _malloc_out_of_nursery_nonsmall(self, totalsize):
         if r_uint(raw_malloc_usage(totalsize)) > r_uint(self.nursery_size):
             out_of_memory("memory corruption: bad size for object in the "
@@ -2361,11 +2442,10 @@ class IncrementalMiniMarkGC(MovingGCBase):
                         self.objects_to_trace.length(),
                         "plus",
                         self.more_objects_to_trace.length())
-            estimate = self.gc_increment_step
-            estimate_from_nursery = self.nursery_surviving_size * 2
+            estimate = self._paced(intmask(self.gc_increment_step))
+            estimate_from_nursery = intmask(self.nursery_surviving_size * 2)
             if estimate_from_nursery > estimate:
                 estimate = estimate_from_nursery
-            estimate = intmask(estimate)
             remaining = self.visit_all_objects_step(estimate)
             #
             if remaining >= estimate // 2:
@@ -2451,6 +2531,8 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # a total object size of at least '3 * nursery_size' bytes
                 # is processed.
                 limit = 3 * self.nursery_size // self.small_request_threshold
+                limit = self._paced_sweeping(limit,
+                                             self.small_request_threshold)
                 nobjects = self.free_unvisited_rawmalloc_objects_step(limit)
                 debug_print("freeing raw objects:", limit-nobjects,
                             "freed, limit was", limit)
@@ -2461,6 +2543,7 @@ class IncrementalMiniMarkGC(MovingGCBase):
                 # GCFLAG_VISITED on the others.  Visit at most '3 *
                 # nursery_size' bytes.
                 limit = 3 * self.nursery_size // self.ac.page_size
+                limit = self._paced_sweeping(limit, self.ac.page_size)
                 done = self.ac.mass_free_incremental(self._free_if_unvisited,
                                                      limit)
                 status = done and "No more pages left." or "More to do."
@@ -2546,11 +2629,51 @@ class IncrementalMiniMarkGC(MovingGCBase):
         debug_stop("gc-collect-step")
         duration = time.time() - start
         self.total_gc_time += duration
+        if self.max_pause > 0.0 and (oldstate == STATE_MARKING or
+                                     oldstate == STATE_SWEEPING):
+            self._adjust_pause_factor(duration)
         self.hooks.fire_gc_collect_step(
             duration=duration,
             oldstate=oldstate,
             newstate=self.gc_state)
 
+    def _paced(self, limit):
+        """Scale down the amount of work 'limit' of a marking or sweeping
+        step according to PYPY_GC_MAX_PAUSE."""
+        if self.max_pause > 0.0:
+            limit = int(limit * self.pause_factor)
+            if limit < 1:
+                limit = 1
+        return limit
+
+    def _paced_sweeping(self, limit, unit):
+        """Like _paced(), for a sweeping step that visits 'limit'
+        objects or pages of 'unit' bytes.  Like marking, it still sweeps
+        twice as much as what survived the last minor collection, or
+        the heap would grow faster than it is swept."""
+        limit = self._paced(limit)
+        limit_from_nursery = intmask(self.nursery_surviving_size * 2) // unit
+        if limit_from_nursery > limit:
+            limit = limit_from_nursery
+        return limit
+
+    def _adjust_pause_factor(self, duration):
+        # The time taken by a step is roughly proportional to the work it
+        # does: scale the work down to fit if the step was too long, and
+        # let it grow back slowly, up to the default amount, if the step
+        # was well within the target.
+        factor = self.pause_factor
+        if duration > self.max_pause:
+            factor *= 0.8 * self.max_pause / duration
+            if factor < MIN_PAUSE_FACTOR:
+                factor = MIN_PAUSE_FACTOR
+        elif duration < 0.5 * self.max_pause:
+            factor *= 1.25
+            if factor > 1.0:
+                factor = 1.0
+        self.pause_factor = factor
+        debug_print("pause factor:", factor)
+
     def _sweep_old_objects_pointing_to_pinned(self, obj, new_list):
         if self.header(obj).tid & GCFLAG_VISITED:
             new_list.append(obj)
@@ -2675,12 +2798,51 @@ class IncrementalMiniMarkGC(MovingGCBase):
     def visit_all_objects_step(self, size_to_track):
         # Objects can be added to pending by visit
         pending = self.objects_to_trace
-        while pending.non_empty():
-            obj = pending.pop()
+        depth = self.mark_prefetch_depth
+        if depth == 0:
+            while pending.non_empty():
+                obj = pending.pop()
+                size_to_track -= self.visit(obj)
+                if size_to_track < 0 or self.TEST_VISIT_SINGLE_STEP:
+                    return 0
+            return size_to_track
+        #
+        # Marking a large heap is mostly waiting for the cache misses on
+        # the headers of the gray objects.  To overlap them, the objects
+        # popped from 'pending' first go through a FIFO of 'depth'
+        # entries: their header is prefetched when they enter it, and
+        # they are visited when they leave it.  The order in which
+        # objects are marked doesn't matter.
+        fifo = self.mark_prefetch_fifo
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        head = 0      # index in 'fifo' of the next object to visit
+        count = 0     # number of objects in 'fifo'
+        while True:
+            while count < depth and pending.non_empty():
+                obj = pending.pop()
+                llop.raw_prefetch(lltype.Void, obj - size_gc_header)
+                tail = head + count
+                if tail >= depth:
+                    tail -= depth
+                fifo[tail] = obj
+                count += 1
+            if count == 0:
+                return size_to_track
+            obj = fifo[head]
+            head += 1
+            if head == depth:
+                head = 0
+            count -= 1
             size_to_track -= self.visit(obj)
             if size_to_track < 0 or self.TEST_VISIT_SINGLE_STEP:
+                # the objects still in 'fifo' are gray: put them back
+                while count > 0:
+                    pending.append(fifo[head])
+                    head += 1
+                    if head == depth:
+                        head = 0
+                    count -= 1
                 return 0
-        return size_to_track
 
     def visit(self, obj):
         #
@@ -3054,6 +3216,9 @@ class IncrementalMiniMarkGC(MovingGCBase):
             return intmask(self.nursery_size)
         elif stats_no == rgc.TOTAL_GC_TIME:
             return int(self.total_gc_time * 1000)
+        elif stats_no == rgc.RELEASED_ARENA_MEMORY:
+            # only whole pages are given back to the OS
+            return intmask(self.ac.num_released_pages * self.ac.page_size)
         return 0
 
 
@@ -15,6 +15,8 @@ assert 1 << WORD_POWER_2 == WORD
 # The actual allocation occurs in whole arenas, which are then subdivided
 # into pages.  For each arena we allocate one of the following structures:
 
+ADDRESS_ARRAY = rffi.CArray(llmemory.Address)
+
 ARENA_PTR = lltype.Ptr(lltype.ForwardReference())
 ARENA = lltype.Struct('ArenaReference',
     # -- The address of the arena, as returned by malloc()
@@ -23,7 +25,16 @@ ARENA = lltype.Struct('ArenaReference',
     ('nfreepages', lltype.Signed),
     ('totalpages', lltype.Signed),
     # -- A chained list of free pages in the arena.  Ends with NULL.
+    #    The pages whose memory was given back to the OS are not in it.
     ('freepages', llmemory.Address),
+    # -- The number of free pages that were already free at the last
+    #    release_free_pages(), and among them, the number of pages whose
+    #    memory was given back to the OS.  The other ones are the last
+    #    ones in 'freepages'.  The released pages are listed in the array
+    #    'releasedpages', which is only allocated when needed.
+    ('nagedpages', lltype.Signed),
+    ('nreleasedpages', lltype.Signed),
+    ('releasedpages', lltype.Ptr(ADDRESS_ARRAY)),
     # -- A linked list of arenas.  See below.
     ('nextarena', ARENA_PTR),
     )
@@ -39,6 +50,21 @@ ARENA_NULL = lltype.nullptr(ARENA)
 # arenas that have 'nfreepages == i'.  We allocate pages out of the
 # arena in 'current_arena'; when it is exhausted we pick another arena
 # with the smallest value for nfreepages (but > 0).
+#
+# The same idea applies to the pages of a size class.  After a major
+# collection, the pages in which at most 1/SPARSE_PAGE_RATIO of the blocks
+# survived are kept in the separate list 'sparse_page_for_size[size_class]'.
+# We take pages from there only when all other non-full pages of that size
+# class are full.  Objects are never moved, but this gives the sparse pages
+# a better chance to become entirely free at the next major collection.
+
+SPARSE_PAGE_RATIO = 4
+
+# The lazy sweeping done by sweep_for_malloc() visits at most this number
+# of pages.  It often runs in the middle of a minor collection, so it must
+# not sweep a whole size class whose pages are still full after sweeping.
+
+LAZY_SWEEP_MAX_PAGES = 4
 
 # ____________________________________________________________
 #
@@ -52,6 +78,10 @@ ARENA_NULL = lltype.nullptr(ARENA)
 #
 # - free: used to be partially full, and is now free again.  The page is
 #   on the chained list of free pages 'freepages' from its arena.
+#
+# - released: free, and its memory was given back to the OS.  Nothing may
+#   be written to it, so the page is not chained but listed in the
+#   array 'releasedpages' of its arena.
 
 # Each allocated page contains blocks of a given size, which can again be in
 # one of three states: allocated, free, or uninitialized.  The uninitialized
@@ -104,6 +134,8 @@ class ArenaCollection(object):
         self.full_page_for_size     = self._new_page_ptr_list(length)
         self.old_page_for_size      = self._new_page_ptr_list(length)
         self.old_full_page_for_size = self._new_page_ptr_list(length)
+        self.sparse_page_for_size     = self._new_page_ptr_list(length)
+        self.old_sparse_page_for_size = self._new_page_ptr_list(length)
         self.nblocks_for_size = lltype.malloc(rffi.CArray(lltype.Signed),
                                               length, flavor='raw',
                                               immortal=True)
@@ -143,6 +175,19 @@ class ArenaCollection(object):
         self.peak_memory_used = r_uint(0)
         self.total_memory_alloced = r_uint(0)
         self.peak_memory_alloced = r_uint(0)
+        #
+        # the number of free pages whose memory was given back to the OS.
+        # Only whole pages are given back, so this is exactly the amount
+        # of memory passed to madvise(), in pages.
+        self.num_released_pages = 0
+        #
+        # used in release_free_pages() only
+        self.pages_to_release = lltype.malloc(ADDRESS_ARRAY,
+                                              self.max_pages_per_arena,
+                                              flavor='raw', immortal=True)
+        # the size of the OS pages, or 0 to ask the OS.  Untranslated,
+        # the arenas are not real memory and 0 stands for 'page_size'.
+        self.os_page_size = 0
 
 
     def _new_page_ptr_list(self, length):
@@ -163,7 +208,9 @@ class ArenaCollection(object):
         size_class = nsize >> WORD_POWER_2
         page = self.page_for_size[size_class]
         if page == PAGE_NULL:
-            page = self.allocate_new_page(size_class)
+            page = self.reuse_sparse_page(size_class)
+            if page == PAGE_NULL:
+                page = self.allocate_new_page(size_class)
         #
         # The result is simply 'page.freeblock'
         result = page.freeblock
@@ -194,6 +241,17 @@ class ArenaCollection(object):
         return result
 
 
+    def reuse_sparse_page(self, size_class):
+        """Move the next sparse page of the given size_class, if any,
+        to 'page_for_size[size_class]' and return it."""
+        page = self.sparse_page_for_size[size_class]
+        if page != PAGE_NULL:
+            self.sparse_page_for_size[size_class] = page.nextpage
+            page.nextpage = PAGE_NULL
+            self.page_for_size[size_class] = page
+        return page
+
+
     def allocate_new_page(self, size_class):
         """Allocate and return a new page for the given size_class."""
         #
@@ -204,15 +262,28 @@ class ArenaCollection(object):
         # The result is simply 'current_arena.freepages'.
         arena = self.current_arena
         result = arena.freepages
-        if arena.nfreepages > 0:
+        freepages = result
+        if arena.nfreepages > arena.nreleasedpages:
             #
             # The 'result' was part of the chained list; read the next.
             arena.nfreepages -= 1
+            if arena.nagedpages > arena.nfreepages:
+                arena.nagedpages = arena.nfreepages
             freepages = result.address[0]
             llarena.arena_reset(result,
                                 llmemory.sizeof(llmemory.Address),
                                 0)
             #
+        elif arena.nfreepages > 0:
+            #
+            # Only pages given back to the OS are left: take the last one
+            # from 'releasedpages'.  'freepages' is left unchanged.
+            arena.nfreepages -= 1
+            arena.nagedpages = arena.nfreepages
+            arena.nreleasedpages = arena.nfreepages
+            result = arena.releasedpages[arena.nreleasedpages]
+            self.num_released_pages -= 1
+            #
         else:
             # The 'result' is part of the uninitialized pages.
             ll_assert(self.num_uninitialized_pages > 0,
@@ -224,11 +295,9 @@ class ArenaCollection(object):
                 freepages = NULL
         #
         arena.freepages = freepages
-        if freepages == NULL:
+        if freepages == NULL and arena.nfreepages == 0:
             # This was the last page, so put the arena away into
             # arenas_lists[0].
-            ll_assert(arena.nfreepages == 0, 
-                      "freepages == NULL but nfreepages > 0")
             arena.nextarena = self.arenas_lists[0]
             self.arenas_lists[0] = arena
             self.current_arena = ARENA_NULL
@@ -315,6 +384,9 @@ class ArenaCollection(object):
         arena.base = arena_base
         arena.nfreepages = 0        # they are all uninitialized pages
         arena.totalpages = npages
+        arena.nagedpages = 0
+        arena.nreleasedpages = 0
+        arena.releasedpages = lltype.nullptr(ADDRESS_ARRAY)
         arena.freepages = firstpage
         self.num_uninitialized_pages = npages
         self.current_arena = arena
@@ -339,8 +411,11 @@ class ArenaCollection(object):
                             self.page_for_size[size_class])
             self.old_full_page_for_size[size_class] = (
                             self.full_page_for_size[size_class])
-            self.page_for_size[size_class]      = PAGE_NULL
-            self.full_page_for_size[size_class] = PAGE_NULL
+            self.old_sparse_page_for_size[size_class] = (
+                            self.sparse_page_for_size[size_class])
+            self.page_for_size[size_class]        = PAGE_NULL
+            self.full_page_for_size[size_class]   = PAGE_NULL
+            self.sparse_page_for_size[size_class] = PAGE_NULL
             size_class -= 1
 
 
@@ -353,12 +428,13 @@ class ArenaCollection(object):
         #
         while size_class >= 1:
             #
-            # Walk the pages in 'page_for_size[size_class]' and
-            # 'full_page_for_size[size_class]' and free some objects.
+            # Walk the pages in 'page_for_size[size_class]',
+            # 'full_page_for_size[size_class]' and
+            # 'sparse_page_for_size[size_class]' and free some objects.
             # Pages completely freed are added to 'page.arena.freepages',
             # and become available for reuse by any size class.  Pages
-            # not completely freed are re-chained either in
-            # 'full_page_for_size[]' or 'page_for_size[]'.
+            # not completely freed are re-chained in 'full_page_for_size[]',
+            # 'page_for_size[]' or 'sparse_page_for_size[]'.
             max_pages = self.mass_free_in_pages(size_class, ok_to_free_func,
                                                 max_pages)
             if max_pages <= 0:
@@ -374,6 +450,32 @@ class ArenaCollection(object):
         return True
 
 
+    def sweep_for_malloc(self, size, ok_to_free_func):
+        """Lazy sweeping: called between mass_free_prepare() and the end of
+        mass_free_incremental(), before malloc(size).  If no page has room
+        for this size, first sweep the not-yet-swept pages of the same
+        size class until one of them has a free block, but at most
+        LAZY_SWEEP_MAX_PAGES of them.  The following malloc() then reuses
+        that memory instead of taking a new page, and the incremental
+        steps are left with less work to do.
+        """
+        size_class = llmemory.raw_malloc_usage(size) >> WORD_POWER_2
+        if self.page_for_size[size_class] == PAGE_NULL:
+            self._sweep_size_class(size_class, ok_to_free_func)
+    sweep_for_malloc._always_inline_ = True
+
+    def _sweep_size_class(self, size_class, ok_to_free_func):
+        npages = 0
+        while (npages < LAZY_SWEEP_MAX_PAGES and
+               self.page_for_size[size_class] == PAGE_NULL and
+               (self.old_full_page_for_size[size_class] != PAGE_NULL or
+                self.old_page_for_size[size_class] != PAGE_NULL or
+                self.old_sparse_page_for_size[size_class] != PAGE_NULL)):
+            self.mass_free_in_pages(size_class, ok_to_free_func, 1)
+            npages += 1
+    _sweep_size_class._dont_inline_ = True
+
+
     def mass_free(self, ok_to_free_func):
         """For each object, if ok_to_free_func(obj) returns True, then free
         the object.
@@ -408,6 +510,10 @@ class ArenaCollection(object):
                     llarena.arena_reset(arena.base, self.arena_size, 4)
                     llarena.arena_free(arena.base)
                     self.total_memory_alloced -= self.arena_size
+                    self.num_released_pages -= arena.nreleasedpages
+                    if arena.releasedpages:
+                        lltype.free(arena.releasedpages, flavor='raw',
+                                    track_allocation=False)
                     lltype.free(arena, flavor='raw', track_allocation=False)
                     self.arenas_count -= 1
                     #
@@ -425,20 +531,130 @@ class ArenaCollection(object):
         self.min_empty_nfreepages = 1
 
 
+    def release_free_pages(self):
+        """Give back to the OS the memory of the free pages that were
+        already free at the previous call and are still free now.  Each
+        run of consecutive pages is given back with a single madvise().
+        """
+        if self.current_arena != ARENA_NULL:
+            self._release_free_pages_in_arena(self.current_arena)
+        i = 0
+        while i < self.max_pages_per_arena:
+            arena = self.arenas_lists[i]
+            while arena != ARENA_NULL:
+                self._release_free_pages_in_arena(arena)
+                arena = arena.nextarena
+            i += 1
+
+    def _release_free_pages_in_arena(self, arena):
+        # The pages that were already free at the previous call and are
+        # not released yet are the last ones in the chained list
+        # 'freepages', from the index 'start'.
+        start = arena.nfreepages - arena.nagedpages
+        stop = arena.nfreepages - arena.nreleasedpages
+        if start < stop:
+            # Unchain them into 'pages_to_release', sorted by address.
+            pages = self.pages_to_release
+            prev = NULL
+            page = arena.freepages
+            i = 0
+            while i < start:
+                prev = page
+                page = page.address[0]
+                i += 1
+            n = 0
+            while i < stop:
+                nextpage = page.address[0]
+                j = n
+                while j > 0 and page < pages[j - 1]:
+                    pages[j] = pages[j - 1]
+                    j -= 1
+                pages[j] = page
+                n += 1
+                page = nextpage
+                i += 1
+            if prev == NULL:
+                arena.freepages = page
+            else:
+                prev.address[0] = page
+            arena.nfreepages -= n
+            #
+            if not arena.releasedpages:
+                arena.releasedpages = lltype.malloc(ADDRESS_ARRAY,
+                                                    arena.totalpages,
+                                                    flavor='raw',
+                                                    track_allocation=False)
+            i = 0
+            while i < n:
+                j = i + 1
+                while j < n and pages[j] == pages[j - 1] + self.page_size:
+                    j += 1
+                self._release_run_of_pages(arena, i, j)
+                i = j
+        arena.nagedpages = arena.nfreepages
+
+    def _release_run_of_pages(self, arena, i, j):
+        # Give back the consecutive pages 'pages_to_release[i:j]'.  Only
+        # whole OS pages can be given back: a page that is not entirely
+        # inside them is chained again in 'freepages' instead.
+        pages = self.pages_to_release
+        runstart = pages[i]
+        runsize = (j - i) * self.page_size
+        lo, hi = self._os_pages_inside(runstart, runsize)
+        if lo < hi:
+            llarena.arena_reset(runstart + lo, hi - lo, 4)
+        while i < j:
+            page = pages[i]
+            ofs = page - runstart
+            arena.nfreepages += 1
+            if lo <= ofs and ofs + self.page_size <= hi:
+                arena.releasedpages[arena.nreleasedpages] = page
+                arena.nreleasedpages += 1
+                self.num_released_pages += 1
+            else:
+                page.address[0] = arena.freepages
+                arena.freepages = page
+            i += 1
+
+    def _os_pages_inside(self, addr, size):
+        """Return the offsets 'lo, hi' from 'addr' of the whole OS pages
+        inside the 'size' bytes at 'addr', rounded to whole arena pages."""
+        os_page_size = self.os_page_size
+        if we_are_translated():
+            if os_page_size == 0:
+                os_page_size = llarena.posixpagesize.get()
+            base = llmemory.cast_adr_to_int(addr)
+        else:
+            if os_page_size == 0:
+                os_page_size = self.page_size
+            base = addr.offset - WORD  # like _start_of_page_untranslated()
+        lo = (os_page_size - base % os_page_size) % os_page_size
+        hi = (base + size) // os_page_size * os_page_size - base
+        # the pages are aligned, so this only changes something if the
+        # OS pages are not a multiple or a divisor of 'page_size'
+        lo = (lo + self.page_size - 1) // self.page_size * self.page_size
+        hi = hi // self.page_size * self.page_size
+        return lo, hi
+
+
     def mass_free_in_pages(self, size_class, ok_to_free_func, max_pages):
         nblocks = self.nblocks_for_size[size_class]
         block_size = size_class * WORD
         remaining_partial_pages = self.page_for_size[size_class]
         remaining_full_pages = self.full_page_for_size[size_class]
+        remaining_sparse_pages = self.sparse_page_for_size[size_class]
         #
         step = 0
-        while step < 2:
+        while step < 3:
             if step == 0:
                 page = self.old_full_page_for_size[size_class]
                 self.old_full_page_for_size[size_class] = PAGE_NULL
-            else:
+            elif step == 1:
                 page = self.old_page_for_size[size_class]
                 self.old_page_for_size[size_class] = PAGE_NULL
+            else:
+                page = self.old_sparse_page_for_size[size_class]
+                self.old_sparse_page_for_size[size_class] = PAGE_NULL
             #
             while page != PAGE_NULL:
                 #
@@ -455,13 +671,20 @@ class ArenaCollection(object):
                     page.nextpage = remaining_full_pages
                     remaining_full_pages = page
                     #
-                elif surviving > 0:
+                elif surviving * SPARSE_PAGE_RATIO > nblocks:
                     #
-                    # There is at least 1 object surviving.  Re-insert
-                    # the page in the 'remaining_partial_pages' chained list.
+                    # Enough objects are surviving.  Re-insert the page
+                    # in the 'remaining_partial_pages' chained list.
                     page.nextpage = remaining_partial_pages
                     remaining_partial_pages = page
                     #
+                elif surviving > 0:
+                    #
+                    # Only a few objects are surviving.  Re-insert the
+                    # page in the 'remaining_sparse_pages' chained list.
+                    page.nextpage = remaining_sparse_pages
+                    remaining_sparse_pages = page
+                    #
                 else:
                     # No object survives; free the page.
                     self.free_page(page)
@@ -473,8 +696,10 @@ class ArenaCollection(object):
                     # pages into self.old_xxx and return early
                     if step == 0:
                         self.old_full_page_for_size[size_class] = nextpage
-                    else:
+                    elif step == 1:
                         self.old_page_for_size[size_class] = nextpage
+                    else:
+                        self.old_sparse_page_for_size[size_class] = nextpage
                     step = 99     # stop
                     break
 
@@ -485,6 +710,7 @@ class ArenaCollection(object):
         #
         self.page_for_size[size_class] = remaining_partial_pages
         self.full_page_for_size[size_class] = remaining_full_pages
+        self.sparse_page_for_size[size_class] = remaining_sparse_pages
         return max_pages
 
 
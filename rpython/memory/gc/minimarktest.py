@@ -21,6 +21,7 @@ class SimpleArenaCollection(object):
         self.all_objects = []
         self.total_memory_used = 0
         self.arenas_count = 0
+        self.num_released_pages = 0
 
     def malloc(self, size):
         nsize = raw_malloc_usage(size)
@@ -53,6 +54,12 @@ class SimpleArenaCollection(object):
                 return False
         return True
 
+    def sweep_for_malloc(self, size, ok_to_free_func):
+        pass
+
+    def release_free_pages(self):
+        pass
+
     def mass_free(self, ok_to_free_func):
         self.mass_free_prepare()
         res = self.mass_free_incremental(ok_to_free_func, sys.maxint)
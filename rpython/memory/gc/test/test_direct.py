@@ -676,6 +676,66 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
         self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
         assert self.stackroots[1].x == 13
 
+    def test_mark_prefetch_fifo(self):
+        for depth in [0, 1, 3, 8]:
+            self.gc.mark_prefetch_depth = depth
+            del self.stackroots[:]
+            for i in range(20):
+                p = self.malloc(S)
+                p.x = i
+                if self.stackroots:
+                    self.write(p, 'next', self.stackroots[-1])
+                self.stackroots.append(p)
+            # only the head of the list is a root now
+            del self.stackroots[:-1]
+            #
+            # with single steps, the objects still in the fifo must be
+            # put back in 'objects_to_trace'
+            self.gc.TEST_VISIT_SINGLE_STEP = True
+            self.gc.debug_gc_step_until(incminimark.STATE_SWEEPING)
+            self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+            del self.gc.TEST_VISIT_SINGLE_STEP
+            self.gc.collect()
+            #
+            p = self.stackroots[0]
+            for i in range(19, -1, -1):
+                assert p.x == i
+                p = p.next
+            assert not p
+
+    def test_max_pause(self):
+        # with an impossible target, every step does the minimal work
+        self.gc.max_pause = 1e-12
+        for i in range(20):
+            p = self.malloc(S)
+            p.x = i
+            if self.stackroots:
+                self.write(p, 'next', self.stackroots[-1])
+            self.stackroots.append(p)
+        del self.stackroots[:-1]
+        self.gc.debug_gc_step_until(incminimark.STATE_MARKING)
+        self.gc.debug_gc_step_until(incminimark.STATE_SCANNING)
+        assert self.gc.pause_factor < 0.1
+        self.gc.collect()
+        assert self.gc.pause_factor == incminimark.MIN_PAUSE_FACTOR
+        assert self.gc._paced(1000) == 1
+        p = self.stackroots[0]
+        for i in range(19, -1, -1):
+            assert p.x == i
+            p = p.next
+        # short steps let the amount of work grow back, up to the default
+        self.gc.max_pause = 1.0
+        for i in range(50):
+            self.gc._adjust_pause_factor(0.0)
+        assert self.gc.pause_factor == 1.0
+        assert self.gc._paced(1000) == 1000
+        self.gc._adjust_pause_factor(0.75)
+        assert self.gc.pause_factor == 1.0
+        self.gc._adjust_pause_factor(2.0)
+        assert self.gc.pause_factor == 0.4
+        self.gc.max_pause = 0.0
+        assert self.gc._paced(1000) == 1000
+
     def test_move_out_of_nursery(self):
         obj0 = self.malloc(S)
         obj0.x = 123
@@ -697,6 +757,57 @@ class TestIncrementalMiniMarkGCSimple(TestMiniMarkGCSimple):
 
 class TestIncrementalMiniMarkGCFull(DirectGCTest):
     from rpython.memory.gc.incminimark import IncrementalMiniMarkGC as GCClass
+    def test_release_free_pages(self):
+        from rpython.rlib import rgc
+        for i in range(40):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+        self.gc.collect()
+        self.stackroots[:] = self.stackroots[::10]
+        self.gc.collect()
+        # most pages now contain no object and are free
+        self.gc.release_delay = 1.0
+        self.gc.release_free_pages_if_due(10.0)
+        assert self.gc.get_stats(rgc.RELEASED_ARENA_MEMORY) == 0
+        self.gc.release_free_pages_if_due(10.5)    # too early
+        assert self.gc.get_stats(rgc.RELEASED_ARENA_MEMORY) == 0
+        self.gc.release_free_pages_if_due(11.0)
+        released = self.gc.get_stats(rgc.RELEASED_ARENA_MEMORY)
+        assert released > 0
+        assert released % self.gc.ac.page_size == 0
+        # the surviving objects and new allocations are fine
+        for i in range(40):
+            p = self.malloc(S)
+            p.x = i
+        self.gc.collect()
+        assert [p.x for p in self.stackroots] == [0, 10, 20, 30]
+        assert self.gc.get_stats(rgc.RELEASED_ARENA_MEMORY) <= released
+
+    def test_sweeping_keeps_up_with_allocations(self):
+        # with the smallest pause factor, a sweeping step would only
+        # visit one page; but it must still sweep at least twice what
+        # survived the last minor collection, or it never finishes
+        for i in range(200):
+            p = self.malloc(S)
+            p.x = i
+            self.stackroots.append(p)
+        self.gc.collect()
+        del self.stackroots[:]
+        self.gc.max_pause = 1e-12
+        self.gc.debug_gc_step_until(incminimark.STATE_SWEEPING)
+        self.gc.pause_factor = incminimark.MIN_PAUSE_FACTOR
+        assert self.gc._paced(1000) == 1
+        # allocate objects of another size class than the garbage, so
+        # that the lazy sweeping in malloc() does not do the work
+        steps = 0
+        while self.gc.gc_state == incminimark.STATE_SWEEPING:
+            for i in range(20):
+                self.stackroots.append(self.malloc(VARNODE))
+            self.gc.debug_gc_step()
+            steps += 1
+            assert steps < 20     # 28 steps without the minimum
+
     def test_malloc_fixedsize_no_cleanup(self):
         p = self.malloc(S)
         import pytest
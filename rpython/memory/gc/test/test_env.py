@@ -82,6 +82,20 @@ def test_read_from_env():
     finally:
         os.environ = saved
 
+def test_read_duration_from_env():
+    saved = os.environ
+    try:
+        for value, expected in [(None, 0.0), ('', 0.0), ('???', 0.0),
+                                ('2', 2.0), ('0.5s', 0.5), ('2ms', 0.002),
+                                ('1.5ms', 0.0015), ('250us', 0.00025),
+                                ('xms', 0.0)]:
+            os.environ = FakeEnviron(value)
+            res = env.read_duration_from_env('FOOBAR')
+            assert type(res) is float
+            assert abs(res - expected) < 1e-12
+    finally:
+        os.environ = saved
+
 def test_get_total_memory_linux2():
     filepath = udir.join('get_total_memory_linux2')
     filepath.write("""\
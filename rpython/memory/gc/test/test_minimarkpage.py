@@ -1,8 +1,9 @@
 import py
+import sys
 from rpython.memory.gc.minimarkpage import ArenaCollection
 from rpython.memory.gc.minimarkpage import PAGE_HEADER, PAGE_PTR
-from rpython.memory.gc.minimarkpage import PAGE_NULL, WORD
-from rpython.memory.gc.minimarkpage import _dummy_size
+from rpython.memory.gc.minimarkpage import PAGE_NULL, ARENA_NULL, WORD
+from rpython.memory.gc.minimarkpage import _dummy_size, LAZY_SWEEP_MAX_PAGES
 from rpython.rtyper.lltypesystem import lltype, llmemory, llarena
 from rpython.rtyper.lltypesystem.llmemory import cast_ptr_to_adr
 
@@ -383,7 +384,9 @@ def test_mass_free_half_page_becomes_more_free():
                                hdrsize + 12*WORD: True}
     page = getpage(ac, 0)
     pageaddr = pagenum(ac, 0)
-    assert page == ac.page_for_size[2]
+    # only 2 blocks out of 12 are in use: the page is sparse
+    assert page == ac.sparse_page_for_size[2]
+    assert ac.page_for_size[2] == PAGE_NULL
     assert page.nextpage == PAGE_NULL
     assert ac._nuninitialized(page, 2) == 4
     assert page.nfree == 6
@@ -400,9 +403,107 @@ def test_mass_free_half_page_becomes_more_free():
     assert freepages(ac) == NULL
     assert ac.full_page_for_size[2] == PAGE_NULL
 
+def test_sparse_page_reused_last():
+    pagesize = hdrsize + 9*WORD
+    ac = arena_collection_for_test(pagesize, "##   ", fill_with_objects=2)
+    ok_to_free = OkToFree(ac, lambda addr: (addr - ac._startpageaddr <
+                                            pagesize + hdrsize + 6*WORD))
+    ac.mass_free(ok_to_free)
+    # page 0 is empty, page 1 keeps one object out of four: it is sparse
+    assert freepages(ac) == pagenum(ac, 0)
+    assert ac.page_for_size[2] == PAGE_NULL
+    assert ac.sparse_page_for_size[2] == getpage(ac, 1)
+    #
+    # a new page is used for another size class...
+    obj = ac.malloc(3*WORD)
+    assert obj == pagenum(ac, 0) + hdrsize
+    # ...but the sparse page is reused before taking a new page
+    for i in range(3):
+        obj = ac.malloc(2*WORD)
+        assert obj == pagenum(ac, 1) + hdrsize + (2 * i) * WORD
+    assert ac.sparse_page_for_size[2] == PAGE_NULL
+    assert ac.full_page_for_size[2] == getpage(ac, 1)
+    assert freepages(ac) == pagenum(ac, 2)
+
+def spy_on_madvise(monkeypatch):
+    released = []
+    arena_reset = llarena.arena_reset
+    def spy(addr, size, zero):
+        if zero == 4:
+            released.append((addr, size))
+        arena_reset(addr, size, zero)
+    monkeypatch.setattr(llarena, 'arena_reset', spy)
+    return released
+
+def test_release_free_pages(monkeypatch):
+    released = spy_on_madvise(monkeypatch)
+    pagesize = hdrsize + 16*WORD
+    ac = arena_collection_for_test(pagesize, "#...#.#", fill_with_objects=2)
+    arena = ac.current_arena
+    assert arena.nfreepages == 4
+    # the first call only notes which pages are free
+    ac.release_free_pages()
+    assert released == []
+    assert ac.num_released_pages == 0
+    assert arena.nagedpages == 4
+    # the pages still free at the next call are released, with one
+    # madvise() per run of consecutive pages
+    ac.release_free_pages()
+    assert released == [(pagenum(ac, 1), 3 * pagesize),
+                        (pagenum(ac, 5), pagesize)]
+    assert ac.num_released_pages == 4
+    assert arena.nreleasedpages == 4
+    assert freepages(ac) == NULL
+    del released[:]
+    ac.release_free_pages()
+    assert released == []
+    assert ac.num_released_pages == 4
+    # the released pages are still usable
+    obj = ac.malloc(3*WORD)
+    assert obj == pagenum(ac, 5) + hdrsize
+    assert ac.num_released_pages == 3
+    assert arena.nfreepages == 3
+    assert arena.nagedpages == arena.nreleasedpages == 3
+    # a page freed again is only released after two more calls
+    ac.free_page(getpage(ac, 0))
+    assert arena.nfreepages == 4
+    assert freepages(ac) == pagenum(ac, 0)
+    ac.release_free_pages()
+    assert ac.num_released_pages == 3
+    ac.release_free_pages()
+    assert ac.num_released_pages == 4
+    assert released == [(pagenum(ac, 0), pagesize)]
+    assert freepages(ac) == NULL
+
+def test_release_free_pages_large_os_pages(monkeypatch):
+    released = spy_on_madvise(monkeypatch)
+    pagesize = hdrsize + 16*WORD
+    ac = arena_collection_for_test(pagesize, "#...##.", fill_with_objects=2)
+    ac.os_page_size = 2 * pagesize
+    arena = ac.current_arena
+    ac.release_free_pages()
+    ac.release_free_pages()
+    # only the OS page made of the pages 2 and 3 is entirely free; the
+    # pages 1 and 6 share theirs with a page in use, and stay chained
+    assert released == [(pagenum(ac, 2), 2 * pagesize)]
+    assert ac.num_released_pages == 2
+    assert arena.nfreepages == 4
+    assert arena.nagedpages == 4
+    assert arena.nreleasedpages == 2
+    assert freepages(ac) == pagenum(ac, 6)
+    assert freepages(ac).address[0] == pagenum(ac, 1)
+    assert freepages(ac).address[0].address[0] == NULL
+    ac.release_free_pages()
+    assert ac.num_released_pages == 2
+    for i in [6, 1, 3, 2]:
+        assert ac.allocate_new_page(5) == getpage(ac, i)
+        ac.page_for_size[5] = PAGE_NULL
+    assert ac.num_released_pages == 0
+    assert ac.current_arena == ARENA_NULL
+
 # ____________________________________________________________
 
-def test_random(incremental=False):
+def test_random(incremental=False, lazy=False, release=False):
     import random
     pagesize = hdrsize + 24*WORD
     num_pages = 3
@@ -429,12 +530,24 @@ def test_random(incremental=False):
         a.mark_freed = my_mark_freed
     ac.allocate_new_arena = my_allocate_new_arena
 
-    def allocate_object(live_objects):
+    def allocate_object(live_objects, ok_to_free=None):
         size_class = random.randrange(1, 7)
+        if ok_to_free is not None:
+            ac.sweep_for_malloc(size_class * WORD, ok_to_free)
         obj = ac.malloc(size_class * WORD)
         at = (obj.arena, obj.offset)
         assert at not in live_objects
         live_objects[at] = size_class * WORD
+        return size_class * WORD
+
+    def maybe_release_free_pages():
+        if release and random.random() < 0.5:
+            ac.release_free_pages()
+            arenas = list(ac._all_arenas())
+            assert ac.num_released_pages == sum([a.nreleasedpages
+                                                 for a in arenas])
+            for a in arenas:
+                assert a.nreleasedpages <= a.nagedpages <= a.nfreepages
 
     try:
         while True:
@@ -455,9 +568,9 @@ def test_random(incremental=False):
                 while not ac.mass_free_incremental(ok_to_free,
                                                    random.randrange(1, 3)):
                     print '[]'
-                    prev = ac.total_memory_used
-                    allocate_object(live_objects_extra)
-                    fresh_extra += ac.total_memory_used - prev
+                    fresh_extra += allocate_object(live_objects_extra,
+                                                   lazy and ok_to_free or None)
+                    maybe_release_free_pages()
             #
             # Check that we have seen all objects
             assert sorted(ok_to_free.seen) == sorted(live_objects)
@@ -471,9 +584,56 @@ def test_random(incremental=False):
             #
             assert not (set(live_objects) & set(live_objects_extra))
             live_objects.update(live_objects_extra)
+            maybe_release_free_pages()
             #
     except DoneTesting:
         pass
 
 def test_random_incremental():
     test_random(incremental=True)
+
+def test_random_incremental_lazy():
+    test_random(incremental=True, lazy=True)
+
+def test_random_release():
+    test_random(incremental=True, lazy=True, release=True)
+
+def test_sweep_for_malloc():
+    pagesize = hdrsize + 9*WORD
+    ac = arena_collection_for_test(pagesize, "#2#  ", fill_with_objects=2)
+    ac.mass_free_prepare()
+    ok_to_free = OkToFree(ac, 0.5)
+    ac.sweep_for_malloc(2*WORD, ok_to_free)
+    # only the first full page was swept: it has now two free blocks
+    assert len(ok_to_free.seen) == 4
+    page = getpage(ac, 0)
+    assert ac.page_for_size[2] == page
+    assert page.nfree == 2
+    assert ac.old_full_page_for_size[2] == getpage(ac, 2)
+    assert ac.old_page_for_size[2] == getpage(ac, 1)
+    # the following malloc() reuses a freed block
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 0) + hdrsize + 2*WORD
+    # nothing to do if a page already has room
+    ac.sweep_for_malloc(2*WORD, ok_to_free)
+    assert len(ok_to_free.seen) == 4
+    # the remaining pages are still swept by mass_free_incremental()
+    assert ac.mass_free_incremental(ok_to_free, sys.maxint)
+    assert len(ok_to_free.seen) == 4 + 4 + 3
+
+def test_sweep_for_malloc_is_bounded():
+    pagesize = hdrsize + 9*WORD
+    ac = arena_collection_for_test(pagesize, "#" * 30 + " ",
+                                   fill_with_objects=2)
+    ac.mass_free_prepare()
+    ok_to_free = OkToFree(ac, False)
+    ac.sweep_for_malloc(2*WORD, ok_to_free)
+    # the pages swept are still full: give up after a few of them
+    assert len(ok_to_free.seen) == 4 * LAZY_SWEEP_MAX_PAGES
+    assert ac.page_for_size[2] == PAGE_NULL
+    assert ac.old_full_page_for_size[2] != PAGE_NULL
+    # the following malloc() takes a new page
+    obj = ac.malloc(2*WORD)
+    assert obj == pagenum(ac, 30) + hdrsize
+    assert ac.mass_free_incremental(ok_to_free, sys.maxint)
+    assert len(ok_to_free.seen) == 4 * 30
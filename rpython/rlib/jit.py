@@ -544,18 +544,29 @@ ENABLE_ALL_OPTS = (
 PARAMETER_DOCS = {
     'threshold': 'number of times a loop has to run for it to become hot',
     'function_threshold': 'number of times a function must run for it to become traced from start',
+    'baseline_threshold': 'number of times a function must run for its body to be compiled by the cheap baseline tier, '
+                          'without inlining other functions, until it reaches function_threshold (0 = disabled)',
     'trace_eagerness': 'number of times a guard has to fail before we start compiling a bridge',
     'decay': 'amount to regularly decay counters by (0=none, 1000=max)',
     'trace_limit': 'number of recorded operations before we abort tracing with ABORT_TOO_LONG',
     'inlining': 'inline python functions or not (1/0)',
     'loop_longevity': 'a parameter controlling how long loops will be kept before being freed, an estimate',
-    'retrace_limit': 'how many times we can try retracing before giving up',
+    'loop_memory_limit': 'maximum size in KB of the machine code of the loops kept alive; above it, '
+                         'the least recently entered loops are freed (0 = no limit)',
+    'retrace_limit': 'how many specialized versions of a loop we can trace for the '
+                     'virtual states its bridges end in, before jumping to the preamble',
     'max_retrace_guards': 'number of extra guards a retrace can cause',
     'max_unroll_loops': 'number of extra unrollings a loop can cause',
     'disable_unrolling': 'after how many operations we should not unroll',
     'enable_opts': 'INTERNAL USE ONLY (MAY NOT WORK OR LEAD TO CRASHES): '
                    'optimizations to enable, or all = %s' % ENABLE_ALL_OPTS,
     'max_unroll_recursion': 'how many levels deep to unroll a recursive function',
+    'max_polymorphism': 'number of bridges that a promoted value can cause in a loop, after which the '
+                        'next bridges for it don\'t inline the calls they do (0 = no limit)',
+    'retrace_hot_bridges': 'number of bridges jumping back into the loop they come from, after which the '
+                           'loop is invalidated and traced again along the path taken then (0 = never)',
+    'abort_backoff': 'after tracing from a place aborted, double the threshold needed to trace it again; '
+                     'do it at most this many times in a row (0 = disabled)',
     'vec': 'turn on the vectorization optimization (vecopt). ' \
            'Supports x86 (SSE 4.1), powerpc (SVX), s390x SIMD',
     'vec_cost': 'threshold for which traces to bail. Unpacking increases the counter,'\
@@ -565,17 +576,22 @@ PARAMETER_DOCS = {
 
 PARAMETERS = {'threshold': 1039, # just above 1024, prime
               'function_threshold': 1619, # slightly more than one above, also prime
+              'baseline_threshold': 0,
               'trace_eagerness': 200,
               'decay': 40,
               'trace_limit': 6000,
               'inlining': 1,
               'loop_longevity': 1000,
-              'retrace_limit': 0,
+              'loop_memory_limit': 0,
+              'retrace_limit': 3,
               'max_retrace_guards': 15,
               'max_unroll_loops': 0,
               'disable_unrolling': 200,
               'enable_opts': 'all',
               'max_unroll_recursion': 7,
+              'max_polymorphism': 8,
+              'retrace_hot_bridges': 0,
+              'abort_backoff': 0,
               'vec': 0,
               'vec_all': 0,
               'vec_cost': 0,
@@ -1132,6 +1148,12 @@ class JitHookInterface(object):
         called with JitDebugInfo instance. Overwrite for custom behavior
         """
 
+    def on_loop_compiled(self, jitdriver, greenkey):
+        """ A cheap hook called after each loop is compiled, even if
+        are_hooks_enabled() returns False.  It only gets the jitdriver and
+        the greenkey (a list of Consts), and nothing is built for it.
+        """
+
     #def before_optimize_bridge(self, debug_info):
     #                           operations, fail_descr_no):
     #    """ A hook called before a bridge is optimized.
@@ -1327,6 +1349,11 @@ class Counters(object):
     NVIRTUALS
     NVHOLES
     NVREUSED
+    NUMB_SHARED
+    NUMB_BYTES
+    EVICTED_LOOPS
+    EVICTED_CODE_SIZE
+    TRACE_BACKOFF
     TOTAL_COMPILED_LOOPS
     TOTAL_COMPILED_BRIDGES
     TOTAL_FREED_LOOPS
@@ -120,6 +120,10 @@ def stats_get_counter_value(warmrunnerdesc, no):
 def stats_get_times_value(warmrunnerdesc, no):
     return warmrunnerdesc.metainterp_sd.profiler.get_times(no)
 
+@register_helper(annmodel.SomeFloat())
+def stats_get_longest_pause(warmrunnerdesc):
+    return warmrunnerdesc.metainterp_sd.profiler.get_longest_pause()
+
 LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
                                                   ('type', lltype.Char),
                                                   ('number', lltype.Signed),
@@ -129,6 +133,20 @@ LOOP_RUN_CONTAINER = lltype.GcArray(lltype.Struct('elem',
 def stats_get_loop_run_times(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.get_all_loop_runs()
 
+# one 'l' entry per alive loop, with its code size (including the
+# bridges) in 'counter', followed by one 'g' entry per guard of it that
+# failed, with the unique id of the guard's descr in 'guard' and the
+# number of failures that left the machine code in 'counter'
+LOOP_STATS_CONTAINER = lltype.GcArray(lltype.Struct('elem',
+                                                    ('type', lltype.Char),
+                                                    ('number', lltype.Signed),
+                                                    ('guard', lltype.Signed),
+                                                    ('counter', lltype.Signed)))
+
+@register_helper(lltype.Ptr(LOOP_STATS_CONTAINER))
+def stats_get_loop_stats(warmrunnerdesc):
+    return warmrunnerdesc.memory_manager.get_loop_stats()
+
 @register_helper(annmodel.SomeInteger(unsigned=True))
 def stats_asmmemmgr_allocated(warmrunnerdesc):
     return warmrunnerdesc.metainterp_sd.cpu.asmmemmgr.get_stats()[0]
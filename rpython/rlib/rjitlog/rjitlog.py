@@ -214,7 +214,7 @@ def returns(*args):
         return method
     return decor
 
-JITLOG_VERSION = 4
+JITLOG_VERSION = 5
 JITLOG_VERSION_16BIT_LE = struct.pack("<H", JITLOG_VERSION)
 
 marks = [
@@ -248,8 +248,15 @@ marks = [
     ('SOURCE_CODE',),
     ('REDIRECT_ASSEMBLER',),
     ('TMP_CALLBACK',),
+    # a bridge ended in a virtual state that no version of the loop accepts
+    ('RETRACE',),
 ]
 
+# what was done about it, logged after MARK_RETRACE
+RETRACE_NEW_VERSION = 'r'       # trace a new specialized version of the loop
+RETRACE_LIMIT = 'p'             # retrace_limit reached, jump to the preamble
+RETRACE_TOO_MANY_GUARDS = 'g'   # max_retrace_guards exceeded, stop retracing
+
 start = 0x11
 for mark, in marks:
     globals()['MARK_' + mark] = chr(start)
@@ -395,6 +402,14 @@ class JitLogger(object):
             memo = {}
         return LogTrace(tag, memo, self.metainterp_sd, mc, self)
 
+    def log_retrace(self, looptoken, count, limit, decision):
+        if not jitlog_enabled():
+            return
+        lst = [encode_le_addr(self.trace_id),
+               encode_le_addr(looptoken.number),
+               encode_le_64bit(count), encode_le_64bit(limit), decision]
+        self._write_marked(MARK_RETRACE, ''.join(lst))
+
     def log_patch_guard(self, descr_number, addr):
         if not jitlog_enabled():
             return
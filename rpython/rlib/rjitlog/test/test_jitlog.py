@@ -146,3 +146,24 @@ class TestLogger(object):
               jl.encode_le_addr(newlooptoken._ll_function_addr)
         assert binary.endswith(end)
         
+
+    def test_retrace(self, tmpdir):
+        looptoken = FakeCallAssemblerLoopToken(0x0)
+        looptoken.number = 42
+        #
+        logger = jl.JitLogger()
+        file = tmpdir.join('binary_file')
+        file.ensure()
+        fd = file.open('wb')
+        jl.jitlog_init(fd.fileno())
+        logger.start_new_trace(self.make_metainterp_sd(), jd_name='jdname')
+        logger.log_retrace(looptoken, 1, 3, jl.RETRACE_NEW_VERSION)
+        logger.log_retrace(looptoken, 3, 3, jl.RETRACE_LIMIT)
+        fd.close()
+        binary = file.read()
+        trace_id = jl.encode_le_addr(logger.trace_id)
+        end = jl.MARK_RETRACE + trace_id + jl.encode_le_addr(42) + \
+              jl.encode_le_64bit(1) + jl.encode_le_64bit(3) + 'r' + \
+              jl.MARK_RETRACE + trace_id + jl.encode_le_addr(42) + \
+              jl.encode_le_64bit(3) + jl.encode_le_64bit(3) + 'p'
+        assert binary.endswith(end)
@@ -160,6 +160,9 @@ def ll_append_res0(ll_builder, ll_str):
 
 @always_inline
 def ll_append_char(ll_builder, char):
+    if jit.we_are_jitted():
+        if ll_jit_try_append_char_virtual(ll_builder, char):
+            return
     jit.conditional_call(ll_builder.current_pos == ll_builder.current_end,
                          ll_grow_by, ll_builder, 1)
     pos = ll_builder.current_pos
@@ -235,6 +238,12 @@ def ll_jit_try_append_slice(ll_builder, ll_str, start, size):
                 pos += 1
                 start += 1
             return True
+    # if the builder is virtual, a concatenation keeps it virtual
+    if jit.isvirtual(ll_builder) and not ll_builder.extra_pieces:
+        piece = rstr.LLHelpers._ll_stringslice(ll_str, start, start + size)
+        _ll_jit_append_piece(ll_builder, piece)
+        return True
+    if jit.isconstant(size):
         # turn appends of length 1 into ll_append_char().
         if size == 1:
             ll_append_char(ll_builder, ll_str.chars[start])
@@ -252,6 +261,44 @@ def ll_jit_try_append_slice(ll_builder, ll_str, start, size):
                 return True
     return False     # use the fall-back path
 
+@always_inline
+def ll_jit_try_append_char_virtual(ll_builder, char):
+    if (jit.isconstant(ll_builder.current_pos) and
+        jit.isconstant(ll_builder.current_end) and
+        ll_builder.current_pos < ll_builder.current_end):
+        return False     # the usual path doesn't force anything
+    if not jit.isvirtual(ll_builder) or ll_builder.extra_pieces:
+        return False
+    piece = ll_builder.mallocfn(1)
+    piece.chars[0] = char
+    _ll_jit_append_piece(ll_builder, piece)
+    return True
+
+@always_inline
+def _ll_jit_append_piece(ll_builder, piece):
+    # Another special case for a virtual builder: instead of copying
+    # 'piece' into the buffer, which forces the buffer as soon as the
+    # length of 'piece' is not a constant, and the builder with it when
+    # the buffer needs to grow, replace the buffer with the concatenation
+    # of what was written so far and 'piece'.  The JIT keeps such
+    # concatenations (and slices) virtual: if the result of build()
+    # escapes, the final string is allocated and filled only once,
+    # without any of the intermediate buffers.  The builder is left
+    # full, so that nothing ever writes into the concatenation.
+    buf = ll_builder.current_buf
+    pos = ll_builder.current_pos
+    if jit.isconstant(pos) and pos == 0:
+        buf = piece
+    else:
+        if pos != ll_builder.current_end:
+            buf = rgc.ll_shrink_array(buf, pos)
+        buf = rstr.LLHelpers.ll_strconcat(buf, piece)
+    size = len(buf.chars)
+    ll_builder.current_buf = buf
+    ll_builder.current_pos = size
+    ll_builder.current_end = size
+    ll_builder.total_size = size
+
 # ------------------------------------------------------------
 # builder.append_multiple_char()
 
@@ -32,6 +32,12 @@
 #define OP_RAW_MEMCOPY(x,y,size,r) memcpy(y,x,size);
 #define OP_RAW_MEMMOVE(x,y,size,r) memmove(y,x,size);
 
+#ifdef __GNUC__
+#  define OP_RAW_PREFETCH(p, r)  __builtin_prefetch((void*)(p))
+#else
+#  define OP_RAW_PREFETCH(p, r)  /* nothing */
+#endif
+
 /************************************************************/
 
 #define OP_FREE(p)	OP_RAW_FREE(p, do_not_use)